@@ -0,0 +1,199 @@
+"""
+CPU and NUMA pinning for ``jlm run`` (``--cpus``, ``--numa-node`` and
+``--spread``).
+
+The CPU affinity is set by ``os.sched_setaffinity`` before ``exec``ing
+Julia and hence is inherited by it.  The memory policy cannot be set
+from Python; it is applied by prefixing the command with ``numactl``
+when it is available.
+
+With ``--spread K``, concurrent launches in the same project get
+disjoint sets of `K` CPUs.  The CPUs in use are recorded in
+``.jlm/cpus.json`` (guarded by a lock file) together with the PID and
+the start time of the process holding them; leases of processes that
+have exited are discarded on the next allocation.  Since ``jlm run``
+replaces itself with Julia, the PID is the one of the Julia process.
+"""
+
+import fcntl
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from shutil import which
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .utils import ApplicationError, Cmd, _Pathish, atomicopen, pathstr
+from .workers import NODE_DIR, available_cores, numa_nodes
+
+LEASES_NAME = "cpus.json"
+
+
+def parse_cpulist(spec: str) -> List[int]:
+    """
+    Parse a CPU list such as ``0-3,8,10-11``.
+
+    >>> parse_cpulist("0-3,8,10-11")
+    [0, 1, 2, 3, 8, 10, 11]
+    >>> parse_cpulist("x")
+    Traceback (most recent call last):
+      ...
+    jlm.utils.ApplicationError: Invalid CPU list: x
+    """
+    cpus = set()  # type: Set[int]
+    try:
+        for part in spec.strip().split(","):
+            first, _, last = part.partition("-")
+            cpus.update(range(int(first), int(last or first) + 1))
+    except ValueError:
+        raise ApplicationError("Invalid CPU list: {}".format(spec))
+    return sorted(cpus)
+
+
+def format_cpulist(cpus: List[int]) -> str:
+    """
+    >>> format_cpulist([0, 1, 2, 3, 8, 10, 11])
+    '0-3,8,10-11'
+    """
+    ranges = []  # type: List[List[int]]
+    for cpu in sorted(cpus):
+        if ranges and ranges[-1][1] + 1 == cpu:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(str(a) if a == b else "{}-{}".format(a, b) for (a, b) in ranges)
+
+
+def node_cpus(node: int) -> List[int]:
+    try:
+        with open(pathstr(NODE_DIR / "node{}".format(node) / "cpulist")) as file:
+            return parse_cpulist(file.read())
+    except OSError:
+        if node == 0:  # no NUMA information; assume a single node
+            return available_cores()
+        raise ApplicationError("NUMA node {} does not exist.".format(node))
+
+
+def allowed_cpus(cpus: List[int]) -> List[int]:
+    """
+    Subset of `cpus` this process can run on (e.g., allowed by the
+    cpuset of the cgroup of a batch job).
+    """
+    allowed = set(available_cores())
+    return [c for c in cpus if c in allowed]
+
+
+def cpu_nodes() -> Dict[int, List[int]]:
+    """
+    Map from NUMA node to the CPUs in it this process can run on.
+    """
+    nodes = {}
+    for node in numa_nodes():
+        cpus = allowed_cpus(node_cpus(node))
+        if cpus:
+            nodes[node] = cpus
+    return nodes
+
+
+def start_time(pid: int) -> Optional[str]:
+    """
+    Start time of process `pid` (to detect reused PIDs) or `None` if it
+    does not exist.
+    """
+    try:
+        with open("/proc/{}/stat".format(pid)) as file:
+            stat = file.read()
+    except OSError:
+        return None
+    # The command name (2nd field) may contain spaces; skip it:
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+def choose_cpus(
+    nodes: Dict[int, List[int]], busy: List[int], count: int, cursor: int
+) -> Tuple[List[int], int]:
+    """
+    Choose `count` CPUs not in `busy`, within a single NUMA node if
+    possible.  Nodes are tried in a round-robin fashion starting from
+    the `cursor`-th one.  Return the CPUs and the next cursor.
+
+    >>> nodes = {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}
+    >>> choose_cpus(nodes, [], 2, 0)
+    ([0, 1], 1)
+    >>> choose_cpus(nodes, [0, 1], 2, 1)
+    ([4, 5], 0)
+    >>> choose_cpus(nodes, [0, 1, 4, 5, 6], 3, 1)
+    ([2, 3, 7], 1)
+    """
+    order = sorted(nodes)
+    for i in range(len(order)):
+        k = (cursor + i) % len(order)
+        free = [c for c in nodes[order[k]] if c not in busy]
+        if len(free) >= count:
+            return free[:count], (k + 1) % len(order)
+    free = [c for n in order for c in nodes[n] if c not in busy]
+    if len(free) < count:
+        raise ApplicationError(
+            "Cannot allocate {} CPUs; only {} CPUs are free.".format(count, len(free))
+        )
+    return free[:count], cursor
+
+
+class CPUAllocator:
+    # path: Path
+
+    def __init__(self, jlm_dir: _Pathish):
+        self.path = Path(jlm_dir) / LEASES_NAME
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with open(pathstr(self.path) + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def load(self) -> Dict[str, Any]:
+        try:
+            with open(pathstr(self.path)) as file:
+                return json.load(file)  # type: ignore
+        except (FileNotFoundError, ValueError):
+            return {"cursor": 0, "leases": []}
+
+    def allocate(
+        self,
+        count: int,
+        pid: int,
+        dry_run: bool = False,
+        nodes: Optional[Dict[int, List[int]]] = None,
+    ) -> List[int]:
+        """
+        Allocate `count` CPUs (of `nodes`; default: `cpu_nodes()`) for
+        process `pid`.  CPUs previously allocated for `pid` are released.
+        """
+        with self.locked():
+            data = self.load()
+            leases = [
+                lease
+                for lease in data["leases"]
+                if lease["pid"] != pid and start_time(lease["pid"]) == lease["started"]
+            ]
+            busy = [c for lease in leases for c in lease["cpus"]]
+            cpus, cursor = choose_cpus(
+                cpu_nodes() if nodes is None else nodes,
+                busy,
+                count,
+                data["cursor"],
+            )
+            if not dry_run:
+                leases.append({"pid": pid, "started": start_time(pid), "cpus": cpus})
+                with atomicopen(self.path, "w") as file:
+                    json.dump({"cursor": cursor, "leases": leases}, file)
+            return cpus
+
+
+def nodes_of(cpus: List[int]) -> List[int]:
+    return sorted(n for (n, cs) in cpu_nodes().items() if set(cs) & set(cpus))
+
+
+def numactl_prefix(option: str, nodes: List[int]) -> Optional[Cmd]:
+    if not which("numactl"):
+        return None
+    return ["numactl", "{}={}".format(option, ",".join(map(str, nodes))), "--"]
@@ -0,0 +1,146 @@
+"""
+Python API for resolving how `jlm` launches Julia.
+
+This module provides the same resolution as the `jlm` CLI (``jlm
+locate ...``, ``jlm run --dry-run``, etc.) without going through the
+argument parser and without printing anything.  It is meant to be used
+from editor plugins, job schedulers and other tools.
+
+>>> from jlm import api
+>>> resolution = api.resolve(cwd="PATH/TO/PROJECT")  # doctest: +SKIP
+>>> resolution.sysimage  # doctest: +SKIP
+'/home/user/.julia/jlm/exec/.../sys.so'
+>>> argv, env = api.launch_command(["-e", "1 + 1"])  # doctest: +SKIP
+
+All functions accept the following keyword arguments:
+
+jlm_dir
+    The `.jlm` directory to be used.  Equivalent to ``jlm --jlm-dir``.
+julia
+    Julia executable to be used.  Equivalent to ``jlm run JULIA``.
+cwd
+    The directory from which the `.jlm` directory is searched if
+    `jlm_dir` is not given.  Default to the current directory.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .application import Application
+from .datastore import locate_localstore
+from .utils import ApplicationError, Cmd, _Pathish, pathstr
+
+__all__ = [
+    "ApplicationError",
+    "Resolution",
+    "application",
+    "describe",
+    "info",
+    "launch_command",
+    "locate_dir",
+    "resolve",
+]
+
+
+def find_jlm_dir(jlm_dir: Optional[_Pathish], cwd: Optional[_Pathish]) -> Path:
+    if jlm_dir is not None:
+        return Path(jlm_dir)
+    start = Path.cwd() if cwd is None else Path(cwd)
+    found = locate_localstore(start.absolute())
+    if found is None:
+        raise ApplicationError(
+            "Cannot locate `.jlm` local directory from {}".format(start)
+        )
+    return found
+
+
+def application(
+    jlm_dir: Optional[_Pathish] = None,
+    julia: Optional[str] = None,
+    cwd: Optional[_Pathish] = None,
+) -> Application:
+    """
+    Create an `Application` which does not print anything.
+    """
+    return Application(
+        dry_run=False,
+        verbose=False,
+        julia=julia,
+        jlm_dir=find_jlm_dir(jlm_dir, cwd),
+    )
+
+
+class Resolution:
+    """
+    Julia runtime, system image and precompilation key to be used.
+    """
+
+    # jlm_dir: str
+    # julia: str
+    # sysimage: str
+    # precompile_key: str
+
+    def __init__(self, app: Application):
+        self.jlm_dir = pathstr(app.localstore.path)
+        self.julia = app.effective_julia
+        self.sysimage = pathstr(app.sysimage_for(self.julia))
+        self.precompile_key = app.precompile_key
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(vars(self))
+
+
+def resolve(**kwargs) -> Resolution:
+    """
+    Resolve Julia runtime, system image and precompilation key.
+    """
+    return Resolution(application(**kwargs))
+
+
+def locate_dir(**kwargs) -> str:
+    """
+    Return the `.jlm` directory; i.e., the output of ``jlm locate dir``.
+    """
+    return pathstr(find_jlm_dir(kwargs.get("jlm_dir"), kwargs.get("cwd")))
+
+
+def launch_command(
+    arguments: Sequence[str] = (), on_mismatch: str = "error", **kwargs
+) -> Tuple[Cmd, Dict[str, str]]:
+    """
+    Return ``(argv, env)`` to launch Julia like ``jlm run``.
+
+    `env` only contains the environment variables to be added to the
+    current environment.
+    """
+    return application(**kwargs).launch_command(list(arguments), on_mismatch)
+
+
+def info(**kwargs) -> Dict[str, Any]:
+    """
+    Return information printed by ``jlm info`` as a dictionary.
+
+    It only uses cached information about Julia runtimes; i.e., it
+    never launches Julia.
+    """
+    return describe(application(**kwargs))
+
+
+def describe(app: Application) -> Dict[str, Any]:
+    default, others = app.available_runtimes()
+    runtimes = []  # type: List[Dict[str, Any]]
+    for runtime in [default] + others:
+        runtimes.append(
+            {
+                "executable": runtime.executable,
+                "sysimage": (
+                    None if runtime.sysimage is None else pathstr(runtime.sysimage)
+                ),
+                "metadata": app.metadata.load(runtime.executable),
+            }
+        )
+    return {
+        "jlm_dir": pathstr(app.localstore.path),
+        "default": runtimes[0],
+        "others": runtimes[1:],
+    }
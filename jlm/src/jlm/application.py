@@ -1,16 +1,126 @@
 import json
 import os
 import shlex
+import shutil
 import subprocess
 import sys
 import textwrap
+import time
 from pathlib import Path
 from shutil import which
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import IO, Any, Dict, List, Mapping, Optional, Tuple, Union
 
+from . import __version__
+from . import archive
+from .affinity import (
+    CPUAllocator,
+    allowed_cpus,
+    format_cpulist,
+    node_cpus,
+    nodes_of,
+    numactl_prefix,
+    parse_cpulist,
+)
+from .artifacts import ArtifactStore, julia_key
+from .buildinfo import (
+    buildinfo_path,
+    built_cpu_target,
+    executable_identity,
+    identity_mismatch,
+    load_buildinfo,
+    store_buildinfo,
+)
+from .builds import (
+    HEADER,
+    HISTORY_NAME,
+    BuildHistory,
+    compare_records,
+    filter_records,
+    format_record,
+    format_size,
+    input_digests,
+    measured_call,
+)
+from .bundle import BundleReader, BundleWriter, relocated_name, rewrite_paths
+from .caches import package_slug, project_cache_files, read_packages
+from .completion import completion_script
 from .datastore import HomeStore, LocalStore
+from .depots import load_system_config, publish_file, stack_depots
+from .doctor import (
+    Finding,
+    check_datastore,
+    check_executable,
+    check_path,
+    check_slug_churn,
+    check_stale,
+    check_sysimage,
+    rank,
+)
+from .hostinfo import current_host, select_variant
+from .launchopts import OPTIONS, needs_version, resolve_options, supported
+from .lean import lean_closure, stdlib_dir
+from .manifests import manifest_digest
+from .metadata import MetadataCache
+from .procfs import mapped_paths
+from .profiles import Profile, match_profile, script_argument
+from .retention import (
+    StoreRegistry,
+    disk_usage,
+    last_used,
+    record_use,
+    remove_execdir,
+    remove_sysimage,
+    select_prunable,
+)
+from .runstats import RunStats, exit_like, format_summary, summarize, supervise
 from .runtime import JuliaRuntime
-from .utils import ApplicationError, Cmd, _Pathish, absolutepath, dlext, pathstr
+from .top import format_report, group, scan
+from .traces import (
+    PRECOMPILE_NAME,
+    Corpus,
+    lock_trace,
+    new_trace_path,
+    pending_traces,
+    read_statements,
+    trace_in_use,
+    tracedir,
+    verify_script,
+    write_statements,
+)
+from .utils import (
+    ApplicationError,
+    Cmd,
+    _Pathish,
+    absolutepath,
+    atomicopen,
+    dlext,
+    file_digest,
+    pathstr,
+)
+from .watch import (
+    SYSIMAGES_DIR,
+    input_paths,
+    input_stamps,
+    is_outdated,
+    low_priority_prefix,
+    sysimages_dir,
+    versioned_sysimage_path,
+    versioned_sysimages,
+)
+from .workers import pinning_prefixes
+
+
+def variant_criteria(
+    hostname: Optional[str], cpu: Optional[str], cpu_flags: Optional[str]
+) -> Dict[str, Any]:
+    criteria = {}  # type: Dict[str, Any]
+    if hostname:
+        criteria["hostname"] = hostname
+    if cpu:
+        criteria["cpu"] = cpu
+    if cpu_flags:
+        criteria["cpu_flags"] = sorted(set(cpu_flags.replace(",", " ").split()))
+    return criteria
 
 
 class SideEffect:
@@ -65,6 +175,7 @@ class Application:
     # eff: SideEffect
     # homestore: HomeStore
     # localstore: LocalStore
+    # metadata: MetadataCache
 
     @classmethod
     def consume(
@@ -73,9 +184,10 @@ class Application:
         verbose: bool,
         julia: Optional[str] = None,
         jlm_dir: Optional[str] = None,
+        system: bool = False,
         **kwargs
     ) -> "Tuple[Application, Dict[str, Any]]":
-        return cls(dry_run, verbose, julia, jlm_dir), kwargs
+        return cls(dry_run, verbose, julia, jlm_dir, system), kwargs
 
     def __init__(
         self,
@@ -83,6 +195,7 @@ class Application:
         verbose: bool,
         julia: Optional[str],
         jlm_dir: Optional[_Pathish] = None,
+        system: bool = False,
     ):
         # TODO: do not put `julia` in `self.juila`
         _julia = julia
@@ -111,16 +224,59 @@ class Application:
                         ).format(jlm_dir=jlm_dir, possible=possible)
                     )
 
-        self.homestore = HomeStore()
+        self.homestore = HomeStore.layered(system)
         self.localstore = LocalStore(jlm_dir)
+        self.metadata = MetadataCache(self.homestore)
 
     sysimage_name = "sys." + dlext  # type: str
 
     def default_sysimage(self, julia: str) -> Path:
+        return self.homestore.find(julia, self.sysimage_name)
+
+    def writable_default_sysimage(self, julia: str) -> Path:
         return self.homestore.execpath(julia) / self.sysimage_name
 
-    def sysimage_for(self, julia: str) -> _Pathish:
-        return self.localstore.sysimage(julia) or self.default_sysimage(julia)
+    def sysimage_for(self, julia: str, profile: Optional[Profile] = None) -> _Pathish:
+        profile = profile or {}
+        if profile.get("sysimage") and profile.get("julia", julia) == julia:
+            return profile["sysimage"]  # type: ignore
+        variants = self.localstore.sysimage_variants(julia)
+        if variants:
+            variant = select_variant(variants, current_host())
+            if variant is not None:
+                return variant["sysimage"]  # type: ignore
+        registered = self.localstore.sysimage(julia)
+        built = self.localstore.manifest_sysimages(julia)
+        if built:
+            digest = manifest_digest(self.localstore.path)
+            if digest in built and self.sysimage_exists(built[digest]):
+                return built[digest]
+            if registered in built.values():
+                # Built for another manifest (e.g., another git branch);
+                # an explicitly set image is still used as-is.
+                self.eff.info(
+                    "No system image is built for the current manifest;"
+                    " using the default system image."
+                )
+                return self.default_sysimage(julia)
+        return registered or self.default_sysimage(julia)
+
+    def sysimage_exists(self, sysimage: _Pathish) -> bool:
+        """ Check if `sysimage` exists (possibly archived by `jlm archive`). """
+        return os.path.exists(pathstr(sysimage)) or archive.is_archived(sysimage)
+
+    def restore_sysimage(self, sysimage: _Pathish, quiet: bool = False) -> None:
+        """
+        Decompress `sysimage` if it is archived by `jlm archive`.
+        Concurrent callers wait for a single decompression.  Use `quiet`
+        when stdout is used for other purposes.
+        """
+        if not archive.is_archived(sysimage):
+            return
+        if not quiet:
+            self.eff.info("Restoring archived system image {}".format(sysimage))
+        if not self.dry_run:
+            archive.restore(sysimage)
 
     @property
     def effective_sysimage(self) -> _Pathish:
@@ -139,11 +295,89 @@ class Application:
             raise ApplicationError("Julia executable `julia` is not found.")
         return julia
 
-    def julia_cmd(self) -> Cmd:
-        cmd = [pathstr(self.effective_julia)]
-        cmd.extend(["--sysimage", pathstr(self.effective_sysimage)])
+    def checked_sysimage(
+        self, julia: str, on_mismatch: str, profile: Optional[Profile] = None
+    ) -> Optional[_Pathish]:
+        """
+        Return system image for `julia` if it is built by `julia`.
+
+        If it is not, raise an error or, if ``on_mismatch="fallback"``,
+        return `None` to use the stock system image.
+        """
+        sysimage = self.sysimage_for(julia, profile)
+        self.restore_sysimage(sysimage)
+        problem = identity_mismatch(load_buildinfo(sysimage), julia)
+        if problem is None:
+            return sysimage
+        if on_mismatch == "fallback":
+            self.eff.warn(
+                "{}\nFalling back to the stock system image.".format(problem)
+            )
+            return None
+        raise ApplicationError(
+            "{}\nSystem image:\n    {}\nRe-compile it (e.g., `jlm"
+            " create-default-sysimage --force`) or use `jlm run"
+            " --on-mismatch=fallback`.".format(problem, sysimage)
+        )
+
+    def julia_cmd(
+        self, on_mismatch: str = "error", profile: Optional[Profile] = None
+    ) -> Cmd:
+        julia = self.effective_julia
+        cmd = [pathstr(julia)]
+        sysimage = self.checked_sysimage(julia, on_mismatch, profile)
+        if sysimage is not None:
+            cmd.extend(["--sysimage", pathstr(sysimage)])
+        cmd.extend(self.launch_options(julia))
+        if profile:
+            cmd.extend(profile.get("options", []))
         return cmd
 
+    def launch_options(self, julia: str) -> Cmd:
+        """
+        Julia options configured by `jlm set-options` for `julia`.
+        """
+        options = self.localstore.launch_options(julia)
+        if not options:
+            return []
+        version = self.julia_version(julia) if needs_version(options) else None
+        return resolve_options(options, version)
+
+    def julia_version(self, julia: str) -> Optional[str]:
+        """
+        Version of `julia` or `None` if it cannot be queried.  Use the
+        cached metadata if possible; `julia` is launched only on a cold
+        cache.
+        """
+        metadata = self.metadata.load(julia)
+        if metadata is None:
+            try:
+                metadata = self.metadata.get(julia)
+            except ApplicationError as err:
+                self.eff.warn(str(err))
+                return None
+        return metadata["version"]  # type: ignore
+
+    def select_profile(
+        self, name: Optional[str], arguments: List[str]
+    ) -> Optional[Profile]:
+        """
+        Return profile `name` or the one matching the script in `arguments`.
+
+        The profile is not stored in `self` since an `Application` may be
+        shared by concurrent requests (see `jlm.server`).
+        """
+        if name is not None:
+            return self.localstore.profile(name)
+        profiles = self.localstore.profiles()
+        script = script_argument(arguments)
+        if profiles and script is not None:
+            matched = match_profile(profiles, script, self.localstore.path.parent)
+            if matched is not None:
+                self.eff.info("Using profile {}".format(matched))
+                return profiles[matched]
+        return None
+
     @property
     def precompile_key(self) -> str:
         """
@@ -183,25 +417,159 @@ class Application:
         except subprocess.CalledProcessError:
             raise ApplicationError("Failed to install JuliaManager.jl")
 
-    def compile_patched_sysimage(self, julia: str, sysimage: _Pathish):
+    def compile_patched_sysimage(
+        self,
+        julia: str,
+        sysimage: _Pathish,
+        options: Optional[Mapping[str, Optional[str]]] = None,
+        low_priority: bool = False,
+        extra_info: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Compile patched system image using `julia`.
+
+        `options` are passed to ``JuliaManager.compile_patched_sysimage``
+        (and then to PackageCompiler.jl) as keyword arguments.  Their
+        values must be strings.  `extra_info` is recorded in the build
+        information.  Options set to `None` are not passed.
+        """
         code = """
         using JuliaManager: compile_patched_sysimage
-        compile_patched_sysimage(ARGS[1])
+        kwargs = [Symbol(ARGS[i]) => ARGS[i + 1] for i in 2:2:length(ARGS)]
+        compile_patched_sysimage(ARGS[1]; kwargs...)
+        """
+        kwargs = {k: v for (k, v) in (options or {}).items() if v is not None}
+        cmd = low_priority_prefix() if low_priority else []
+        cmd.extend([julia, "--startup-file=no", "-e", code, pathstr(sysimage)])
+        for (key, value) in sorted(kwargs.items()):
+            cmd.extend([key, value])
+        self.eff.info_run(cmd)
+        if self.dry_run:
+            return
+        info = self.buildinfo(julia)
+        info["options"] = kwargs
+        info.update(extra_info or {})
+        record = {
+            "started": time.time(),
+            "julia": julia,
+            "julia_version": info["julia"]["version"],
+            "sysimage": pathstr(sysimage),
+            "options": kwargs,
+            "inputs": input_digests(info.get("inputs", {})),
+        }
+        try:
+            record.update(measured_call(cmd))
+        except subprocess.CalledProcessError as err:
+            record.update(err.usage)  # type: ignore
+            self.build_history.append(record)
+            raise
+        record["size"] = os.path.getsize(pathstr(sysimage))
+        self.build_history.append(record)
+        store_buildinfo(sysimage, info)
+
+    @property
+    def build_history(self) -> BuildHistory:
+        return BuildHistory(self.homestore.path / HISTORY_NAME)
+
+    def buildinfo(self, julia: str) -> Dict[str, Any]:
         """
-        self.eff.check_call([julia, "--startup-file=no", "-e", code, pathstr(sysimage)])
+        Metadata to be recorded for a system image built by `julia`.
+        """
+        metadata = self.metadata.get(julia)
+        identity = {
+            "executable": julia,
+            "sha256": file_digest(julia),
+            "version": metadata["version"],
+            "commit": metadata["commit"],
+        }
+        identity.update(executable_identity(julia))
+        return {"jlm_version": __version__, "created": time.time(), "julia": identity}
 
-    def create_default_sysimage(self, julia: str):
-        sysimage = self.default_sysimage(julia)
+    def artifact_store(self, store: Optional[str] = None) -> Optional[ArtifactStore]:
+        url = store or os.environ.get("JLM_ARTIFACT_STORE")
+        if not url:
+            return None
+        return ArtifactStore.from_url(url)
+
+    def pull_default_sysimage(
+        self, julia: str, store: ArtifactStore, cpu_target: Optional[str] = None
+    ) -> bool:
+        """
+        Fetch the default system image for `julia` from `store`.  If
+        `cpu_target` is given, only the image built for it is used.
+        """
+        sysimage = self.writable_default_sysimage(julia)
+        key = julia_key(self.metadata.get(julia))
+        self.eff.info(
+            "Looking up system image in {}".format(store.entrypath(key, __version__))
+        )
+        if self.dry_run:
+            return False
+        published = store.lookup(key, __version__)
+        if published is None:
+            self.eff.info("System image is not found in the artifact store.")
+            return False
+        if cpu_target and built_cpu_target(published) != cpu_target:
+            self.eff.info(
+                "Published system image is not built for CPU target {}.".format(
+                    cpu_target
+                )
+            )
+            return False
         self.eff.ensuredir(sysimage.parent)
-        self.compile_patched_sysimage(julia, sysimage)
+        info = store.pull(key, __version__, sysimage)
+        assert info is not None
+        # The image is keyed by the version of `julia`.  Record the
+        # identity of the local executable so that it passes the
+        # pre-launch check:
+        info.setdefault("julia", {}).update(executable_identity(julia))
+        info["julia"]["executable"] = julia
+        store_buildinfo(sysimage, info)
+        self.eff.print("Pulled system image {} from {}".format(sysimage, store.root))
+        return True
 
-    def ensure_default_sysimage(self, julia: str):
-        self.install_backend(julia)
+    def create_default_sysimage(
+        self, julia: str, options: Optional[Mapping[str, Optional[str]]] = None
+    ):
+        sysimage = self.writable_default_sysimage(julia)
+        self.eff.ensuredir(sysimage.parent)
+        self.compile_patched_sysimage(julia, sysimage, options)
+        if self.default_sysimage(julia) != sysimage:
+            self.eff.warn(
+                "System image {} is shadowed by {}".format(
+                    sysimage, self.default_sysimage(julia)
+                )
+            )
+
+    def ensure_default_sysimage(
+        self, julia: str, options: Optional[Mapping[str, Optional[str]]] = None
+    ):
+        """
+        Create the default system image for `julia` unless an image built
+        with the requested `options["cpu_target"]` (if any) exists.
+        """
+        cpu_target = (options or {}).get("cpu_target")
         sysimage = self.default_sysimage(julia)
-        if sysimage.exists():
-            self.eff.print("Default system image {} already exists.".format(sysimage))
-            return
-        self.create_default_sysimage(julia)
+        if self.sysimage_exists(sysimage):
+            built = built_cpu_target(load_buildinfo(sysimage))
+            if not cpu_target or built == cpu_target:
+                self.eff.print(
+                    "Default system image {} already exists.".format(sysimage)
+                )
+                return
+            self.eff.print(
+                "Default system image {} is built for CPU target {}."
+                "  Re-compiling it for {}.".format(sysimage, built, cpu_target)
+            )
+        store = self.artifact_store()
+        if store is not None:
+            try:
+                if self.pull_default_sysimage(julia, store, cpu_target):
+                    return
+            except ApplicationError as err:
+                self.eff.warn("{}\nBuilding the system image locally.".format(err))
+        self.install_backend(julia)
+        self.create_default_sysimage(julia, options)
 
     def normalize_sysimage(self, sysimage: _Pathish) -> str:
         sysimage = Path(sysimage)
@@ -221,16 +589,208 @@ class Application:
         default, others = self.localstore.available_runtimes()
         return default.resolve(self), [runtime.resolve(self) for runtime in others]
 
-    def cli_run(self, arguments: List[str]) -> None:
+    def launch_env(self, profile: Optional[Profile] = None) -> Dict[str, str]:
+        """
+        Environment variables to be set (in addition to the current
+        ones) when launching Julia.
+        """
+        env = {"JLM_PRECOMPILE_KEY": self.precompile_key}
+        depots = self.depot_path()
+        if depots:
+            env["JULIA_DEPOT_PATH"] = os.pathsep.join(depots)
+        if profile:
+            env.update(profile.get("env", {}))
+        return env
+
+    def shared_depots(self) -> List[str]:
+        config = self.localstore.get("depots") or {}
+        return stack_depots(
+            config.get("shared", []), load_system_config().get("shared_depots", [])
+        )
+
+    def depot_path(self) -> Optional[List[str]]:
+        """
+        Layered depots (writable, shared, default) if enabled.
+        """
+        config = self.localstore.get("depots")
+        if not config:
+            return None
+        if "JULIA_DEPOT_PATH" in os.environ:
+            default = os.environ["JULIA_DEPOT_PATH"].split(os.pathsep)
+        else:
+            default = self.metadata.get(self.effective_julia)["depot_path"]
+        return stack_depots([config["writable"]], self.shared_depots(), default)
+
+    def launch_command(
+        self,
+        arguments: List[str],
+        on_mismatch: str = "error",
+        profile: Optional[str] = None,
+    ) -> Tuple[Cmd, Dict[str, str]]:
+        """
+        Command and additional environment variables for launching Julia
+        with `arguments`.
+
+        Precompile statements are not recorded here (see `cli_run`)
+        since the command may be used for many processes (e.g., workers).
+        """
         assert all(isinstance(a, str) for a in arguments)
-        env = os.environ.copy()
-        env["JLM_PRECOMPILE_KEY"] = self.precompile_key
-        cmd = self.julia_cmd()
+        selected = self.select_profile(profile, arguments)
+        cmd = self.julia_cmd(on_mismatch, selected)
         cmd.extend(arguments)
-        self.eff.info_run(cmd)
+        return cmd, self.launch_env(selected)
+
+    def cli_run(
+        self,
+        arguments: List[str],
+        on_mismatch: str = "error",
+        record_precompile: bool = False,
+        supervise: bool = False,
+        profile: Optional[str] = None,
+        cpus: Optional[str] = None,
+        numa_node: Optional[int] = None,
+        spread: Optional[int] = None,
+    ) -> None:
+        cmd, launchenv = self.launch_command(arguments, on_mismatch, profile)
+        if (
+            record_precompile or self.localstore.get("record_precompile", False)
+        ) and not any(a.startswith("--trace-compile") for a in arguments):
+            trace = new_trace_path(self.localstore.path)
+            self.eff.ensuredir(trace.parent)
+            cmd.insert(len(cmd) - len(arguments), "--trace-compile=" + pathstr(trace))
+            if not self.dry_run:
+                # Kept open (and locked) until Julia exits:
+                lock_trace(trace)
+        env = os.environ.copy()
+        env.update(launchenv)
+        prefix = []  # type: Cmd
+        if cpus is not None or numa_node is not None or spread is not None:
+            pinned, prefix = self.pinning(cpus, numa_node, spread)
+            if supported("threads", self.julia_version(cmd[0])):
+                # Options given by the user (`arguments`) take precedence:
+                cmd.insert(
+                    len(cmd) - len(arguments), "--threads={}".format(len(pinned))
+                )
+            if not self.dry_run:
+                try:
+                    os.sched_setaffinity(0, pinned)
+                except OSError as err:
+                    raise ApplicationError(
+                        "Cannot pin to CPUs {}: {}".format(format_cpulist(pinned), err)
+                    )
+        self.eff.info_run(prefix + cmd)
         if self.dry_run:
             return
-        os.execvpe(cmd[0], cmd, env)
+        self.record_sysimage_use(cmd)
+        if supervise or self.localstore.get("supervise", False):
+            self.supervised_run(cmd, env, prefix)
+        os.execvpe((prefix + cmd)[0], prefix + cmd, env)
+
+    def record_sysimage_use(self, cmd: Cmd) -> None:
+        """
+        Record the use of the system image in `cmd` and the project for
+        `jlm prune`.
+        """
+        if "--sysimage" in cmd:
+            record_use(cmd[cmd.index("--sysimage") + 1])
+        self.register_localstore()
+
+    def register_localstore(self) -> None:
+        try:
+            StoreRegistry(self.homestore.path).register(self.localstore.path)
+        except OSError as err:
+            self.eff.warn("Failed to register {}: {}".format(self.localstore.path, err))
+
+    def pinning(
+        self, cpus: Optional[str], numa_node: Optional[int], spread: Optional[int]
+    ) -> Tuple[List[int], Cmd]:
+        """
+        CPUs to run Julia on and the command prefix setting its memory
+        policy (empty if `numactl` is not available).
+        """
+        if cpus is not None:
+            requested = parse_cpulist(cpus)
+            pinned = allowed_cpus(requested)
+            if pinned and pinned != requested:
+                self.eff.warn(
+                    "CPUs {} are not available to this process; using {}.".format(
+                        format_cpulist(sorted(set(requested) - set(pinned))),
+                        format_cpulist(pinned),
+                    )
+                )
+            option, nodes = "--preferred", nodes_of(pinned)
+        elif numa_node is not None:
+            pinned = allowed_cpus(node_cpus(numa_node))
+            option, nodes = "--membind", [numa_node]
+        else:
+            assert spread is not None
+            allocator = CPUAllocator(self.localstore.path)
+            pinned = allocator.allocate(spread, os.getpid(), self.dry_run)
+            self.eff.info("Allocated CPUs: {}".format(format_cpulist(pinned)))
+            option, nodes = "--preferred", nodes_of(pinned)
+        if not pinned:
+            raise ApplicationError("None of the CPUs is available to this process.")
+        prefix = []  # type: Cmd
+        # `--preferred` takes only one node:
+        if option == "--membind" or len(nodes) == 1:
+            prefix = numactl_prefix(option, nodes) or []
+            if not prefix:
+                self.eff.info("numactl is not found; memory policy is not set.")
+        return pinned, prefix
+
+    def supervised_run(self, cmd: Cmd, env: Dict[str, str], prefix: Cmd) -> None:
+        """
+        Run `cmd` (after `prefix`), record its statistics and exit with
+        its status.
+        """
+        # `cmd` may use the stock system image (`--on-mismatch=fallback`):
+        sysimage = cmd[cmd.index("--sysimage") + 1] if "--sysimage" in cmd else None
+        record = {"julia": cmd[0], "sysimage": sysimage}  # type: Dict[str, Any]
+        if sysimage:
+            try:
+                record["sysimage_mtime"] = os.stat(sysimage).st_mtime
+            except OSError:
+                pass
+        status, usage = supervise(prefix + cmd, env)
+        record.update(usage)
+        try:
+            RunStats(self.localstore.path).append(record)
+        except OSError as err:
+            self.eff.warn("Failed to record run statistics: {}".format(err))
+        exit_like(status)
+
+    def cli_workers_cmd(
+        self, count: int, pin: Optional[str], on_mismatch: str, as_json: bool
+    ) -> None:
+        """
+        Print command lines for starting Distributed.jl workers.
+
+        Workers are launched with the same system image and environment
+        variables as `jlm run` so that they can reuse the precompilation
+        caches of the master process.  With `--json`, print `exename`,
+        `exeflags` and `env` which can be passed to `addprocs` as well
+        as the command line of each worker.  Inside Julia,
+        `JuliaManager.addprocs` can be used instead.
+        """
+        cmd, env = self.launch_command([], on_mismatch)
+        if pin:
+            prefixes = pinning_prefixes(count, pin)
+        else:
+            prefixes = [[] for _ in range(count)]
+        envcmd = ["env"] + ["{}={}".format(k, v) for (k, v) in sorted(env.items())]
+        commands = [envcmd + prefix + cmd + ["--worker"] for prefix in prefixes]
+        if as_json:
+            spec = {
+                "exename": cmd[0],
+                "exeflags": cmd[1:],
+                "env": env,
+                "commands": commands,
+            }
+            json.dump(spec, sys.stdout, indent=1)
+            print()
+            return
+        for command in commands:
+            print(" ".join(map(shlex.quote, command)))
 
     def cli_init(self, sysimage: Optional[str]) -> None:
         self.initialize_localstore()
@@ -246,13 +806,32 @@ class Application:
             self.ensure_default_sysimage(effective_julia)
         if not self.dry_run:
             self.localstore.set(config)
+            self.register_localstore()
+            self.metadata.get_many([effective_julia])
 
     def cli_set_default(self) -> None:
         """ Set default Julia executable to be used. """
         self.localstore.set({"default": self.julia})
 
-    def cli_set_sysimage(self, sysimage: str) -> None:
-        """ Set system image for `juila`. """
+    def cli_set_sysimage(
+        self,
+        sysimage: str,
+        hostname: Optional[str] = None,
+        cpu: Optional[str] = None,
+        cpu_flags: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> None:
+        """
+        Set system image for `juila`.
+
+        If any of `--hostname`, `--cpu` and `--cpu-flags` is given, the
+        system image is registered as a variant that is used only on
+        the matching hosts.  The variant that matches most specifically
+        is chosen at run-time.  The system image set without these
+        options is used when no variant matches.
+
+        With `--profile`, the system image is set for the profile.
+        """
 
         sysimage = self.normalize_sysimage(sysimage)
 
@@ -261,7 +840,19 @@ class Application:
         # whatever `julia` on the `$PATH` sometime later at run-time.
         julia = self.effective_julia
 
-        self.localstore.set_sysimage(julia, sysimage)
+        criteria = variant_criteria(hostname, cpu, cpu_flags)
+        if profile and criteria:
+            raise ApplicationError("--profile cannot be used with host variants.")
+        if profile:
+            self.localstore.update_profile(
+                profile, {"julia": julia, "sysimage": sysimage}
+            )
+        elif criteria:
+            self.localstore.set_sysimage_variant(
+                julia, dict(criteria, sysimage=sysimage)
+            )
+        else:
+            self.localstore.set_sysimage(julia, sysimage)
 
         self.eff.print(
             textwrap.dedent(
@@ -276,18 +867,753 @@ class Application:
             )
         )
 
-    def cli_unset_sysimage(self) -> None:
+    def cli_unset_sysimage(
+        self,
+        hostname: Optional[str] = None,
+        cpu: Optional[str] = None,
+        cpu_flags: Optional[str] = None,
+        profile: Optional[str] = None,
+    ) -> None:
         """ Unset system image for `juila`. """
         julia = self.effective_julia
-        self.localstore.unset_sysimage(julia)
+        criteria = variant_criteria(hostname, cpu, cpu_flags)
+        if profile:
+            self.localstore.remove_profile(profile, ["julia", "sysimage"])
+        elif criteria:
+            self.localstore.unset_sysimage_variant(julia, criteria)
+        else:
+            self.localstore.unset_sysimage(julia)
+
+    def cli_set_options(
+        self,
+        threads: Optional[str] = None,
+        heap_size_hint: Optional[str] = None,
+        optimize: Optional[str] = None,
+        compiled_modules: Optional[str] = None,
+        unset: bool = False,
+    ) -> None:
+        """
+        Set default Julia launch options for `julia`.
+
+        Each option can be set to `auto`.  For `--threads` and
+        `--heap-size-hint`, `auto` is computed at each launch from the
+        cgroup (v1 or v2) CPU quota and memory limit and the CPU
+        affinity of the process; i.e., from the resources actually
+        available in the container or batch job.  For the other
+        options, `auto` means Julia's default.  `--threads` is ignored
+        for Julia < 1.5 and `--heap-size-hint` for Julia < 1.9.  With
+        `--unset`, the given options (or all options if none is given)
+        are removed.
+        """
+        julia = self.effective_julia
+        options = {
+            "threads": threads,
+            "heap_size_hint": heap_size_hint,
+            "optimize": optimize,
+            "compiled_modules": compiled_modules,
+        }
+        given = {
+            k: v for (k, v) in options.items() if v is not None
+        }  # type: Dict[str, Optional[str]]
+        if unset:
+            names = list(given) or list(OPTIONS)
+            self.localstore.set_launch_options(julia, {k: None for k in names})
+        elif given:
+            self.localstore.set_launch_options(julia, given)
+        current = self.localstore.launch_options(julia)
+        for name in OPTIONS:
+            if name in current:
+                self.eff.print("{} = {}".format(name, current[name]))
+
+    def cli_completion(self, shell: str) -> None:
+        """
+        Print shell completion script.
+
+        The script completes subcommands and options without running
+        `jlm`.  Julia executables and profiles are completed from
+        `.jlm/completion.txt` which is updated whenever the
+        configuration changes.  To enable it, add the following to the
+        shell configuration file (e.g., `~/.bashrc`)::
 
-    def cli_create_default_sysimage(self, force: bool) -> None:
+            eval "$(jlm completion bash)"
+
+        or, for fish, save the output to
+        `~/.config/fish/completions/jlm.fish`.
+        """
+        from .cli import make_parser
+
+        sys.stdout.write(completion_script(make_parser(), shell))
+
+    def cli_profile_set(
+        self,
+        name: str,
+        options: Optional[List[str]],
+        env: Optional[List[str]],
+        scripts: Optional[List[str]],
+        project: Optional[str],
+    ) -> None:
+        """
+        Define or update a launch profile.
+
+        A profile can have its own system image (see `set-sysimage
+        --profile` and `compile-sysimage --profile`), Julia options and
+        environment variables.  It is used by `jlm run --profile NAME`
+        or when the script passed to `jlm run` matches `--script`.
+        Only the given fields are updated.
+        """
+        values = {}  # type: Dict[str, Any]
+        if options is not None:
+            values["options"] = options
+        if env is not None:
+            values["env"] = {}
+            for spec in env:
+                key, sep, value = spec.partition("=")
+                if not sep:
+                    raise ApplicationError("Invalid --env: {}".format(spec))
+                values["env"][key] = value
+        if scripts is not None:
+            values["scripts"] = scripts
+        if project is not None:
+            values["project"] = project
+        self.localstore.update_profile(name, values)
+
+    def cli_profile_remove(self, name: str) -> None:
+        """ Remove a launch profile. """
+        self.localstore.remove_profile(name)
+
+    def cli_profile_list(self, as_json: bool) -> None:
+        """ List launch profiles. """
+        profiles = self.localstore.profiles()
+        if as_json:
+            json.dump(profiles, sys.stdout, indent=1, sort_keys=True)
+            print()
+            return
+        for (name, profile) in sorted(profiles.items()):
+            self.eff.print(name)
+            for (key, value) in sorted(profile.items()):
+                self.eff.print("  {:<8}: {}".format(key, json.dumps(value)))
+
+    def cli_create_default_sysimage(
+        self, force: bool, cpu_target: Optional[str]
+    ) -> None:
         """ Compile default system image for `julia`. """
         julia = self.effective_julia
+        options = {"cpu_target": cpu_target}
         if force:
-            self.create_default_sysimage(julia)
+            self.create_default_sysimage(julia, options)
         else:
-            self.ensure_default_sysimage(julia)
+            self.ensure_default_sysimage(julia, options)
+
+    def cli_compile_sysimage(
+        self,
+        output: Optional[str],
+        cpu_target: Optional[str],
+        precompile_traces: bool = False,
+        profile: Optional[str] = None,
+        lean: bool = False,
+    ) -> None:
+        """
+        Compile patched system image for this project and use it.
+
+        Unlike `create-default-sysimage`, the system image is stored in
+        the `.jlm` directory (or at `--output`) and then set for
+        `julia` as done by `set-sysimage`.  Unless `--output` is given,
+        each build is stored in a new file so that running processes
+        are not affected.
+
+        With `--profile`, the system image is set for the profile and
+        built from the `project` of the profile if specified.
+
+        With `--lean`, only the packages reachable from the project's
+        dependencies (and the standard libraries among them) are
+        included.  It requires PackageCompiler.jl with `create_sysimage`
+        supporting `filter_stdlibs` and `script`.  The included packages
+        are recorded in the build information.
+        """
+        julia = self.effective_julia
+        options = {"cpu_target": cpu_target}
+        if precompile_traces:
+            options.update(self.traces_options())
+        if profile:
+            project = self.localstore.profile(profile).get("project")
+            if project:
+                options["project"] = pathstr(self.localstore.path.parent / project)
+        extra_info = {}  # type: Dict[str, Any]
+        if lean:
+            extra_info["lean"] = self.lean_options(julia, options, precompile_traces)
+        self.install_backend(julia)
+        self.build_project_sysimage(
+            julia,
+            options,
+            output=output,
+            precompile_traces=precompile_traces,
+            profile=profile,
+            extra_info=extra_info,
+        )
+        self.remove_unused_sysimages()
+
+    def lean_options(
+        self, julia: str, options: Dict[str, Optional[str]], precompile_traces: bool
+    ) -> Dict[str, List[str]]:
+        """
+        Add build options for a lean system image to `options` and
+        return the package closure.
+        """
+        project = options.get("project") or pathstr(
+            self.localstore.path.parent / "Project.toml"
+        )
+        if not Path(project).exists():
+            raise ApplicationError(
+                "{} does not exist.  Lean system image can only be built"
+                " for a Julia project.".format(project)
+            )
+        try:
+            stdlibs = os.listdir(
+                pathstr(stdlib_dir(julia, self.metadata.get(julia)["version"]))
+            )
+        except OSError:
+            stdlibs = []
+        statements = []  # type: List[str]
+        if precompile_traces:
+            path = tracedir(self.localstore.path) / PRECOMPILE_NAME
+            statements = list(read_statements(path))
+        closure = lean_closure(project, stdlibs, statements)
+        if closure["missing_stdlibs"]:
+            self.eff.warn(
+                "Standard libraries used in precompile statements are not in"
+                " the project and hence excluded: {}".format(
+                    ", ".join(closure["missing_stdlibs"])
+                )
+            )
+        self.eff.info(
+            "Lean system image includes {} packages and {} standard libraries.".format(
+                len(closure["packages"]), len(closure["stdlibs"])
+            )
+        )
+        options.update(
+            lean="yes", packages=",".join(closure["roots"]), project=project
+        )
+        return closure
+
+    def build_project_sysimage(
+        self,
+        julia: str,
+        options: Dict[str, Optional[str]],
+        output: Optional[str] = None,
+        precompile_traces: bool = False,
+        low_priority: bool = False,
+        profile: Optional[str] = None,
+        extra_info: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        jlm_dir = self.localstore.path
+        if output:
+            sysimage = self.normalize_sysimage(output)
+        else:
+            sysimage = pathstr(versioned_sysimage_path(jlm_dir))
+        inputs = input_stamps(input_paths(jlm_dir, precompile_traces))
+        digest = manifest_digest(jlm_dir)
+        self.eff.ensuredir(Path(sysimage).parent)
+        self.compile_patched_sysimage(
+            julia,
+            sysimage,
+            options,  # type: ignore
+            low_priority=low_priority,
+            extra_info=dict(extra_info or {}, inputs=inputs),
+        )
+        if not self.dry_run:
+            if profile:
+                self.localstore.update_profile(
+                    profile, {"julia": julia, "sysimage": sysimage}
+                )
+            else:
+                self.localstore.set_sysimage(julia, sysimage)
+                if digest is not None:
+                    self.localstore.set_manifest_sysimage(julia, digest, sysimage)
+        return sysimage
+
+    def remove_unused_sysimages(self) -> None:
+        """
+        Remove old versions of system images in `.jlm/sysimages` that
+        are neither registered in `data.json` nor mapped by processes.
+        """
+        referenced = set(self.localstore.referenced_sysimages())
+        candidates = [
+            path
+            for path in versioned_sysimages(self.localstore.path)
+            if pathstr(path) not in referenced
+        ]
+        mapped = set(map(pathstr, mapped_paths(candidates)))
+        for path in candidates:
+            if pathstr(path) in mapped:
+                self.eff.info("Keeping {} (still in use)".format(path))
+                continue
+            self.eff.info("Removing old system image {}".format(path))
+            if not self.dry_run:
+                remove_sysimage(path)
+
+    def cli_watch(
+        self,
+        interval: float,
+        settle: float,
+        cpu_target: Optional[str],
+        precompile_traces: bool,
+        once: bool,
+    ) -> None:
+        """
+        Rebuild system image of this project when its inputs change.
+
+        `Project.toml`, `Manifest.toml` and (with
+        `--precompile-traces`) `.jlm/traces/precompile.jl` are
+        monitored.  Builds run with the lowest CPU and I/O priority.
+        Each build is written to a new file and then registered
+        atomically; running processes keep using the old image, which
+        is removed once no process maps it.
+        """
+        julia = self.effective_julia
+        jlm_dir = self.localstore.path
+        paths = input_paths(jlm_dir, precompile_traces)
+        options = {"cpu_target": cpu_target}
+        failed = None  # type: Optional[Dict[str, Any]]
+        self.eff.print("Watching:\n    " + "\n    ".join(map(pathstr, paths)))
+        self.install_backend(julia)
+        while True:
+            # Pick up a manifest created after starting:
+            paths = input_paths(jlm_dir, precompile_traces)
+            stamps = input_stamps(paths)
+            current = self.localstore.sysimage(julia)
+            buildinfo = load_buildinfo(current) if current else None
+            if is_outdated(buildinfo, stamps) and stamps != failed:
+                # Wait until the inputs settle (e.g., `Pkg` is done):
+                time.sleep(settle)
+                if input_stamps(paths) == stamps:
+                    if precompile_traces:
+                        options.update(self.traces_options())
+                    self.eff.print("Inputs changed.  Rebuilding system image...")
+                    try:
+                        sysimage = self.build_project_sysimage(
+                            julia,
+                            options,
+                            precompile_traces=precompile_traces,
+                            low_priority=True,
+                        )
+                    except subprocess.CalledProcessError as err:
+                        self.eff.warn("Build failed: {}".format(err))
+                        failed = stamps
+                    else:
+                        self.eff.print("Switched to {}".format(sysimage))
+                        failed = None
+                    continue
+            self.remove_unused_sysimages()
+            if once or self.dry_run:
+                return
+            time.sleep(interval)
+
+    def traces_options(self) -> Dict[str, str]:
+        """
+        Build options for using the recorded precompile statements.
+        """
+        precompile = tracedir(self.localstore.path) / PRECOMPILE_NAME
+        if not precompile.exists():
+            raise ApplicationError(
+                "{} does not exist.  Run `jlm traces compact` first.".format(
+                    precompile
+                )
+            )
+        project = self.localstore.path.parent / "Project.toml"
+        if not project.exists():
+            raise ApplicationError(
+                "{} does not exist.  Precompile statements can only be"
+                " used for a Julia project.".format(project)
+            )
+        return {"precompile_file": pathstr(precompile), "project": pathstr(project)}
+
+    def cli_traces_enable(self) -> None:
+        """ Record precompile statements in every `jlm run`. """
+        self.localstore.set({"record_precompile": True})
+
+    def cli_traces_disable(self) -> None:
+        """ Stop recording precompile statements by default. """
+        self.localstore.set({"record_precompile": False})
+
+    def failing_statements(self, statements: List[str]) -> List[str]:
+        """
+        Evaluate `statements` using the Julia runtime of this project
+        and return the ones that fail.
+        """
+        if not statements:
+            return []
+        path = tracedir(self.localstore.path) / "verify.{}.jl".format(os.getpid())
+        write_statements(path, statements)
+        try:
+            # Not via `launch_command`; the verification must not be
+            # recorded by `jlm traces enable`:
+            cmd = self.julia_cmd()
+            cmd.extend(["--startup-file=no", "-e", verify_script, pathstr(path)])
+            env = os.environ.copy()
+            env.update(self.launch_env())
+            self.eff.info_run(cmd)
+            output = subprocess.check_output(cmd, env=env, universal_newlines=True)
+        finally:
+            os.remove(pathstr(path))
+        return [statements[int(i) - 1] for i in output.split()]
+
+    def cli_traces_compact(self, min_count: int, prune: bool, verify: bool) -> None:
+        """
+        Merge recorded precompile statements into the corpus.
+
+        Statements are de-duplicated across runs and counted.  Unless
+        `--no-verify` is given, statements that cannot be evaluated
+        any more (e.g., due to removed packages or methods) are dropped.
+        Statements compiled in at least `--min-count` runs are written
+        to `.jlm/traces/precompile.jl`, which is used by
+        `jlm compile-sysimage --precompile-traces`.
+        """
+        jlm_dir = self.localstore.path
+        corpus = Corpus.load(jlm_dir)
+        # Skip trace files that may still be written by running Julia:
+        paths = [p for p in pending_traces(jlm_dir) if not trace_in_use(p)]
+        for path in paths:
+            corpus.add_run(read_statements(path))
+        self.eff.info("Merged {} trace file(s).".format(len(paths)))
+
+        if verify and not self.dry_run:
+            failed = self.failing_statements(list(corpus.counts))
+            corpus.remove(failed)
+            self.eff.info("Dropped {} failing statement(s).".format(len(failed)))
+        if prune:
+            pruned = corpus.prune(min_count)
+            self.eff.info("Pruned {} rare statement(s).".format(len(pruned)))
+
+        statements = corpus.statements(min_count)
+        precompile = tracedir(jlm_dir) / PRECOMPILE_NAME
+        self.eff.print(
+            "{} of {} statement(s) from {} run(s) are written to {}".format(
+                len(statements), len(corpus.counts), corpus.runs, precompile
+            )
+        )
+        if self.dry_run:
+            return
+        corpus.store()
+        write_statements(precompile, statements)
+        for path in paths:
+            os.remove(pathstr(path))
+
+    def cli_push(self, store: Optional[str], force: bool) -> None:
+        """ Publish default system image for `julia` to an artifact store. """
+        julia = self.effective_julia
+        artifacts = self.artifact_store(store)
+        if artifacts is None:
+            raise ApplicationError(
+                "Artifact store is not specified.  Use --store or"
+                " set $JLM_ARTIFACT_STORE."
+            )
+        sysimage = self.default_sysimage(julia)
+        self.restore_sysimage(sysimage)
+        if not sysimage.exists():
+            raise ApplicationError(
+                "Default system image {} does not exist.  Run"
+                " `jlm create-default-sysimage` first.".format(sysimage)
+            )
+        info = load_buildinfo(sysimage) or self.buildinfo(julia)
+        key = julia_key(self.metadata.get(julia))
+        entry = artifacts.entrypath(key, __version__)
+        self.eff.info("Publishing {} to {}".format(sysimage, entry))
+        if self.dry_run:
+            return
+        entry = artifacts.push(sysimage, info, key, __version__, force=force)
+        self.eff.print("Published system image at {}".format(entry))
+
+    def cli_pull(self, store: Optional[str], force: bool) -> None:
+        """ Fetch default system image for `julia` from an artifact store. """
+        julia = self.effective_julia
+        artifacts = self.artifact_store(store)
+        if artifacts is None:
+            raise ApplicationError(
+                "Artifact store is not specified.  Use --store or"
+                " set $JLM_ARTIFACT_STORE."
+            )
+        sysimage = self.writable_default_sysimage(julia)
+        if self.sysimage_exists(sysimage) and not force:
+            self.eff.print("Default system image {} already exists.".format(sysimage))
+            return
+        if not self.pull_default_sysimage(julia, artifacts) and not self.dry_run:
+            raise ApplicationError(
+                "No system image for {} is published in {}".format(
+                    julia, artifacts.root
+                )
+            )
+
+    def cli_set_depots(self, writable: Optional[str], shared: List[str]) -> None:
+        """
+        Use a per-project writable depot stacked on shared depots.
+
+        `jlm run` sets `JULIA_DEPOT_PATH` to the writable depot, the
+        shared depots (including the ones declared in the system
+        configuration `$JLM_SYSTEM_CONFIG`) and then the default depots.
+        """
+        if writable:
+            writable = pathstr(Path.cwd() / writable)
+        else:
+            writable = pathstr(self.localstore.path / "depot")
+        shared = [pathstr(Path.cwd() / p) for p in shared or ()]
+        self.eff.ensuredir(writable)
+        self.eff.info("Writable depot: {}".format(writable))
+        if not self.dry_run:
+            self.localstore.set({"depots": {"writable": writable, "shared": shared}})
+
+    def cli_unset_depots(self) -> None:
+        """ Stop using layered depots. """
+        if self.dry_run:
+            return
+        data = self.localstore.loaddata()
+        data["config"].pop("depots", None)
+        self.localstore.storedata(data)
+
+    def project_packages(self) -> Dict[str, str]:
+        """
+        Names and UUIDs of the packages in the project.
+        """
+        base = self.localstore.path.parent
+        packages = read_packages(base / "Manifest.toml")
+        packages.update(read_packages(base / "Project.toml"))
+        return packages
+
+    def cli_publish_caches(self, depot: Optional[str]) -> None:
+        """
+        Copy precompilation caches of this project to a shared depot.
+
+        Cache files of the packages in the project (`Project.toml` and
+        `Manifest.toml` next to the `.jlm` directory) compiled for the
+        system image and the precompile key of this project are copied
+        from the writable depot (see `set-depots`) to the first shared
+        depot or `--depot`.
+        """
+        config = self.localstore.get("depots")
+        if not config:
+            raise ApplicationError(
+                "Layered depots are not enabled.  Run `jlm set-depots` first."
+            )
+        if depot is None:
+            shared = self.shared_depots()
+            if not shared:
+                raise ApplicationError("No shared depot is configured.")
+            depot = shared[0]
+
+        julia = self.effective_julia
+        version = self.metadata.get(julia)["version"]
+        writable = Path(config["writable"])
+        published = 0
+        for (_name, path) in project_cache_files(
+            writable,
+            version,
+            self.project_packages(),
+            pathstr(self.sysimage_for(julia)),
+            self.precompile_key,
+        ):
+            dest = Path(depot) / path.relative_to(writable)
+            self.eff.info("Publishing {}".format(dest))
+            if not self.dry_run and publish_file(path, dest):
+                published += 1
+        self.eff.print("Published {} cache file(s) to {}".format(published, depot))
+
+    def cli_bundle_export(self, output: Optional[str], compress: str) -> None:
+        """
+        Export the project setup as a relocatable bundle.
+
+        The bundle contains the `.jlm` directory, the system images used
+        by the project and the precompilation caches of the project's
+        packages.  Use `jlm bundle import` to set up the project on
+        another machine, possibly with a different file system layout.
+        """
+        julia = self.effective_julia
+        jlm_dir = self.localstore.path
+        metadata = self.metadata.get(julia)
+        depot = (self.depot_path() or metadata["depot_path"])[0]
+        packages = self.project_packages()
+
+        # The bundle is written to stdout; do not print anything else:
+        to_stdout = output is None or output == "-"
+        sysimage = pathstr(self.sysimage_for(julia))
+        sysimages = sorted(set(self.localstore.referenced_sysimages()) | {sysimage})
+        for image in sysimages:
+            self.restore_sysimage(image, quiet=to_stdout)
+        sysimages = [p for p in sysimages if Path(p).exists()]
+        manifest = {
+            "jlm_dir": pathstr(jlm_dir),
+            "julia": julia,
+            "sysimage": sysimage,
+            "sysimages": [],
+            "caches": [],
+        }  # type: Dict[str, Any]
+        files = []  # type: List[Tuple[Path, str]]
+        for (i, path) in enumerate(map(Path, sysimages)):
+            arcname = "sysimages/{}/{}".format(i, path.name)
+            manifest["sysimages"].append({"path": pathstr(path), "arcname": arcname})
+            files.append((path, arcname))
+            if buildinfo_path(path).exists():
+                files.append((buildinfo_path(path), arcname + ".json"))
+            for (name, cache) in project_cache_files(
+                depot, metadata["version"], packages, pathstr(path), self.precompile_key
+            ):
+                arcname = cache.relative_to(depot).as_posix()
+                manifest["caches"].append(
+                    {
+                        "arcname": arcname,
+                        "uuid": packages[name],
+                        "sysimage": pathstr(path),
+                        "slug": package_slug(
+                            packages[name], pathstr(path), self.precompile_key
+                        ),
+                    }
+                )
+                files.append((cache, arcname))
+
+        if output is None or output == "-":
+            self.write_bundle(sys.stdout.buffer, compress, manifest, files)
+            return
+        for (path, _) in files:
+            self.eff.info("Adding {}".format(path))
+        if self.dry_run:
+            return
+        with open(output, "wb") as file:
+            self.write_bundle(file, compress, manifest, files)
+
+    def write_bundle(
+        self,
+        fileobj: IO[bytes],
+        compress: str,
+        manifest: Dict[str, Any],
+        files: List[Tuple[Path, str]],
+    ) -> None:
+        if self.dry_run:
+            return
+        with BundleWriter(fileobj, compress) as writer:
+            writer.add_manifest(manifest)
+            writer.add_tree(
+                self.localstore.path, "jlm", exclude=[SYSIMAGES_DIR, "depot"]
+            )
+            for (path, arcname) in files:
+                writer.add_file(path, arcname)
+
+    def cli_bundle_import(
+        self, bundle: str, depot: Optional[str], julia_map: List[str], force: bool
+    ) -> None:
+        """
+        Set up the project in the current directory from a bundle.
+
+        Paths to the system images and the `.jlm` directory recorded in
+        the bundle are rewritten for the new location and the
+        precompilation caches are renamed accordingly.  The caches are
+        placed in the writable depot (see `jlm set-depots`) if
+        configured, `--depot` if given, or the first depot of `julia`.
+        """
+        mapping = {}  # type: Dict[str, str]
+        for spec in julia_map:
+            old, sep, new = spec.partition("=")
+            if not sep:
+                raise ApplicationError("Invalid --julia-map: {}".format(spec))
+            mapping[old] = new
+        jlm_dir = Path.cwd() / ".jlm"
+        if LocalStore.is_valid_path(jlm_dir) and not force:
+            raise ApplicationError(
+                "{} already exists.  Use --force to overwrite.".format(jlm_dir)
+            )
+
+        if bundle == "-":
+            self.read_bundle(sys.stdin.buffer, jlm_dir, depot, mapping)
+        else:
+            with open(bundle, "rb") as file:
+                self.read_bundle(file, jlm_dir, depot, mapping)
+        self.eff.print("Imported {} to {}".format(bundle, jlm_dir))
+
+    def read_bundle(
+        self,
+        fileobj: IO[bytes],
+        jlm_dir: Path,
+        depot: Optional[str],
+        mapping: Dict[str, str],
+    ) -> None:
+        with BundleReader(fileobj) as reader:
+            manifest = reader.manifest
+            paths = {manifest["jlm_dir"]: pathstr(jlm_dir)}
+            for (i, entry) in enumerate(manifest["sysimages"]):
+                old = Path(entry["path"])
+                try:
+                    rel = old.relative_to(manifest["jlm_dir"])
+                except ValueError:
+                    rel = Path(SYSIMAGES_DIR, "imported", str(i), old.name)
+                paths[entry["path"]] = pathstr(jlm_dir / rel)
+            paths.update(mapping)
+            byarcname = {e["arcname"]: e["path"] for e in manifest["sysimages"]}
+            caches = {e["arcname"]: e for e in manifest["caches"]}
+            julia = paths.get(manifest["julia"], manifest["julia"])
+            key = pathstr(jlm_dir)
+
+            self.localstore.path = jlm_dir
+            cache_depot = None  # type: Optional[Path]
+            for (arcname, file) in reader.files():
+                if arcname.parts[0] == "jlm":
+                    dest = jlm_dir.joinpath(*arcname.parts[1:])
+                elif arcname.parts[0] == "sysimages":
+                    name = arcname.as_posix()
+                    if name.endswith(".json"):
+                        dest = buildinfo_path(paths[byarcname[name[: -len(".json")]]])
+                    else:
+                        dest = Path(paths[byarcname[name]])
+                elif arcname.as_posix() in caches:
+                    if cache_depot is None:
+                        cache_depot = Path(depot or self.import_depot(julia))
+                    entry = caches[arcname.as_posix()]
+                    newslug = package_slug(
+                        entry["uuid"], paths[entry["sysimage"]], key
+                    )
+                    dest = cache_depot.joinpath(*arcname.parts[:-1]) / relocated_name(
+                        arcname.name, entry["slug"], newslug
+                    )
+                else:
+                    self.eff.warn("Ignoring unknown bundle member {}".format(arcname))
+                    continue
+                self.eff.info("Extracting {}".format(dest))
+                if self.dry_run:
+                    continue
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                with atomicopen(dest, "wb") as out:
+                    shutil.copyfileobj(file, out)
+                if arcname.parts[0] == "jlm" and arcname.name == "data.json":
+                    # Make sure `import_depot` sees the rewritten config:
+                    data = rewrite_paths(self.localstore.loaddata(), paths)
+                    self.localstore.storedata(data)
+
+        if self.dry_run:
+            return
+        if manifest["sysimage"] in paths:
+            self.localstore.set_sysimage(julia, paths[manifest["sysimage"]])
+        for entry in manifest["sysimages"]:
+            self.restamp_buildinfo(paths[entry["path"]], julia)
+
+    def import_depot(self, julia: str) -> str:
+        config = self.localstore.exists() and self.localstore.get("depots")
+        if config:
+            return config["writable"]  # type: ignore
+        return self.metadata.get(julia)["depot_path"][0]  # type: ignore
+
+    def restamp_buildinfo(self, sysimage: str, julia: str) -> None:
+        """
+        Record the identity of the local `julia` in the build information
+        of the imported `sysimage` if `julia` is the executable it is
+        built with.
+        """
+        info = load_buildinfo(sysimage)
+        if not info or "sha256" not in info.get("julia", {}):
+            return
+        if not Path(julia).exists() or info["julia"]["sha256"] != file_digest(julia):
+            self.eff.warn(
+                "System image {} is not built by {}.".format(sysimage, julia)
+            )
+            return
+        info["julia"].update(executable_identity(julia))
+        info["julia"]["executable"] = julia
+        store_buildinfo(sysimage, info)
 
     def cli_install_backend(self) -> None:
         """ Install JuliaManager.jl for this `julia`. """
@@ -297,10 +1623,25 @@ class Application:
         """ Update JuliaManager.jl for this `julia`. """
         self.update_backend(self.effective_julia)
 
-    def cli_info(self) -> None:
+    def cli_info(self, collect: bool) -> None:
         """ Print information about jlm setup. """
         path = self.localstore.path
         default, others = self.available_runtimes()
+        runtimes = [default] + others
+        if collect:
+            metadata = self.metadata.get_many(
+                (r.executable for r in runtimes), cpu_name=True
+            )
+        else:
+            metadata = {}
+            for runtime in runtimes:
+                cached = self.metadata.load(runtime.executable)
+                if cached is not None:
+                    metadata[runtime.executable] = cached
+        for runtime in runtimes:
+            runtime.metadata = metadata.get(runtime.executable)
+            if runtime.sysimage is not None:
+                runtime.buildinfo = load_buildinfo(runtime.sysimage)
 
         print = self.eff.print
         print()
@@ -315,6 +1656,281 @@ class Application:
             for runtime in others:
                 print(runtime.summary())
 
+    def doctor_findings(self, perf: bool) -> List[Finding]:
+        julia = self.effective_julia
+        sysimage = self.sysimage_for(julia)
+        if Path(sysimage) == self.default_sysimage(julia):
+            rebuild = "jlm create-default-sysimage --force"
+            create = "jlm create-default-sysimage"
+        else:
+            rebuild = create = "jlm compile-sysimage"
+        buildinfo = load_buildinfo(sysimage)
+
+        findings = check_sysimage(sysimage, fix=create)
+        findings.extend(check_executable(julia, buildinfo, fix=rebuild))
+        if not perf:
+            return rank(findings)
+
+        findings.extend(check_stale(buildinfo, fix="jlm compile-sysimage"))
+        findings.extend(check_datastore(self.localstore.path))
+        try:
+            metadata = self.metadata.get(julia)
+        except ApplicationError as err:
+            findings.append(
+                Finding(
+                    "julia-unusable",
+                    "error",
+                    str(err),
+                    fix="jlm set-default JULIA  # use a working Julia executable",
+                )
+            )
+        else:
+            depots = self.depot_path() or metadata["depot_path"]
+            if depots:
+                findings.extend(check_slug_churn(depots[0], metadata["version"]))
+        findings.extend(check_path(os.environ.get("PATH", "")))
+        return rank(findings)
+
+    def cli_doctor(self, perf: bool, as_json: bool) -> None:
+        """
+        Diagnose problems in jlm setup.
+
+        With `--perf`, also check for the common causes of slow
+        launches.  Problems are listed with the most harmful ones
+        first, together with the command to fix them.
+        """
+        findings = self.doctor_findings(perf)
+        if as_json:
+            json.dump([f.to_dict() for f in findings], sys.stdout, indent=1)
+            print()
+            return
+        if not findings:
+            self.eff.print("No problem found.")
+        for finding in findings:
+            self.eff.print(finding.summary())
+
+    def cli_builds(
+        self,
+        sysimage: Optional[str],
+        julia_version: Optional[str],
+        since: Optional[float],
+        failed: Optional[bool],
+        last: Optional[int],
+        compare: Optional[List[int]],
+        as_json: bool,
+    ) -> None:
+        """
+        Show the history of system image builds.
+
+        Every build records its wall-clock and CPU time, peak memory
+        usage, output size, input digests and Julia version.  With
+        `--compare OLD NEW`, show how two builds differ.
+        """
+        records = self.build_history.load()
+        if compare:
+            byid = {r["id"]: r for r in records}
+            try:
+                old, new = (byid[i] for i in compare)
+            except KeyError as err:
+                raise ApplicationError("No build with ID {}".format(err))
+            diff = compare_records(old, new)
+            if as_json:
+                json.dump(diff, sys.stdout, indent=1)
+                print()
+                return
+            for (key, value) in diff.items():
+                self.eff.print("{}: {}".format(key, json.dumps(value, sort_keys=True)))
+            return
+
+        records = filter_records(
+            records,
+            sysimage=sysimage,
+            julia_version=julia_version,
+            since=None if since is None else time.time() - since * 86400,
+            failed=failed,
+        )
+        if last is not None:
+            records = records[-last:]
+        if as_json:
+            json.dump(records, sys.stdout, indent=1)
+            print()
+            return
+        self.eff.print(HEADER)
+        for record in records:
+            self.eff.print(format_record(record))
+
+    def cli_stats(
+        self, since: Optional[float], enable: Optional[bool], as_json: bool
+    ) -> None:
+        """
+        Show statistics of the runs recorded by `jlm run --supervise`.
+
+        Percentiles of wall-clock time, CPU time, peak memory usage and
+        major page faults are shown for each Julia runtime and system
+        image (a rebuilt image is treated as a new one) in the order of
+        their first runs.  Use `--enable` to supervise all `jlm run`.
+        """
+        if enable is not None:
+            self.localstore.set({"supervise": enable})
+            return
+        records = RunStats(self.localstore.path).load()
+        if since is not None:
+            cutoff = time.time() - since * 86400
+            records = [r for r in records if r["started"] >= cutoff]
+        summary = summarize(records)
+        if as_json:
+            json.dump(summary, sys.stdout, indent=1)
+            print()
+            return
+        if not summary:
+            self.eff.print("No run is recorded.  See `jlm stats --help`.")
+        for entry in summary:
+            self.eff.print(format_summary(entry))
+
+    def cli_top(self, interval: float, once: bool, as_json: bool) -> None:
+        """
+        Show memory usage of running Julia processes launched by jlm.
+
+        For each project and system image, the RSS and PSS of the
+        processes and of their system image mappings are shown, as
+        well as how much of the system image is shared with other
+        processes and the memory saved by sharing.  Unless `--once` or
+        `--json` is given, the view is refreshed every `--interval`
+        seconds.  Processes of other users are not shown.
+        """
+        if as_json:
+            json.dump(group(scan()), sys.stdout, indent=1)
+            print()
+            return
+        while True:
+            report = format_report(scan())
+            if once:
+                self.eff.print(report)
+                return
+            # Clear the screen and print from the top:
+            sys.stdout.write("\033[H\033[J" + report + "\n")
+            sys.stdout.flush()
+            try:
+                time.sleep(interval)
+            except KeyboardInterrupt:
+                return
+
+    def archive_candidates(self) -> List[Path]:
+        """
+        System images which can be archived: the ones in the writable
+        home store and in `.jlm/sysimages` (if in a project).
+        """
+        paths = list(self.homestore.path.glob("exec/*/" + self.sysimage_name))
+        jlm_dir = self.localstore.locate_path()
+        if jlm_dir is not None:
+            paths.extend(sorted(sysimages_dir(jlm_dir).glob("**/*." + dlext)))
+        return paths
+
+    def cli_archive(self, unused_days: float, compression: str) -> None:
+        """
+        Compress system images not used within `--unused-days` days.
+
+        Each archived image is replaced by a compressed file and a stub
+        `*.archive.json` next to it.  It is decompressed into place
+        automatically when it is used again (e.g., by `jlm run`).
+        System images in the home directory (`jlm locate home-dir`)
+        and the ones of the current project are considered.  Images
+        mapped by running processes are never archived.
+        """
+        cutoff = time.time() - unused_days * 24 * 60 * 60
+        candidates = [
+            path
+            for path in self.archive_candidates()
+            if path.exists() and last_used(path) < cutoff
+        ]
+        mapped = set(map(pathstr, mapped_paths(candidates)))
+        saved = 0
+        for path in candidates:
+            if pathstr(path) in mapped:
+                self.eff.info("Keeping {} (still in use)".format(path))
+                continue
+            self.eff.info("Archiving {}".format(path))
+            if not self.dry_run:
+                saved += archive.archive(path, compression)
+        if not self.dry_run:
+            self.eff.print("Saved {}".format(format_size(saved)))
+
+    def cli_prune(self, keep_days: Optional[float], max_size: Optional[int]) -> None:
+        """
+        Remove system images by the least-recently-used policy.
+
+        System images not used within `--keep-days` days are removed.
+        Then, while the total size exceeds `--max-size`, the least
+        recently used ones are removed.  System images in the home
+        directory (`jlm locate home-dir`) and in `.jlm/sysimages` of
+        the projects used on this machine (by `jlm init` or `jlm run`)
+        are considered.  Images registered in `data.json` of any of
+        these projects or mapped by running processes are never removed,
+        nor are the default system images of the Julia executables they
+        use.
+        """
+        if keep_days is None and max_size is None:
+            raise ApplicationError("Specify --keep-days and/or --max-size.")
+        stores = set(StoreRegistry(self.homestore.path).live(self.dry_run))
+        current = self.localstore.locate_path()
+        if current is not None and LocalStore.is_valid_path(current):
+            stores.add(current)
+
+        execdir = self.homestore.path / "exec"
+        paths = archive.find_sysimages(execdir, "*/" + self.sysimage_name)
+        referenced = set()
+        try:
+            julias = [self.effective_julia]
+        except ApplicationError:
+            julias = []
+        for jlm_dir in sorted(stores):
+            store = LocalStore(jlm_dir)
+            referenced.update(store.referenced_sysimages())
+            config = store.loaddata()["config"]
+            julias.append(config.get("default"))
+            julias.extend(config.get("runtime", {}))
+            paths.extend(
+                archive.find_sysimages(sysimages_dir(jlm_dir), "**/*." + dlext)
+            )
+        referenced.update(
+            pathstr(self.writable_default_sysimage(julia)) for julia in julias if julia
+        )
+        referenced = set(map(os.path.realpath, referenced))
+        mapped = set(map(pathstr, mapped_paths(paths)))
+
+        images = [
+            {
+                "path": path,
+                "last_used": last_used(path),
+                "size": disk_usage(path),
+                "protected": pathstr(path) in mapped
+                or os.path.realpath(pathstr(path)) in referenced,
+            }
+            for path in paths
+        ]
+        removed = select_prunable(images, keep_days, max_size, time.time())
+        for image in removed:
+            path = image["path"]
+            self.eff.info(
+                "Removing {} ({}, last used on {})".format(
+                    path,
+                    format_size(image["size"]),
+                    time.strftime("%Y-%m-%d", time.localtime(image["last_used"])),
+                )
+            )
+            if self.dry_run:
+                continue
+            remove_sysimage(path)
+            if path.parent.parent == execdir and remove_execdir(path.parent):
+                self.eff.info("Removed {}".format(path.parent))
+        self.eff.print(
+            "{} {} system images ({}).".format(
+                "Would remove" if self.dry_run else "Removed",
+                len(removed),
+                format_size(sum(i["size"] for i in removed)),
+            )
+        )
+
     def cli_locate_sysimage(self) -> None:
         """ Print system image that would be used for `julia`. """
         print(self.effective_sysimage, end="")
@@ -331,6 +1947,31 @@ class Application:
         """ Print directory in which `jlm` global information is stored. """
         print(self.homestore.path, end="")
 
+    def cli_serve(self, socket: Optional[str]) -> None:
+        """
+        Serve `jlm` queries over a Unix socket with JSON-RPC.
+
+        Each request is a line of JSON-RPC 2.0 request.  See `jlm.server`
+        for the available methods.  Use it from tools that need to query
+        `jlm` (e.g., `jlm locate sysimage`) frequently.
+        """
+        from .server import Server, remove_stale_socket
+
+        path = Path(socket) if socket else self.homestore.path / "server.sock"
+        self.eff.ensuredir(path.parent)
+        self.eff.info("Listening on {}".format(path))
+        if self.dry_run:
+            return
+        remove_stale_socket(path)
+        server = Server(path)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.remove(pathstr(path))
+
     def cli_ijulia_kernel(
         self, julia_option: Optional[List[str]], connection_file: str
     ) -> None:
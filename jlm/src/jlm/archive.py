@@ -0,0 +1,161 @@
+"""
+Compressed at-rest storage of inactive system images (``jlm archive``).
+
+An archived system image ``PATH`` is replaced by
+
+* ``PATH.xz`` (or ``PATH.gz``): the compressed image, and
+* ``PATH.archive.json``: the stub recording the compression, the
+  original size and modification time.
+
+The image is restored (decompressed into place) on demand when it is
+about to be used.  Restoration is done under an exclusive lock on
+``PATH.archive.lock`` so that concurrent launchers wait for a single
+decompression; the image is written to a temporary file and then
+renamed so that it appears atomically.  Data is streamed in chunks so
+that the memory usage is bounded regardless of the image size.
+"""
+
+import fcntl
+import gzip
+import json
+import lzma
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional
+
+from .utils import ApplicationError, _Pathish, atomicopen, pathstr
+
+COMPRESSIONS = ("xz", "gz")
+CHUNK_SIZE = 2 ** 20
+
+
+def stub_path(sysimage: _Pathish) -> Path:
+    return Path(pathstr(sysimage) + ".archive.json")
+
+
+def lock_path(sysimage: _Pathish) -> Path:
+    return Path(pathstr(sysimage) + ".archive.lock")
+
+
+def archive_path(sysimage: _Pathish, compression: str) -> Path:
+    return Path(pathstr(sysimage) + "." + compression)
+
+
+def load_stub(sysimage: _Pathish) -> Optional[Dict[str, Any]]:
+    try:
+        with open(pathstr(stub_path(sysimage))) as file:
+            return json.load(file)  # type: ignore
+    except FileNotFoundError:
+        return None
+
+
+def is_archived(sysimage: _Pathish) -> bool:
+    return not os.path.exists(pathstr(sysimage)) and stub_path(sysimage).exists()
+
+
+def _open(path: Path, mode: str, compression: str) -> IO[bytes]:
+    if compression == "xz":
+        return lzma.open(pathstr(path), mode)  # type: ignore
+    elif compression == "gz":
+        return gzip.open(pathstr(path), mode)  # type: ignore
+    raise ValueError("Unknown compression: {}".format(compression))
+
+
+@contextmanager
+def locked(sysimage: _Pathish) -> Iterator[None]:
+    with open(pathstr(lock_path(sysimage)), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def archive(sysimage: _Pathish, compression: str = "xz") -> int:
+    """
+    Compress `sysimage` and return the number of bytes saved.
+    """
+    sysimage = Path(sysimage)
+    with locked(sysimage):
+        st = os.stat(pathstr(sysimage))
+        dest = archive_path(sysimage, compression)
+        tmp = Path("{}.{}.tmp".format(dest, os.getpid()))
+        try:
+            with open(pathstr(sysimage), "rb") as src:
+                with _open(tmp, "wb", compression) as file:
+                    shutil.copyfileobj(src, file, CHUNK_SIZE)
+            os.replace(pathstr(tmp), pathstr(dest))
+        finally:
+            if tmp.exists():
+                os.remove(pathstr(tmp))
+        stub = {
+            "compression": compression,
+            "size": st.st_size,
+            "mtime": st.st_mtime,
+            "archived": time.time(),
+        }
+        with atomicopen(stub_path(sysimage), "w") as file:
+            json.dump(stub, file)
+        # Processes that already mapped the image keep it alive:
+        os.remove(pathstr(sysimage))
+    return st.st_size - os.path.getsize(pathstr(dest))
+
+
+def restore(sysimage: _Pathish) -> bool:
+    """
+    Decompress archived `sysimage` into place if it does not exist.
+    Return `True` if it is restored by this call.
+    """
+    sysimage = Path(sysimage)
+    if sysimage.exists() or not stub_path(sysimage).exists():
+        return False
+    with locked(sysimage):
+        if sysimage.exists():  # restored by another process
+            return False
+        stub = load_stub(sysimage)
+        if stub is None:
+            return False
+        src = archive_path(sysimage, stub["compression"])
+        if not src.exists():
+            raise ApplicationError(
+                "Archive {} of system image {} is missing.".format(src, sysimage)
+            )
+        tmp = Path("{}.{}.tmp".format(sysimage, os.getpid()))
+        try:
+            with _open(src, "rb", stub["compression"]) as file:
+                with open(pathstr(tmp), "wb") as dest:
+                    shutil.copyfileobj(file, dest, CHUNK_SIZE)
+            os.utime(pathstr(tmp), (time.time(), stub["mtime"]))
+            os.replace(pathstr(tmp), pathstr(sysimage))
+        finally:
+            if tmp.exists():
+                os.remove(pathstr(tmp))
+        os.remove(pathstr(stub_path(sysimage)))
+        os.remove(pathstr(src))
+    return True
+
+
+def remove(sysimage: _Pathish) -> None:
+    """
+    Remove `sysimage` and its archive (if any).
+    """
+    stub = load_stub(sysimage)
+    paths = [Path(sysimage), stub_path(sysimage), lock_path(sysimage)]
+    if stub is not None:
+        paths.append(archive_path(sysimage, stub["compression"]))
+    for path in paths:
+        if path.exists():
+            os.remove(pathstr(path))
+
+
+def find_sysimages(directory: _Pathish, pattern: str) -> List[Path]:
+    """
+    System images matching `pattern` in `directory`, including the
+    archived ones (which do not exist until they are restored).
+    """
+    directory = Path(directory)
+    paths = set(directory.glob(pattern))
+    suffix = ".archive.json"
+    for stub in directory.glob(pattern + suffix):
+        paths.add(stub.with_name(stub.name[: -len(suffix)]))
+    return sorted(paths)
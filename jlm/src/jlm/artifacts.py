@@ -0,0 +1,177 @@
+"""
+Shared store of system images built by `jlm`.
+
+An artifact store is a directory (typically on NFS or a mounted
+volume) with the following layout::
+
+    ROOT/JULIA_KEY/BACKEND_VERSION/sys.so
+    ROOT/JULIA_KEY/BACKEND_VERSION/buildinfo.json
+
+where ``JULIA_KEY`` identifies the Julia runtime (see `julia_key`) and
+``BACKEND_VERSION`` is the version of JuliaManager.jl/`jlm`.  Each
+entry is published by renaming a fully written temporary directory so
+that readers never observe a partially written image.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .utils import ApplicationError, _Pathish, dlext, pathstr
+
+BUILDINFO_NAME = "buildinfo.json"
+SYSIMAGE_NAME = "sys." + dlext
+
+
+def parse_store_url(url: str) -> Path:
+    """
+    Convert a ``file://`` URL or a plain path to a `Path`.
+
+    >>> str(parse_store_url("file:///mnt/jlm-artifacts"))
+    '/mnt/jlm-artifacts'
+    >>> str(parse_store_url("/mnt/jlm-artifacts"))
+    '/mnt/jlm-artifacts'
+    """
+    if "://" in url:
+        scheme, rest = url.split("://", 1)
+        if scheme != "file":
+            raise ApplicationError(
+                "Unsupported artifact store URL {}.  Only `file://` is"
+                " supported.".format(url)
+            )
+        url = rest
+    path = Path(url)
+    if not path.is_absolute():
+        raise ApplicationError(
+            "Artifact store must be an absolute path.  Got: {}".format(url)
+        )
+    return path
+
+
+def julia_key(metadata: Dict[str, Any]) -> str:
+    """
+    Key of the Julia runtime described by `metadata` in the store.
+
+    The launcher ``bin/julia`` can be byte-identical across patch
+    releases so that its digest cannot be used.  Instead, the runtime is
+    identified by its version, architecture and commit.
+
+    >>> julia_key({"version": "1.6.0", "arch": "x86_64", "commit": "f9720dc2eb"})
+    '1.6.0-x86_64-f9720dc2eb'
+    >>> julia_key({"version": "1.6.0", "arch": "x86_64", "commit": ""})
+    '1.6.0-x86_64'
+    """
+    parts = [metadata["version"], metadata["arch"], metadata["commit"]]
+    return "-".join(p for p in parts if p)
+
+
+def copy_with_digest(
+    src: _Pathish, dest: _Pathish, algorithm: str = "sha256"
+) -> str:
+    """
+    Copy `src` to `dest` and return the digest of the copied bytes.
+    """
+    m = hashlib.new(algorithm)
+    with open(pathstr(src), "rb") as fsrc, open(pathstr(dest), "wb") as fdest:
+        for chunk in iter(lambda: fsrc.read(2 ** 20), b""):
+            m.update(chunk)
+            fdest.write(chunk)
+    shutil.copystat(pathstr(src), pathstr(dest))
+    return m.hexdigest()
+
+
+class ArtifactStore:
+    # root: Path
+
+    def __init__(self, root: _Pathish):
+        self.root = Path(root)
+
+    @classmethod
+    def from_url(cls, url: str) -> "ArtifactStore":
+        return cls(parse_store_url(url))
+
+    def entrypath(self, key: str, backend_version: str) -> Path:
+        return self.root / key / backend_version
+
+    def lookup(
+        self, key: str, backend_version: str
+    ) -> Optional[Dict[str, Any]]:
+        path = self.entrypath(key, backend_version) / BUILDINFO_NAME
+        try:
+            with open(pathstr(path)) as file:
+                return json.load(file)  # type: ignore
+        except FileNotFoundError:
+            return None
+
+    def push(
+        self,
+        sysimage: _Pathish,
+        info: Dict[str, Any],
+        key: str,
+        backend_version: str,
+        force: bool = False,
+    ) -> Path:
+        """
+        Publish `sysimage` and its build metadata `info` atomically.
+        """
+        entry = self.entrypath(key, backend_version)
+        if entry.exists() and not force:
+            raise ApplicationError(
+                "System image for this Julia runtime is already"
+                " published at {}.  Use --force to replace it.".format(entry)
+            )
+        entry.parent.mkdir(parents=True, exist_ok=True)
+
+        tmpdir = Path(tempfile.mkdtemp(prefix=".tmp-", dir=pathstr(entry.parent)))
+        try:
+            info = dict(info)
+            info["sha256"] = copy_with_digest(sysimage, tmpdir / SYSIMAGE_NAME)
+            with open(pathstr(tmpdir / BUILDINFO_NAME), "w") as file:
+                json.dump(info, file, indent=1, sort_keys=True)
+
+            if entry.exists():
+                trash = Path(
+                    tempfile.mkdtemp(prefix=".trash-", dir=pathstr(entry.parent))
+                )
+                os.rename(pathstr(entry), pathstr(trash / entry.name))
+                os.rename(pathstr(tmpdir), pathstr(entry))
+                shutil.rmtree(pathstr(trash))
+            else:
+                os.rename(pathstr(tmpdir), pathstr(entry))
+        finally:
+            if tmpdir.exists():
+                shutil.rmtree(pathstr(tmpdir))
+        return entry
+
+    def pull(
+        self, key: str, backend_version: str, sysimage: _Pathish
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Copy published system image to `sysimage` and return its metadata.
+
+        Return `None` if no image is published for the given key.  The
+        checksum is verified before `sysimage` is (atomically) created.
+        """
+        info = self.lookup(key, backend_version)
+        if info is None:
+            return None
+        src = self.entrypath(key, backend_version) / SYSIMAGE_NAME
+        sysimage = Path(sysimage)
+        tmppath = Path("{}.{}.tmp".format(sysimage, os.getpid()))
+        try:
+            digest = copy_with_digest(src, tmppath)
+            if digest != info.get("sha256"):
+                raise ApplicationError(
+                    "Checksum mismatch for {}:\n"
+                    "    expected: {}\n"
+                    "    actual  : {}".format(src, info.get("sha256"), digest)
+                )
+            tmppath.rename(sysimage)
+        finally:
+            if tmppath.exists():
+                os.remove(pathstr(tmppath))
+        return info
@@ -0,0 +1,79 @@
+"""
+Metadata stored next to system images built by `jlm`.
+
+For a system image ``PATH/sys.so``, the metadata is stored in
+``PATH/sys.so.json``.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .utils import _Pathish, atomicopen, pathstr
+
+
+def buildinfo_path(sysimage: _Pathish) -> Path:
+    return Path(pathstr(sysimage) + ".json")
+
+
+def load_buildinfo(sysimage: _Pathish) -> Optional[Dict[str, Any]]:
+    try:
+        with open(pathstr(buildinfo_path(sysimage))) as file:
+            return json.load(file)  # type: ignore
+    except FileNotFoundError:
+        return None
+
+
+def store_buildinfo(sysimage: _Pathish, info: Dict[str, Any]) -> None:
+    with atomicopen(buildinfo_path(sysimage), "w") as file:
+        json.dump(info, file, indent=1, sort_keys=True)
+
+
+def built_cpu_target(info: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    CPU target the system image of `info` is built for (if specified).
+
+    >>> built_cpu_target({"options": {"cpu_target": "generic"}})
+    'generic'
+    >>> built_cpu_target(None) is None
+    True
+    """
+    return ((info or {}).get("options") or {}).get("cpu_target")
+
+
+def executable_identity(julia: _Pathish) -> Dict[str, Any]:
+    """
+    Cheap (`stat`-based) identity of the Julia executable `julia`.
+    """
+    st = os.stat(pathstr(julia))
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def identity_mismatch(
+    info: Optional[Dict[str, Any]], julia: _Pathish
+) -> Optional[str]:
+    """
+    Return a description of the mismatch if the system image recorded
+    in `info` is not built by `julia`.  Return `None` otherwise.
+
+    This is meant to be called right before launching Julia; i.e., it
+    must not invoke `julia`.  System images without the identity
+    information (e.g., the ones not built by `jlm`) are not checked.
+    """
+    if not info or "size" not in info.get("julia", {}):
+        return None
+    recorded = info["julia"]
+    try:
+        actual = executable_identity(julia)
+    except OSError as err:
+        return "Cannot stat Julia executable {}: {}".format(julia, err)
+    for key in ("size", "mtime"):
+        if recorded[key] != actual[key]:
+            return (
+                "System image is built by a different Julia executable"
+                " ({} differs; recorded: {}, actual: {}).".format(
+                    key, recorded[key], actual[key]
+                )
+            )
+    return None
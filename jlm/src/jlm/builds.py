@@ -0,0 +1,222 @@
+"""
+Telemetry of system image builds (``jlm builds``).
+
+Each build run by `Application.compile_patched_sysimage` appends a
+record (one JSON object per line) to ``builds.jsonl`` in the home
+store.  The history is append-only; a record is written by a single
+``write`` so that concurrent builds do not interleave.
+"""
+
+import json
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .utils import Cmd, _Pathish, file_digest, pathstr
+
+HISTORY_NAME = "builds.jsonl"
+
+Record = Dict[str, Any]
+
+# Numeric fields shown by `jlm builds --compare`:
+METRICS = ("wall_time", "cpu_time", "max_rss", "size")
+
+
+def exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def measured_call(cmd: Cmd, **kwargs) -> Record:
+    """
+    Run `cmd` and return its resource usage.
+
+    Like `subprocess.check_call`, raise `subprocess.CalledProcessError`
+    if `cmd` fails.  The usage is attached to the exception as
+    ``.usage`` attribute.
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, **kwargs)
+    try:
+        _, status, rusage = os.wait4(proc.pid, 0)
+    except BaseException:
+        proc.kill()
+        proc.wait()
+        raise
+    proc.returncode = returncode = exit_code(status)
+    usage = {
+        "wall_time": time.perf_counter() - start,
+        "user_time": rusage.ru_utime,
+        "system_time": rusage.ru_stime,
+        "cpu_time": rusage.ru_utime + rusage.ru_stime,
+        "max_rss": rusage.ru_maxrss * 1024,  # KiB on Linux
+        "returncode": returncode,
+    }
+    if returncode != 0:
+        err = subprocess.CalledProcessError(returncode, cmd)
+        err.usage = usage  # type: ignore
+        raise err
+    return usage
+
+
+def input_digests(paths: Iterable[_Pathish]) -> Dict[str, Optional[str]]:
+    digests = {}  # type: Dict[str, Optional[str]]
+    for path in paths:
+        try:
+            digests[pathstr(path)] = file_digest(path)
+        except FileNotFoundError:
+            digests[pathstr(path)] = None
+    return digests
+
+
+class BuildHistory:
+    # path: Path
+
+    def __init__(self, path: _Pathish):
+        self.path = Path(path)
+
+    def append(self, record: Record) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = (json.dumps(record, sort_keys=True) + "\n").encode("utf-8")
+        fd = os.open(pathstr(self.path), os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # Terminate a line truncated by a crash:
+            size = os.fstat(fd).st_size
+            if size > 0 and os.pread(fd, 1, size - 1) != b"\n":
+                line = b"\n" + line
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def load(self) -> List[Record]:
+        """
+        Load all records.  Each record gets the 1-origin ``id`` (line
+        number).  Broken lines (e.g., truncated by a crash) are skipped.
+        """
+        records = []  # type: List[Record]
+        try:
+            file = open(pathstr(self.path))
+        except FileNotFoundError:
+            return records
+        with file:
+            for (i, line) in enumerate(file, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                record["id"] = i
+                records.append(record)
+        return records
+
+
+def filter_records(
+    records: List[Record],
+    sysimage: Optional[str] = None,
+    julia_version: Optional[str] = None,
+    since: Optional[float] = None,
+    failed: Optional[bool] = None,
+) -> List[Record]:
+    """
+    Select `records` matching all the given criteria.
+
+    >>> records = [
+    ...     {"id": 1, "sysimage": "/a/sys.so", "julia_version": "1.6.0",
+    ...      "started": 10, "returncode": 0},
+    ...     {"id": 2, "sysimage": "/b/sys.so", "julia_version": "1.7.0",
+    ...      "started": 20, "returncode": 1},
+    ... ]
+    >>> [r["id"] for r in filter_records(records, sysimage="/b")]
+    [2]
+    >>> [r["id"] for r in filter_records(records, julia_version="1.6")]
+    [1]
+    >>> [r["id"] for r in filter_records(records, since=15)]
+    [2]
+    >>> [r["id"] for r in filter_records(records, failed=True)]
+    [2]
+    """
+    selected = []
+    for record in records:
+        if sysimage is not None and sysimage not in record.get("sysimage", ""):
+            continue
+        if julia_version is not None and not record.get(
+            "julia_version", ""
+        ).startswith(julia_version):
+            continue
+        if since is not None and record.get("started", 0) < since:
+            continue
+        if failed is not None and (record.get("returncode") != 0) != failed:
+            continue
+        selected.append(record)
+    return selected
+
+
+def format_size(n: Optional[float]) -> str:
+    """
+    >>> format_size(123456789)
+    '117.7M'
+    >>> format_size(None)
+    '-'
+    """
+    if n is None:
+        return "-"
+    for unit in ("", "K", "M", "G"):
+        if abs(n) < 1024 or unit == "G":
+            break
+        n /= 1024
+    return "{:.1f}{}".format(n, unit)
+
+
+ROW = "{:>4}  {:<16}  {:<6}  {:>8}  {:>8}  {:>7}  {:>7}  {:<8}  {}"
+
+HEADER = ROW.format(
+    "ID", "STARTED", "STATUS", "WALL", "CPU", "RSS", "SIZE", "JULIA", "SYSIMAGE"
+)
+
+
+def format_record(record: Record) -> str:
+    return ROW.format(
+        record["id"],
+        time.strftime("%Y-%m-%d %H:%M", time.localtime(record["started"])),
+        "ok" if record.get("returncode") == 0 else "failed",
+        "{:.1f}s".format(record["wall_time"]),
+        "{:.1f}s".format(record["cpu_time"]),
+        format_size(record.get("max_rss")),
+        format_size(record.get("size")),
+        record.get("julia_version", "?"),
+        record.get("sysimage", "?"),
+    )
+
+
+def compare_records(old: Record, new: Record) -> Dict[str, Dict[str, Any]]:
+    """
+    Differences of `METRICS` and input digests between two records.
+
+    >>> compare_records({"wall_time": 100.0, "inputs": {"a": "x", "b": "y"}},
+    ...                 {"wall_time": 150.0, "inputs": {"a": "x", "b": "z"}})
+    ... # doctest: +NORMALIZE_WHITESPACE
+    {'wall_time': {'old': 100.0, 'new': 150.0, 'ratio': 1.5},
+     'inputs': {'changed': ['b']}}
+    """
+    diff = {}  # type: Dict[str, Dict[str, Any]]
+    for key in METRICS:
+        if key in old or key in new:
+            a = old.get(key)
+            b = new.get(key)
+            ratio = b / a if a and b is not None else None
+            diff[key] = {"old": a, "new": b, "ratio": ratio}
+    inputs_old = old.get("inputs", {})
+    inputs_new = new.get("inputs", {})
+    changed = sorted(
+        p
+        for p in set(inputs_old) | set(inputs_new)
+        if inputs_old.get(p) != inputs_new.get(p)
+    )
+    if changed:
+        diff["inputs"] = {"changed": changed}
+    for key in ("julia_version", "options"):
+        if old.get(key) != new.get(key):
+            diff[key] = {"old": old.get(key), "new": new.get(key)}
+    return diff
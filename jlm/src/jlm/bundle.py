@@ -0,0 +1,158 @@
+"""
+Relocatable bundles of a project (``jlm bundle export|import``).
+
+A bundle is a (optionally compressed) tar stream with the members
+
+* ``bundle.json``: the manifest (always the first member),
+* ``jlm/...``: the ``.jlm`` directory except for the system images and
+  the writable depot,
+* ``sysimages/N/NAME``: the system images used by the project (with
+  their build information), and
+* ``compiled/vX.Y/PACKAGE/SLUG...``: the precompilation caches of the
+  project's packages for these system images.
+
+Since the precompilation cache paths depend on the paths of the
+system image and the ``.jlm`` directory (see `jlm.caches`), the cache
+files are renamed to the slugs for the new paths on import.  The
+package sources themselves are not bundled; they must be available in
+the depots of the target machine.
+"""
+
+import io
+import json
+import tarfile
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Dict, Iterable, Iterator, Tuple
+
+from .utils import ApplicationError, _Pathish, pathstr
+
+MANIFEST_NAME = "bundle.json"
+FORMAT = 1
+
+COMPRESSIONS = ("none", "gz", "bz2", "xz")
+
+
+def safe_relpath(arcname: str) -> PurePosixPath:
+    """
+    Validate that `arcname` is a relative path without ``..``.
+
+    >>> safe_relpath("jlm/data.json")
+    PurePosixPath('jlm/data.json')
+    >>> safe_relpath("../etc/passwd")
+    Traceback (most recent call last):
+      ...
+    jlm.utils.ApplicationError: Unsafe path in bundle: ../etc/passwd
+    """
+    path = PurePosixPath(arcname)
+    if path.is_absolute() or ".." in path.parts:
+        raise ApplicationError("Unsafe path in bundle: {}".format(arcname))
+    return path
+
+
+def relocated_name(filename: str, old_slug: str, new_slug: str) -> str:
+    """
+    Rename cache file `filename` for `old_slug` to the one for `new_slug`.
+
+    >>> relocated_name("AbCdE_1.ji", "AbCdE", "XyZwV")
+    'XyZwV_1.ji'
+    """
+    assert filename.startswith(old_slug)
+    return new_slug + filename[len(old_slug) :]
+
+
+def rewrite_paths(obj: Any, mapping: Dict[str, str]) -> Any:
+    """
+    Replace path prefixes in (nested) JSON-like `obj` using `mapping`.
+
+    Longer prefixes take precedence.
+
+    >>> rewrite_paths({"a": ["/old/.jlm/x", "/other"], "/old/.jlm": 1},
+    ...               {"/old/.jlm": "/new/.jlm"})
+    {'a': ['/new/.jlm/x', '/other'], '/new/.jlm': 1}
+    """
+    if isinstance(obj, dict):
+        return {
+            rewrite_paths(k, mapping): rewrite_paths(v, mapping)
+            for (k, v) in obj.items()
+        }
+    elif isinstance(obj, list):
+        return [rewrite_paths(v, mapping) for v in obj]
+    elif isinstance(obj, str):
+        for old in sorted(mapping, key=len, reverse=True):
+            if obj == old or obj.startswith(old.rstrip("/") + "/"):
+                return mapping[old] + obj[len(old) :]
+    return obj
+
+
+class BundleWriter:
+    # tar: tarfile.TarFile
+
+    def __init__(self, fileobj: IO[bytes], compress: str = "none"):
+        mode = "w|" if compress == "none" else "w|" + compress
+        # `mode` is one of the literals accepted by `tarfile.open` but
+        # the stubs require it to be spelled out (`typing.Literal` is not
+        # available in all supported Python versions):
+        self.tar = tarfile.open(fileobj=fileobj, mode=mode)  # type: ignore
+
+    def __enter__(self) -> "BundleWriter":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.tar.close()
+
+    def add_manifest(self, manifest: Dict[str, Any]) -> None:
+        """ Add the manifest.  It must be called first. """
+        self.add_json(MANIFEST_NAME, dict(manifest, format=FORMAT))
+
+    def add_json(self, arcname: str, obj: Any) -> None:
+        data = json.dumps(obj, indent=1, sort_keys=True).encode("utf-8")
+        info = tarfile.TarInfo(arcname)
+        info.size = len(data)
+        self.tar.addfile(info, io.BytesIO(data))
+
+    def add_file(self, path: _Pathish, arcname: str) -> None:
+        self.tar.add(pathstr(path), arcname=arcname, recursive=False)
+
+    def add_tree(
+        self, root: _Pathish, arcname: str, exclude: Iterable[str] = ()
+    ) -> None:
+        root = Path(root)
+        excluded = set(exclude)
+        for path in sorted(root.rglob("*")):
+            rel = path.relative_to(root)
+            if rel.parts[0] in excluded or not path.is_file():
+                continue
+            self.add_file(path, "{}/{}".format(arcname, rel.as_posix()))
+
+
+class BundleReader:
+    # tar: tarfile.TarFile
+    # manifest: Dict[str, Any]
+
+    def __init__(self, fileobj: IO[bytes]):
+        self.tar = tarfile.open(fileobj=fileobj, mode="r|*")
+        member = self.tar.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise ApplicationError("Not a jlm bundle.")
+        self.manifest = json.load(self.tar.extractfile(member))  # type: ignore
+        if self.manifest.get("format") != FORMAT:
+            raise ApplicationError(
+                "Unsupported bundle format: {}".format(self.manifest.get("format"))
+            )
+
+    def __enter__(self) -> "BundleReader":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.tar.close()
+
+    def files(self) -> Iterator[Tuple[PurePosixPath, IO[bytes]]]:
+        """
+        Iterate over ``(arcname, file)`` of the regular files except
+        for the manifest.
+        """
+        for member in self.tar:
+            if member.name == MANIFEST_NAME or not member.isfile():
+                continue
+            file = self.tar.extractfile(member)
+            yield safe_relpath(member.name), file  # type: ignore
@@ -0,0 +1,146 @@
+"""
+Locating precompilation cache files of a project.
+
+The cache file of a package is stored at
+``DEPOT/compiled/vX.Y/NAME/SLUG.ji`` where ``SLUG`` is computed by
+``Base.package_slug`` patched by
+``../../../src/SysImageHack/scripts/patch.jl``; i.e., it depends on the
+UUID of the package, the path to the system image and
+``$JLM_PRECOMPILE_KEY``.  This module re-implements it so that cache
+files can be located without launching Julia.
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from .utils import _Pathish, pathstr
+
+
+def _make_crc32c_table() -> List[int]:
+    table = []
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_crc32c_table = _make_crc32c_table()
+
+
+def crc32c(data: bytes, crc: int = 0) -> int:
+    """
+    CRC-32C (Castagnoli) as computed by ``Base._crc32c``.
+
+    >>> hex(crc32c(b"123456789"))
+    '0xe3069283'
+    >>> crc32c(b"6789", crc32c(b"12345")) == crc32c(b"123456789")
+    True
+    """
+    crc ^= 0xFFFFFFFF
+    table = _crc32c_table
+    for byte in data:
+        crc = table[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+slug_chars = (
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ" "abcdefghijklmnopqrstuvwxyz" "0123456789"
+)
+
+
+def slug(x: int, p: int) -> str:
+    """
+    Port of ``Base.slug``.
+    """
+    chars = []
+    n = len(slug_chars)
+    for _ in range(p):
+        x, d = divmod(x, n)
+        chars.append(slug_chars[d])
+    return "".join(chars)
+
+
+def package_slug(uuid: str, image_file: str, key: str, p: int = 5) -> str:
+    """
+    Port of ``Base.package_slug`` patched by jlm.
+    """
+    crc = crc32c(UUID(uuid).int.to_bytes(16, "little"))
+    crc = crc32c(image_file.encode("utf-8"), crc)
+    crc = crc32c(key.encode("utf-8"), crc)
+    return slug(crc, p)
+
+
+_header = re.compile(r"^\[\[(?:deps\.)?(.+?)\]\]\s*$")
+_uuid = re.compile(r'^uuid\s*=\s*"([0-9a-fA-F-]+)"\s*$')
+_name = re.compile(r'^name\s*=\s*"(.+)"\s*$')
+
+
+def read_packages(path: _Pathish) -> Dict[str, str]:
+    """
+    Read package names and UUIDs in ``Manifest.toml`` or ``Project.toml``.
+
+    Only the subset of TOML used by Pkg.jl is supported.  It works with
+    both old and new (``manifest_format = "2.0"``) manifest formats.
+    For ``Project.toml``, the project itself is returned (if it is a
+    package).
+    """
+    packages = {}  # type: Dict[str, str]
+    toplevel = {}  # type: Dict[str, str]
+    name = None  # type: Optional[str]
+    in_toplevel = True
+    try:
+        file = open(pathstr(path))
+    except FileNotFoundError:
+        return packages
+    with file:
+        for line in file:
+            line = line.strip()
+            if line.startswith("["):
+                m = _header.match(line)
+                name = m.group(1).strip('"') if m else None
+                in_toplevel = False
+                continue
+            for (key, regex) in [("uuid", _uuid), ("name", _name)]:
+                m = regex.match(line)
+                if not m:
+                    continue
+                if name is not None and key == "uuid":
+                    packages[name] = m.group(1)
+                elif in_toplevel:
+                    toplevel[key] = m.group(1)
+    if "name" in toplevel and "uuid" in toplevel:
+        packages[toplevel["name"]] = toplevel["uuid"]
+    return packages
+
+
+def compiled_dir(depot: _Pathish, version: str) -> Path:
+    major, minor = version.split(".")[:2]
+    return Path(depot) / "compiled" / "v{}.{}".format(major, minor)
+
+
+def project_cache_files(
+    depot: _Pathish,
+    version: str,
+    packages: Dict[str, str],
+    image_file: str,
+    key: str,
+) -> Iterator[Tuple[str, Path]]:
+    """
+    Yield ``(name, path)`` of the cache files in `depot` for `packages`
+    compiled with system image `image_file` and precompile key `key`.
+    """
+    compiled = compiled_dir(depot, version)
+    for (name, uuid) in sorted(packages.items()):
+        directory = compiled / name
+        if not directory.is_dir():
+            continue
+        pkgslug = package_slug(uuid, image_file, key)
+        for path in sorted(directory.iterdir()):
+            if path.name.startswith(pkgslug + ".") or path.name.startswith(
+                pkgslug + "_"
+            ):
+                yield name, path
@@ -0,0 +1,138 @@
+"""
+Resource limits of the current process (cgroup v1/v2 and CPU affinity).
+
+They are used to compute ``auto`` launch options (see
+``jlm set-options``) so that Julia launched inside a container or a
+batch job sizes its thread pool and heap to the limits of the job
+rather than to the host.
+"""
+
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .utils import pathstr
+
+# Memory limits above this are "unlimited" (cgroup v1 reports a huge
+# page-aligned number instead of `max`):
+_UNLIMITED = 2 ** 60
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        with open(pathstr(path)) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def parse_proc_cgroup(text: str) -> Dict[str, str]:
+    """
+    Parse ``/proc/self/cgroup`` into a map from controller to path.
+    The unified (v2) hierarchy is stored with the key ``""``.
+
+    >>> paths = parse_proc_cgroup(
+    ...     "4:memory:/job/1\\n3:cpu,cpuacct:/job/1\\n0::/user.slice\\n"
+    ... )
+    >>> paths[""], paths["cpu"], paths["cpuacct"], paths["memory"]
+    ('/user.slice', '/job/1', '/job/1', '/job/1')
+    """
+    paths = {}
+    for line in text.splitlines():
+        parts = line.split(":", 2)
+        if len(parts) != 3:
+            continue
+        for controller in parts[1].split(","):
+            paths[controller] = parts[2]
+    return paths
+
+
+def _candidates(mount: Path, path: str) -> List[Path]:
+    """
+    The cgroup directory and its ancestors; the limit of a cgroup is
+    bounded by the ones of its ancestors.  In containers, `path` may
+    refer to the host hierarchy while `mount` is the container's root
+    cgroup; hence `mount` itself is always included.
+    """
+    rel = Path(path.lstrip("/"))
+    dirs = [mount / rel] + [mount / p for p in rel.parents]
+    return [d for d in dirs if d.is_dir()] or [mount]
+
+
+class Limits:
+    # cpus: Optional[float]  # CPU quota in number of CPUs
+    # memory: Optional[int]  # bytes
+    # affinity: int          # number of CPUs the process can run on
+
+    def __init__(
+        self, cpus: Optional[float], memory: Optional[int], affinity: int
+    ):
+        self.cpus = cpus
+        self.memory = memory
+        self.affinity = affinity
+
+    @classmethod
+    def detect(cls, root: Path = Path("/")) -> "Limits":
+        proc = parse_proc_cgroup(_read(root / "proc/self/cgroup") or "")
+        cgroup = root / "sys/fs/cgroup"
+        cpus = []  # type: List[float]
+        memory = []  # type: List[int]
+        if "" in proc and (cgroup / "cgroup.controllers").exists():
+            for d in _candidates(cgroup, proc[""]):
+                cpumax = (_read(d / "cpu.max") or "max").split()
+                if cpumax[0] != "max":
+                    cpus.append(int(cpumax[0]) / int(cpumax[1]))
+                memmax = _read(d / "memory.max") or "max"
+                if memmax != "max":
+                    memory.append(int(memmax))
+        else:
+            if "cpu" in proc:
+                for mount in (cgroup / "cpu,cpuacct", cgroup / "cpu"):
+                    if not mount.is_dir():
+                        continue
+                    for d in _candidates(mount, proc["cpu"]):
+                        quota = int(_read(d / "cpu.cfs_quota_us") or -1)
+                        if quota > 0:
+                            period = int(_read(d / "cpu.cfs_period_us") or 100000)
+                            cpus.append(quota / period)
+                    break
+            if "memory" in proc:
+                for d in _candidates(cgroup / "memory", proc["memory"]):
+                    limit = int(_read(d / "memory.limit_in_bytes") or _UNLIMITED)
+                    memory.append(limit)
+        memory = [m for m in memory if m < _UNLIMITED]
+        try:
+            affinity = len(os.sched_getaffinity(0))
+        except AttributeError:  # not Linux
+            affinity = os.cpu_count() or 1
+        return cls(
+            min(cpus) if cpus else None, min(memory) if memory else None, affinity
+        )
+
+    @property
+    def threads(self) -> int:
+        """
+        Number of threads that can run in parallel.
+
+        >>> Limits(2.5, None, 8).threads
+        3
+        >>> Limits(None, None, 8).threads
+        8
+        """
+        if self.cpus is None:
+            return self.affinity
+        return max(1, min(self.affinity, math.ceil(self.cpus)))
+
+    def heap_size_hint(self, fraction: float = 0.75) -> Optional[str]:
+        """
+        Heap size hint leaving some room for non-GC memory.
+
+        >>> Limits(None, 4 * 2 ** 30, 1).heap_size_hint()
+        '3072M'
+        >>> Limits(None, None, 1).heap_size_hint() is None
+        True
+        """
+        if self.memory is None:
+            return None
+        return "{}M".format(int(self.memory * fraction) // 2 ** 20)
@@ -11,7 +11,12 @@ from typing import TYPE_CHECKING
 
 from . import __version__
 from .application import Application
+from .archive import COMPRESSIONS as ARCHIVE_COMPRESSIONS
+from .bundle import COMPRESSIONS
+from .completion import SHELLS
+from .retention import parse_size
 from .utils import ApplicationError
+from .workers import PIN_CHOICES
 
 if TYPE_CHECKING:
     from typing_extensions import Final
@@ -53,6 +58,23 @@ doc_sysimage = """
 The path to system image.
 """
 
+doc_cpu_target = """
+CPU target(s) for which the system image is compiled; e.g.,
+`generic;skylake-avx512,clone_all;znver2`.  It is passed to
+PackageCompiler.jl and has the same syntax as `julia --cpu-target`.
+Specify multiple targets to use the same system image on
+heterogeneous machines.  Default to the CPU of the current machine.
+"""
+
+doc_profile = """
+Launch profile for which the system image is configured.
+"""
+
+doc_store = """
+Artifact store to be used; a directory path or a `file://` URL.
+Default to `$JLM_ARTIFACT_STORE`.
+"""
+
 
 def splitdoc(doc):
     lines = textwrap.dedent((doc or "").lstrip()).splitlines()
@@ -95,6 +117,19 @@ def make_parser(doc=__doc__):
         """,
     )
 
+    parser.add_argument(
+        "--system",
+        action="store_true",
+        help="""
+        Write default system images etc. to the system-wide store
+        `$JLM_SYSTEM_STORE` (default: `/opt/jlm`) instead of
+        `~/.julia/jlm`.  Images in the system-wide store are used by
+        all users unless they are overridden by `jlm set-sysimage`.
+        This is meant to be used by administrators to pre-provision
+        system images.
+        """,
+    )
+
     subparsers = parser.add_subparsers()  # type: Final
 
     def subp(command, func, doc=None, subparsers=subparsers):
@@ -110,6 +145,71 @@ def make_parser(doc=__doc__):
         return p
 
     p = subp("run", Application.cli_run, doc_run)
+    p.add_argument(
+        "--on-mismatch",
+        choices=("error", "fallback"),
+        default="error",
+        help="""
+        What to do when the system image is built by a Julia
+        executable different from the one to be launched.  `error`
+        aborts before launching Julia.  `fallback` launches Julia with
+        its stock system image after printing a warning.
+        """,
+    )
+    p.add_argument(
+        "--record-precompile",
+        action="store_true",
+        help="""
+        Record precompile statements (`julia --trace-compile`) of this
+        run in `.jlm/traces/`.  See `jlm traces compact`.
+        """,
+    )
+    p.add_argument(
+        "--profile",
+        metavar="NAME",
+        help="""
+        Launch profile to be used.  By default, the profile whose
+        script globs match the script passed to Julia is used, if any.
+        See `jlm profile set --help`.
+        """,
+    )
+    p.add_argument(
+        "--supervise",
+        action="store_true",
+        help="""
+        Run `julia` as a child process (instead of replacing `jlm`
+        process) and record its resource usage.  See `jlm stats`.
+        """,
+    )
+    pinning = p.add_mutually_exclusive_group()
+    pinning.add_argument(
+        "--cpus",
+        metavar="LIST",
+        help="""
+        Run `julia` on the CPUs in LIST (e.g., `0-15`) with as many
+        threads.
+        """,
+    )
+    pinning.add_argument(
+        "--numa-node",
+        metavar="N",
+        type=int,
+        help="""
+        Run `julia` on the CPUs of NUMA node N with as many threads and
+        allocate memory on it (requires `numactl`).
+        """,
+    )
+    pinning.add_argument(
+        "--spread",
+        metavar="K",
+        type=int,
+        help="""
+        Run `julia` on K CPUs with K threads.  Concurrent `jlm run
+        --spread` in the same project get disjoint CPUs, within a
+        single NUMA node when possible, and NUMA nodes are used in a
+        round-robin fashion.
+        """,
+    )
     p.add_argument("julia", nargs="?", help=doc_julia)
     p.add_argument(
         "arguments",
@@ -123,7 +223,9 @@ def make_parser(doc=__doc__):
             first argument to `run`; i.e.  `jlm ... run --
             PATH/TO/FILE.jl ...`.  If you pass `julia` to `run`, there
             is no need to pass `--` since the argument parsing for
-            `jlm` automatically ends at this point.
+            `jlm` automatically ends at this point.  Options for `jlm
+            run` itself (e.g., `--on-mismatch`) must be placed
+            immediately after `run`.
             """
         ),
     )
@@ -135,12 +237,73 @@ def make_parser(doc=__doc__):
     p = subp("set-default", Application.cli_set_default)
     p.add_argument("julia", help=doc_julia)
 
+    def add_variant_arguments(p):
+        p.add_argument(
+            "--hostname",
+            metavar="GLOB",
+            help="Host name pattern (e.g., `gpu-node-*`) of the variant.",
+        )
+        p.add_argument(
+            "--cpu",
+            metavar="GLOB",
+            help="""
+            Pattern of CPU model name (as in `model name` of
+            `/proc/cpuinfo`; e.g., `*EPYC*`) of the variant.
+            """,
+        )
+        p.add_argument(
+            "--cpu-flags",
+            metavar="FLAGS",
+            help="""
+            Comma-separated CPU flags (as in `flags` of `/proc/cpuinfo`;
+            e.g., `avx512f,avx512bw`) required by the variant.
+            """,
+        )
+
     p = subp("set-sysimage", Application.cli_set_sysimage)
     p.add_argument("julia", nargs="?", help=doc_julia)
     p.add_argument("sysimage", help=doc_sysimage)
+    add_variant_arguments(p)
+    p.add_argument("--profile", metavar="NAME", help=doc_profile)
 
     p = subp("unset-sysimage", Application.cli_unset_sysimage)
     p.add_argument("julia", nargs="?", help=doc_julia)
+    add_variant_arguments(p)
+    p.add_argument("--profile", metavar="NAME", help=doc_profile)
+
+    p = subp("set-options", Application.cli_set_options)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument(
+        "--threads",
+        metavar="N|auto",
+        help="""
+        Number of threads (`auto`: the CPU quota and affinity of the process).
+        """,
+    )
+    p.add_argument(
+        "--heap-size-hint",
+        metavar="SIZE|auto",
+        help="""
+        Heap size hint for the GC, e.g., `4G` (`auto`: 75%% of the memory limit).
+        """,
+    )
+    p.add_argument(
+        "--optimize",
+        metavar="{0,1,2,3}|auto",
+        choices=["0", "1", "2", "3", "auto"],
+        help="Optimization level.",
+    )
+    p.add_argument(
+        "--compiled-modules",
+        metavar="{yes,no}|auto",
+        choices=["yes", "no", "auto"],
+        help="Use precompiled modules.",
+    )
+    p.add_argument(
+        "--unset",
+        action="store_true",
+        help="Remove the given options (all options if none is given).",
+    )
 
     p = subp("create-default-sysimage", Application.cli_create_default_sysimage)
     p.add_argument("julia", nargs="?", help=doc_julia)
@@ -155,6 +318,347 @@ def make_parser(doc=__doc__):
             """
         ),
     )
+    p.add_argument("--cpu-target", metavar="TARGETS", help=doc_cpu_target)
+
+    p = subp("compile-sysimage", Application.cli_compile_sysimage)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument(
+        "--output",
+        "-o",
+        metavar="PATH",
+        help="""
+        Path at which the system image is stored.  Default to a new
+        file `sysimages/sys-TIMESTAMP.so` (or `.dylib`, `.dll`) in the
+        `.jlm` directory.
+        """,
+    )
+    p.add_argument("--cpu-target", metavar="TARGETS", help=doc_cpu_target)
+    p.add_argument(
+        "--precompile-traces",
+        action="store_true",
+        help="""
+        Include the packages of the project (`Project.toml` next to the
+        `.jlm` directory) and precompile the statements recorded by
+        `jlm run --record-precompile` (see `jlm traces compact`).
+        """,
+    )
+    p.add_argument("--profile", metavar="NAME", help=doc_profile)
+    p.add_argument(
+        "--lean",
+        action="store_true",
+        help="""
+        Include only the packages and standard libraries reachable from
+        the dependencies of the project (`Project.toml` next to the
+        `.jlm` directory or the `project` of `--profile`).
+        """,
+    )
+
+    p = subp("watch", Application.cli_watch)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument(
+        "--interval",
+        type=float,
+        default=10.0,
+        help="Seconds between checks of the inputs.",
+    )
+    p.add_argument(
+        "--settle",
+        type=float,
+        default=5.0,
+        help="""
+        Seconds to wait after a change is detected to make sure the
+        inputs are not being modified any more.
+        """,
+    )
+    p.add_argument("--cpu-target", metavar="TARGETS", help=doc_cpu_target)
+    p.add_argument(
+        "--precompile-traces",
+        action="store_true",
+        help="Use and monitor `.jlm/traces/precompile.jl`.",
+    )
+    p.add_argument(
+        "--once",
+        action="store_true",
+        help="Rebuild if needed and exit instead of watching forever.",
+    )
+
+    traces_parser = subparsers.add_parser(
+        "traces",
+        formatter_class=FormatterClass,
+        help="Manage precompile statements recorded by `jlm run`",
+    )  # type: Final
+    traces_subparsers = traces_parser.add_subparsers()  # type: Final
+
+    def traces_subp(*args, **kwargs):
+        return subp(*args, subparsers=traces_subparsers, **kwargs)
+
+    p = traces_subp("enable", Application.cli_traces_enable)
+    p = traces_subp("disable", Application.cli_traces_disable)
+    p = traces_subp("compact", Application.cli_traces_compact)
+    p.add_argument(
+        "--min-count",
+        type=int,
+        default=1,
+        help="""
+        Use only the statements compiled in at least this number of
+        runs.
+        """,
+    )
+    p.add_argument(
+        "--prune",
+        action="store_true",
+        help="Remove statements rarer than --min-count from the corpus.",
+    )
+    p.add_argument(
+        "--no-verify",
+        dest="verify",
+        action="store_false",
+        default=True,
+        help="Do not launch Julia to check that statements can be evaluated.",
+    )
+
+    p = subp("set-depots", Application.cli_set_depots)
+    p.add_argument(
+        "--writable",
+        metavar="DEPOT",
+        help="Writable depot of this project.  Default to `.jlm/depot`.",
+    )
+    p.add_argument(
+        "--shared",
+        metavar="DEPOT",
+        action="append",
+        default=[],
+        help="""
+        Read-only depot shared with other projects and users.  It can
+        be specified multiple times.
+        """,
+    )
+
+    p = subp("unset-depots", Application.cli_unset_depots)
+
+    p = subp("publish-caches", Application.cli_publish_caches)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument(
+        "--depot",
+        help="Shared depot to publish to.  Default to the first shared depot.",
+    )
+
+    p = subp("doctor", Application.cli_doctor)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument(
+        "--perf",
+        action="store_true",
+        help="""
+        Check also for the causes of slow launches (stale system
+        image, slow file system, precompilation cache churn, long
+        `$PATH`, etc.) and measure their costs.
+        """,
+    )
+    p.add_argument(
+        "--json",
+        dest="as_json",
+        action="store_true",
+        help="Print the findings as a JSON array.",
+    )
+
+    p = subp("workers-cmd", Application.cli_workers_cmd)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument("--count", "-n", type=int, default=1, help="Number of workers.")
+    p.add_argument(
+        "--pin",
+        choices=PIN_CHOICES,
+        help="""
+        Pin each worker to a CPU core (using `taskset`) or a NUMA node
+        (using `numactl`) in a round-robin fashion.
+        """,
+    )
+    p.add_argument(
+        "--on-mismatch",
+        choices=("error", "fallback"),
+        default="error",
+        help="See `jlm run --help`.",
+    )
+    p.add_argument(
+        "--json",
+        dest="as_json",
+        action="store_true",
+        help="Print `exename`, `exeflags`, `env` and the commands as JSON.",
+    )
+
+    p = subp("builds", Application.cli_builds)
+    p.add_argument(
+        "--sysimage", metavar="SUBSTRING", help="Show builds of matching system images."
+    )
+    p.add_argument(
+        "--julia-version",
+        metavar="PREFIX",
+        help="Show builds by Julia version starting with PREFIX; e.g., `1.6`.",
+    )
+    p.add_argument(
+        "--since", metavar="DAYS", type=float, help="Show builds in last DAYS days."
+    )
+    p.add_argument(
+        "--failed",
+        action="store_const",
+        const=True,
+        help="Show only failed builds.",
+    )
+    p.add_argument(
+        "--succeeded",
+        dest="failed",
+        action="store_const",
+        const=False,
+        help="Show only successful builds.",
+    )
+    p.add_argument("--last", "-n", metavar="N", type=int, help="Show last N builds.")
+    p.add_argument(
+        "--compare",
+        nargs=2,
+        metavar=("OLD", "NEW"),
+        type=int,
+        help="Compare two builds specified by their IDs.",
+    )
+    p.add_argument("--json", dest="as_json", action="store_true", help="Print as JSON.")
+
+    bundle_parser = subparsers.add_parser(
+        "bundle",
+        formatter_class=FormatterClass,
+        help="Export/import the project setup to/from another machine",
+    )  # type: Final
+    bundle_subparsers = bundle_parser.add_subparsers()  # type: Final
+
+    def bundle_subp(*args, **kwargs):
+        return subp(*args, subparsers=bundle_subparsers, **kwargs)
+
+    p = bundle_subp("export", Application.cli_bundle_export)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        help="Path to the bundle to be written.  Default to stdout.",
+    )
+    p.add_argument(
+        "--compress",
+        choices=COMPRESSIONS,
+        default="none",
+        help="Compression of the tar stream.",
+    )
+
+    p = bundle_subp("import", Application.cli_bundle_import)
+    p.add_argument("bundle", help="Path to the bundle.  Use `-` for stdin.")
+    p.add_argument(
+        "--depot",
+        help="""
+        Depot in which the precompilation caches are placed.  Default
+        to the writable depot configured by `jlm set-depots` or the
+        first depot of `julia`.
+        """,
+    )
+    p.add_argument(
+        "--julia-map",
+        metavar="OLD=NEW",
+        action="append",
+        default=[],
+        help="""
+        Use Julia executable NEW on this machine in place of OLD
+        recorded in the bundle.  It can be specified multiple times.
+        """,
+    )
+    p.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Overwrite the existing `.jlm` directory.",
+    )
+
+    p = subp("stats", Application.cli_stats)
+    p.add_argument(
+        "--since", metavar="DAYS", type=float, help="Use runs in last DAYS days."
+    )
+    p.add_argument(
+        "--enable",
+        action="store_const",
+        const=True,
+        help="Supervise every `jlm run` in this project.",
+    )
+    p.add_argument(
+        "--disable",
+        dest="enable",
+        action="store_const",
+        const=False,
+        help="Stop supervising `jlm run` unless `--supervise` is given.",
+    )
+    p.add_argument("--json", dest="as_json", action="store_true", help="Print as JSON.")
+
+    profile_parser = subparsers.add_parser(
+        "profile", formatter_class=FormatterClass, help="Manage launch profiles"
+    )  # type: Final
+    profile_subparsers = profile_parser.add_subparsers()  # type: Final
+
+    def profile_subp(*args, **kwargs):
+        return subp(*args, subparsers=profile_subparsers, **kwargs)
+
+    p = profile_subp("set", Application.cli_profile_set)
+    p.add_argument("name", help="Name of the profile.")
+    p.add_argument(
+        "--option",
+        dest="options",
+        metavar="OPTION",
+        action="append",
+        help="""
+        Julia option added by this profile.  Use `=` for options
+        starting with `-`; e.g., `--option=--threads=4`.  It can be
+        specified multiple times.
+        """,
+    )
+    p.add_argument(
+        "--env",
+        metavar="KEY=VALUE",
+        action="append",
+        help="Environment variable set by this profile.",
+    )
+    p.add_argument(
+        "--script",
+        dest="scripts",
+        metavar="GLOB",
+        action="append",
+        help="""
+        Glob pattern (relative to the project directory) of the
+        scripts for which this profile is used automatically.
+        """,
+    )
+    p.add_argument(
+        "--project",
+        metavar="PATH",
+        help="`Project.toml` used for `compile-sysimage --profile`.",
+    )
+
+    p = profile_subp("remove", Application.cli_profile_remove)
+    p.add_argument("name", help="Name of the profile.")
+
+    p = profile_subp("list", Application.cli_profile_list)
+    p.add_argument("--json", dest="as_json", action="store_true", help="Print as JSON.")
+
+    p = subp("push", Application.cli_push)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument("--store", metavar="URL", help=doc_store)
+    p.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Replace the system image already published in the store.",
+    )
+
+    p = subp("pull", Application.cli_pull)
+    p.add_argument("julia", nargs="?", help=doc_julia)
+    p.add_argument("--store", metavar="URL", help=doc_store)
+    p.add_argument(
+        "--force",
+        "-f",
+        action="store_true",
+        help="Overwrite the default system image if it already exists.",
+    )
 
     p = subp("install-backend", Application.cli_install_backend)
     p.add_argument("julia", nargs="?", help=doc_julia)
@@ -163,6 +667,17 @@ def make_parser(doc=__doc__):
     p.add_argument("julia", nargs="?", help=doc_julia)
 
     p = subp("info", Application.cli_info)
+    p.add_argument(
+        "--no-collect",
+        dest="collect",
+        action="store_false",
+        default=True,
+        help="""
+        Do not launch Julia to collect information (e.g., its version)
+        that is not cached yet.  Julia is launched only once per Julia
+        executable (and host) so normally this is not needed.
+        """,
+    )
 
     locate_parser = subparsers.add_parser(
         "locate",
@@ -181,6 +696,71 @@ def make_parser(doc=__doc__):
     p = locate_subp("dir", Application.cli_locate_local_dir)
     p = locate_subp("home-dir", Application.cli_locate_home_dir)
 
+    p = subp("top", Application.cli_top)
+    p.add_argument(
+        "--interval",
+        "-n",
+        metavar="SECONDS",
+        type=float,
+        default=2.0,
+        help="Refresh interval.",
+    )
+    p.add_argument("--once", action="store_true", help="Print only once.")
+    p.add_argument(
+        "--json",
+        dest="as_json",
+        action="store_true",
+        help="Print the summary of each project and system image as JSON.",
+    )
+
+    p = subp("archive", Application.cli_archive)
+    p.add_argument(
+        "--unused-days",
+        metavar="DAYS",
+        type=float,
+        default=30,
+        help="""
+        Archive system images not used within this number of days.
+        (default: %(default)s)
+        """,
+    )
+    p.add_argument(
+        "--compression",
+        choices=ARCHIVE_COMPRESSIONS,
+        default="xz",
+        help="Compression format. (default: %(default)s)",
+    )
+
+    p = subp("prune", Application.cli_prune)
+    p.add_argument(
+        "--keep-days",
+        metavar="DAYS",
+        type=float,
+        help="Remove system images not used within this number of days.",
+    )
+    p.add_argument(
+        "--max-size",
+        metavar="SIZE",
+        type=parse_size,
+        help="""
+        Remove least recently used system images until their total size
+        is at most SIZE (e.g., `500M`, `20G`).
+        """,
+    )
+
+    p = subp("completion", Application.cli_completion)
+    p.add_argument("shell", choices=SHELLS)
+
+    p = subp("serve", Application.cli_serve)
+    p.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="""
+        Path to the Unix socket.  Default to `server.sock` in the
+        directory shown by `jlm locate home-dir`.
+        """,
+    )
+
     p = subp("ijulia-kernel", Application.cli_ijulia_kernel)
     p.add_argument("--julia", nargs="?", help=doc_julia)
     p.add_argument("--julia-option", action="append")
@@ -240,6 +820,18 @@ def make_parser(doc=__doc__):
     return parser
 
 
+# Options of `jlm run` mapped to whether or not they take a value:
+run_options = {
+    "--on-mismatch": True,
+    "--record-precompile": False,
+    "--supervise": False,
+    "--profile": True,
+    "--cpus": True,
+    "--numa-node": True,
+    "--spread": True,
+}
+
+
 def preparse_run(args):
     try:
         stop = args.index("--")
@@ -250,6 +842,15 @@ def preparse_run(args):
     except ValueError:
         return args, None
 
+    # Consume options of `jlm run` itself.
+    while irun < len(args):
+        name, eq, _ = args[irun].partition("=")
+        if name not in run_options:
+            break
+        irun += 1
+        if run_options[name] and not eq:
+            irun += 1
+
     # Parse whatever after `run` _unless_ it looks like an option.
     if irun < len(args) and not args[irun].startswith("-"):
         irun += 1
@@ -0,0 +1,295 @@
+"""
+Static shell completion scripts (``jlm completion bash|zsh|fish``).
+
+The scripts are generated from the argparse tree once so that
+completing a word never starts Python.  Dynamic candidates (the
+configured Julia executables and the profiles) are read from
+``.jlm/completion.txt`` which is rewritten by `LocalStore.storedata`
+whenever ``data.json`` changes.  Each line of the file is
+``KIND<TAB>VALUE`` where ``KIND`` is ``julia`` or ``profile``.
+"""
+
+import argparse
+from typing import Any, Dict, Iterable, List, Tuple
+
+SHELLS = ("bash", "zsh", "fish")
+CANDIDATES_NAME = "completion.txt"
+
+# Placeholders for dynamic candidates and file names:
+JULIA = "@julia"
+PROFILE = "@profile"
+FILE = "@file"
+
+Spec = Dict[str, Any]
+
+
+def candidates(config: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    Dynamic completion candidates in `config` of ``data.json``.
+
+    >>> candidates({
+    ...     "default": "/usr/bin/julia",
+    ...     "runtime": {"/usr/bin/julia": {}, "/opt/julia-1.9/bin/julia": {}},
+    ...     "profiles": {"etl": {}},
+    ... })
+    [('julia', '/opt/julia-1.9/bin/julia'), ('julia', '/usr/bin/julia'), \
+('profile', 'etl')]
+    """
+    julias = set(config.get("runtime", {}))
+    if "default" in config:
+        julias.add(config["default"])
+    return [("julia", j) for j in sorted(julias)] + [
+        ("profile", p) for p in sorted(config.get("profiles", {}))
+    ]
+
+
+def format_candidates(config: Dict[str, Any]) -> str:
+    return "".join("{}\t{}\n".format(*c) for c in candidates(config))
+
+
+def _values(action: argparse.Action) -> List[str]:
+    if action.choices:
+        return [str(c) for c in action.choices]
+    elif action.dest == "profile":
+        return [PROFILE]
+    elif action.dest == "julia":
+        return [JULIA]
+    return [FILE]
+
+
+def command_specs(parser: argparse.ArgumentParser, path: str = "") -> List[Spec]:
+    """
+    Flatten the tree of (sub)commands of `parser`.  Each spec has the
+    space-separated command `path`, its `help`, sub`commands`, all
+    `options`, `valued` options mapped to their candidates, and the
+    candidates of `positional` arguments.
+    """
+    spec = {
+        "path": path,
+        "help": "",
+        "commands": [],
+        "options": [],
+        "valued": {},
+        "positional": [],
+    }  # type: Spec
+    children = []  # type: List[Spec]
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            helps = {a.dest: a.help or "" for a in action._choices_actions}
+            for (name, subparser) in action.choices.items():
+                spec["commands"].append(name)
+                subpath = "{} {}".format(path, name).strip()
+                subspecs = command_specs(subparser, subpath)
+                subspecs[0]["help"] = helps.get(name, "")
+                children.extend(subspecs)
+        elif action.option_strings:
+            spec["options"].extend(action.option_strings)
+            if action.nargs != 0:
+                for option in action.option_strings:
+                    spec["valued"][option] = _values(action)
+        elif not spec["positional"]:
+            spec["positional"] = _values(action)
+    return [spec] + children
+
+
+def _words(words: Iterable[str]) -> str:
+    return " ".join(words)
+
+
+def _quote(text: str) -> str:
+    return "'{}'".format(text.replace("'", "'\\''"))
+
+
+BASH_TEMPLATE = """\
+# Completion for jlm (generated by `jlm completion {shell}`).
+{preamble}
+_jlm_candidates() {{
+    local dir=$PWD kind value
+    while [ -n "$dir" ]; do
+        if [ -f "$dir/.jlm/{candidates}" ]; then
+            while IFS=$'\\t' read -r kind value; do
+                [ "$kind" = "$1" ] && printf '%s\\n' "$value"
+            done < "$dir/.jlm/{candidates}"
+            return
+        fi
+        dir=${{dir%/*}}
+    done
+}}
+
+_jlm_spec() {{
+    case "$1" in
+{specs}
+    esac
+}}
+
+_jlm_values() {{
+    case "$1 $2" in
+{values}
+        *) values={file} ;;
+    esac
+}}
+
+_jlm() {{
+    local cur=${{COMP_WORDS[COMP_CWORD]}} prev=${{COMP_WORDS[COMP_CWORD-1]}}
+    local path= word i commands options valued positional values value
+    for ((i = 1; i < COMP_CWORD; i++)); do
+        word=${{COMP_WORDS[i]}}
+        _jlm_spec "$path"
+        if [[ " $valued " == *" $word "* ]]; then
+            ((i++))
+        elif [[ " $commands " == *" $word "* ]]; then
+            path=${{path:+$path }}$word
+        fi
+    done
+    _jlm_spec "$path"
+    if ((COMP_CWORD > 1)) && [[ " $valued " == *" $prev "* ]]; then
+        _jlm_values "$path" "$prev"
+    elif [[ $cur == -* ]]; then
+        values=$options
+    else
+        values="$commands $positional"
+    fi
+    COMPREPLY=()
+    local words=()
+    for word in $values; do
+        case "$word" in
+            {file}) COMPREPLY+=($(compgen -f -- "$cur")) ;;
+            {julia} | {profile})
+                while IFS= read -r value; do
+                    words+=("$value")
+                done < <(_jlm_candidates "${{word#@}}")
+                ;;
+            *) words+=("$word") ;;
+        esac
+    done
+    COMPREPLY+=($(compgen -W "${{words[*]}}" -- "$cur"))
+}}
+
+complete -F _jlm jlm
+"""
+
+
+def bash_script(specs: List[Spec], shell: str = "bash") -> str:
+    spec_cases = []
+    value_cases = []
+    for spec in specs:
+        spec_cases.append(
+            '        "{}")\n'
+            '            commands="{}"\n'
+            '            options="{}"\n'
+            '            valued="{}"\n'
+            '            positional="{}"\n'
+            "            ;;".format(
+                spec["path"],
+                _words(spec["commands"]),
+                _words(spec["options"]),
+                _words(spec["valued"]),
+                _words(spec["positional"]),
+            )
+        )
+        for (option, values) in spec["valued"].items():
+            if values != [FILE]:
+                value_cases.append(
+                    '        "{} {}") values="{}" ;;'.format(
+                        spec["path"], option, _words(values)
+                    )
+                )
+    preamble = ""
+    if shell == "zsh":
+        preamble = "\nautoload -U +X bashcompinit && bashcompinit\n"
+    return BASH_TEMPLATE.format(
+        shell=shell,
+        preamble=preamble,
+        candidates=CANDIDATES_NAME,
+        specs="\n".join(spec_cases),
+        values="\n".join(value_cases),
+        file=FILE,
+        julia=JULIA,
+        profile=PROFILE,
+    )
+
+
+FISH_PREAMBLE = """\
+# Completion for jlm (generated by `jlm completion fish`).
+
+function __jlm_candidates
+    set -l dir $PWD
+    while test -n "$dir"
+        if test -f "$dir/.jlm/{candidates}"
+            string replace -r -f -- "^$argv[1]\\t" "" < "$dir/.jlm/{candidates}"
+            return
+        end
+        set dir (string replace -r '/[^/]*$' '' -- $dir)
+    end
+end
+
+function __jlm_path_is
+    # Test if the (sub)command words so far are exactly $argv.
+    set -l words (commandline -opc)
+    set -l path
+    for word in $words[2..-1]
+        if contains -- $word $__jlm_commands
+            set path $path $word
+        end
+    end
+    test "$path" = "$argv"
+end
+
+complete -c jlm -e
+"""
+
+
+def _fish_candidates(values: List[str]) -> str:
+    words = []
+    for value in values:
+        if value in (JULIA, PROFILE):
+            words.append("(__jlm_candidates {})".format(value[1:]))
+        else:
+            words.append(value)
+    return "-a {}".format(_quote(" ".join(words)))
+
+
+def _fish_option(option: str) -> str:
+    if option.startswith("--"):
+        return "-l " + option[2:]
+    return "-s " + option[1:]
+
+
+def fish_script(specs: List[Spec]) -> str:
+    names = sorted({name for spec in specs for name in spec["commands"]})
+    lines = [
+        FISH_PREAMBLE.format(candidates=CANDIDATES_NAME),
+        "set -g __jlm_commands {}".format(_words(names)),
+    ]
+    helps = {spec["path"]: spec["help"] for spec in specs}
+    for spec in specs:
+        prefix = "complete -c jlm -n {}".format(
+            _quote("__jlm_path_is " + spec["path"])
+        )
+        for name in spec["commands"]:
+            help = helps["{} {}".format(spec["path"], name).strip()]
+            lines.append("{} -f -a {} -d {}".format(prefix, name, _quote(help)))
+        for option in spec["options"]:
+            values = spec["valued"].get(option)
+            if values is None:
+                lines.append("{} {}".format(prefix, _fish_option(option)))
+            elif values == [FILE]:
+                lines.append("{} {} -r -F".format(prefix, _fish_option(option)))
+            else:
+                lines.append(
+                    "{} {} -x {}".format(
+                        prefix, _fish_option(option), _fish_candidates(values)
+                    )
+                )
+        if spec["positional"] and spec["positional"] != [FILE]:
+            lines.append(
+                "{} -f {}".format(prefix, _fish_candidates(spec["positional"]))
+            )
+    return "\n".join(lines) + "\n"
+
+
+def completion_script(parser: argparse.ArgumentParser, shell: str) -> str:
+    specs = command_specs(parser)
+    if shell == "fish":
+        return fish_script(specs)
+    return bash_script(specs, shell)
@@ -1,26 +1,23 @@
+import copy
 import hashlib
 import json
 import os
-from contextlib import contextmanager
 from pathlib import Path
 from shutil import which
-from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from . import __version__
+from .completion import CANDIDATES_NAME, format_candidates
+from .hostinfo import same_criteria
 from .runtime import JuliaRuntime
-from .utils import ApplicationError, Pathish, _Pathish, absolutepath, pathstr
-
-
-@contextmanager
-def atomicopen(path: _Pathish, *args) -> Iterator[IO]:
-    tmppath = Path("{}.{}.tmp".format(path, os.getpid()))
-    try:
-        with open(pathstr(tmppath), *args) as file:
-            yield file
-        tmppath.rename(path)
-    finally:
-        if tmppath.exists():
-            os.remove(tmppath)
+from .utils import (
+    ApplicationError,
+    Pathish,
+    _Pathish,
+    absolutepath,
+    atomicopen,
+    pathstr,
+)
 
 
 def locate_localstore(path: Path) -> Optional[Path]:
@@ -41,13 +38,52 @@ class BaseStore:
         return self.path / "exec" / m.hexdigest()  # type: ignore
 
 
+def system_store_path() -> Path:
+    return Path(os.environ.get("JLM_SYSTEM_STORE", "/opt/jlm"))
+
+
 class HomeStore(BaseStore):
+    """
+    Per-user store of default system images etc.
+
+    Files are written to `path`.  Stores in `readonly` (e.g., the
+    system-wide store provisioned by ``jlm --system``) are looked up
+    first by `find`.
+    """
 
     # path: Path
+    # readonly: List[Path]
     defaultpath = Path.home() / ".julia" / "jlm"
 
-    def __init__(self, path: _Pathish = defaultpath):
+    def __init__(self, path: _Pathish = defaultpath, readonly: Iterable[_Pathish] = ()):
         self.path = Path(path)
+        self.readonly = [Path(p) for p in readonly if Path(p) != self.path]
+
+    @classmethod
+    def layered(cls, system: bool = False) -> "HomeStore":
+        """
+        The system-wide store (``$JLM_SYSTEM_STORE``) stacked on the
+        per-user store or, if `system` is true, only the former.
+        """
+        if system:
+            return cls(system_store_path())
+        return cls(cls.defaultpath, [system_store_path()])
+
+    @property
+    def paths(self) -> List[Path]:
+        return self.readonly + [self.path]
+
+    def find(self, julia: str, name: str) -> Path:
+        """
+        Return the first existing `name` for `julia` in the stores;
+        fallback to the one in the writable store.
+        """
+        writable = self.execpath(julia) / name
+        for root in self.readonly:
+            path = root / writable.relative_to(self.path)
+            if path.exists():
+                return path
+        return writable
 
 
 class LocalStore(BaseStore):
@@ -106,11 +142,22 @@ class LocalStore(BaseStore):
         path = self.locate_path()
         return path is not None and (path / "data.json").exists()
 
+    # _cache: Tuple[Tuple[int, int, int], Dict[str, Any]]
+
     def loaddata(self) -> Dict[str, Any]:
         if self.exists():
+            # Re-read `data.json` only when it is changed.  This is
+            # useful for long-running process (`jlm serve`).  Since
+            # `data.json` is updated by renaming a temporary file,
+            # checking the inode number is enough in most of the cases.
             datapath = self.path / "data.json"
-            with open(pathstr(datapath)) as file:
-                return json.load(file)  # type: ignore
+            st = os.stat(pathstr(datapath))
+            stamp = (st.st_ino, st.st_size, st.st_mtime_ns)
+            cache = getattr(self, "_cache", None)
+            if cache is None or cache[0] != stamp:
+                with open(pathstr(datapath)) as file:
+                    cache = self._cache = (stamp, json.load(file))
+            return copy.deepcopy(cache[1])  # type: ignore
         return {
             "name": "jlm.LocalStore",
             "jlm_version": __version__,
@@ -120,6 +167,9 @@ class LocalStore(BaseStore):
     def storedata(self, data: Dict[str, Any]):
         with atomicopen(self.path / "data.json", "w") as file:
             json.dump(data, file)
+        # Candidates for the shell completion (see `jlm.completion`):
+        with atomicopen(self.path / CANDIDATES_NAME, "w") as file:
+            file.write(format_candidates(data["config"]))
 
     def set(self, config: Dict[str, Any]):
         data = self.loaddata()
@@ -129,9 +179,15 @@ class LocalStore(BaseStore):
             data["config"]["default"] = config["default"]
         if "runtime" in config:
             data["config"]["runtime"].update(config["runtime"])
+        for (key, value) in config.items():
+            if key not in ("default", "runtime"):
+                data["config"][key] = value
 
         self.storedata(data)
 
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.loaddata()["config"].get(key, default)
+
     def has_default_julia(self) -> bool:
         return "default" in self.loaddata()["config"]
 
@@ -145,24 +201,158 @@ class LocalStore(BaseStore):
 
     def sysimage(self, julia: str) -> Optional[str]:
         runtime = self.loaddata()["config"]["runtime"]
-        try:
-            return runtime[julia]["sysimage"]
-        except KeyError:
-            return None
+        return runtime.get(julia, {}).get("sysimage")
 
     def set_sysimage(self, julia: str, sysimage: _Pathish):
         assert isinstance(julia, str)
         config = self.loaddata()["config"]
-        config["runtime"][julia] = {"sysimage": pathstr(sysimage)}
+        config["runtime"].setdefault(julia, {})["sysimage"] = pathstr(sysimage)
         self.set(config)
 
+    def sysimage_variants(self, julia: str) -> List[Dict[str, Any]]:
+        runtime = self.loaddata()["config"]["runtime"]
+        return runtime.get(julia, {}).get("variants", [])  # type: ignore
+
+    def set_sysimage_variant(self, julia: str, variant: Dict[str, Any]):
+        """
+        Add a system image `variant` (see `jlm.hostinfo`) for `julia`.
+        A variant with the same criteria is replaced.
+        """
+        assert isinstance(julia, str)
+        config = self.loaddata()["config"]
+        runtime = config["runtime"].setdefault(julia, {})
+        variants = [
+            v for v in runtime.get("variants", []) if not same_criteria(v, variant)
+        ]
+        variants.append(variant)
+        runtime["variants"] = variants
+        self.set(config)
+
+    def unset_sysimage_variant(self, julia: str, criteria: Dict[str, Any]):
+        data = self.loaddata()
+        runtime = data["config"]["runtime"].get(julia, {})
+        runtime["variants"] = [
+            v for v in runtime.get("variants", []) if not same_criteria(v, criteria)
+        ]
+        self.storedata(data)
+
     def unset_sysimage(self, julia: str):
         if not isinstance(julia, str):
             raise TypeError("`julia` must be a `str`, got: {!r}".format(julia))
         data = self.loaddata()
-        data["config"]["runtime"].pop(julia, None)
+        runtime = data["config"]["runtime"]
+        entry = runtime.get(julia, {})
+        entry.pop("sysimage", None)
+        entry.pop("variants", None)
+        entry.pop("manifests", None)
+        if not entry:
+            runtime.pop(julia, None)
+        self.storedata(data)
+
+    def manifest_sysimages(self, julia: str) -> Dict[str, str]:
+        """
+        Map from manifest digest to system image (see `jlm.manifests`).
+        """
+        runtime = self.loaddata()["config"]["runtime"]
+        return runtime.get(julia, {}).get("manifests", {})  # type: ignore
+
+    def set_manifest_sysimage(
+        self, julia: str, digest: str, sysimage: _Pathish, keep: int = 8
+    ):
+        """
+        Record `sysimage` built for the manifest `digest`.  Only the
+        last `keep` entries are kept so that the images of old
+        manifests can be removed.
+        """
+        assert isinstance(julia, str)
+        data = self.loaddata()
+        runtime = data["config"]["runtime"].setdefault(julia, {})
+        manifests = runtime.get("manifests", {})
+        manifests.pop(digest, None)
+        manifests[digest] = pathstr(sysimage)
+        runtime["manifests"] = dict(list(manifests.items())[-keep:])
+        self.storedata(data)
+
+    def launch_options(self, julia: str) -> Dict[str, str]:
+        """
+        Launch options for `julia` (see `jlm.launchopts`).
+        """
+        runtime = self.loaddata()["config"]["runtime"]
+        return runtime.get(julia, {}).get("options", {})  # type: ignore
+
+    def set_launch_options(self, julia: str, options: Dict[str, Optional[str]]):
+        """
+        Update launch options for `julia`.  Options set to `None` are removed.
+        """
+        assert isinstance(julia, str)
+        data = self.loaddata()
+        runtime = data["config"]["runtime"]
+        entry = runtime.setdefault(julia, {})
+        current = entry.setdefault("options", {})
+        for (name, value) in options.items():
+            if value is None:
+                current.pop(name, None)
+            else:
+                current[name] = value
+        if not current:
+            del entry["options"]
+        if not entry:
+            del runtime[julia]
+        self.storedata(data)
+
+    def profiles(self) -> Dict[str, Dict[str, Any]]:
+        return self.get("profiles", {})  # type: ignore
+
+    def profile(self, name: str) -> Dict[str, Any]:
+        try:
+            return self.profiles()[name]
+        except KeyError:
+            raise ApplicationError("Profile {} is not defined.".format(name))
+
+    def update_profile(self, name: str, values: Dict[str, Any]):
+        data = self.loaddata()
+        profiles = data["config"].setdefault("profiles", {})
+        profiles.setdefault(name, {}).update(values)
         self.storedata(data)
 
+    def remove_profile(self, name: str, keys: Optional[List[str]] = None):
+        """
+        Remove profile `name` or, if `keys` is given, only these keys.
+        """
+        data = self.loaddata()
+        profiles = data["config"].get("profiles", {})
+        if name not in profiles:
+            raise ApplicationError("Profile {} is not defined.".format(name))
+        if keys is None:
+            del profiles[name]
+        else:
+            for key in keys:
+                profiles[name].pop(key, None)
+        self.storedata(data)
+
+    def referenced_sysimages(self) -> List[str]:
+        """
+        All system images registered in `data.json`.
+        """
+        found = []  # type: List[str]
+
+        def collect(obj):
+            if isinstance(obj, dict):
+                for (key, value) in obj.items():
+                    if key == "sysimage" and isinstance(value, str):
+                        found.append(value)
+                    elif key == "manifests" and isinstance(value, dict):
+                        found.extend(value.values())
+                    else:
+                        collect(value)
+            elif isinstance(obj, list):
+                for value in obj:
+                    collect(value)
+
+        if self.exists():
+            collect(self.loaddata()["config"])
+        return found
+
     def available_runtimes(self) -> Tuple[JuliaRuntime, List[JuliaRuntime]]:
         config = self.loaddata()["config"]
         try:
@@ -174,6 +364,6 @@ class LocalStore(BaseStore):
         others = []
         for (julia, runtime) in config["runtime"].items():
             if julia != default.executable:
-                others.append(JuliaRuntime(julia, runtime["sysimage"]))
+                others.append(JuliaRuntime(julia, runtime.get("sysimage")))
 
         return default, others
@@ -0,0 +1,82 @@
+"""
+Layered depots: a per-project writable depot on top of shared ones.
+
+When enabled by ``jlm set-depots``, ``data.json`` has::
+
+    "depots": {"writable": "/path/to/.jlm/depot", "shared": [...]}
+
+and ``jlm run`` sets ``$JULIA_DEPOT_PATH`` to the writable depot,
+followed by the shared depots and then the depots Julia would use by
+default.  Shared depots can also be declared for all projects by the
+system configuration file (``$JLM_SYSTEM_CONFIG``; default to
+``/etc/jlm/config.json``)::
+
+    {"shared_depots": ["/opt/julia-depot"]}
+
+Shared depots are only read by Julia.  They are populated by ``jlm
+publish-caches``.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from .utils import _Pathish, pathstr
+
+
+def system_config_path() -> Path:
+    return Path(os.environ.get("JLM_SYSTEM_CONFIG", "/etc/jlm/config.json"))
+
+
+def load_system_config() -> Dict[str, Any]:
+    try:
+        with open(pathstr(system_config_path())) as file:
+            return json.load(file)  # type: ignore
+    except FileNotFoundError:
+        return {}
+
+
+def stack_depots(*layers: Iterable[str]) -> List[str]:
+    """
+    Concatenate depot paths removing duplicates.
+
+    >>> stack_depots(["/a"], ["/b", "/c"], ["/a", "/d"])
+    ['/a', '/b', '/c', '/d']
+    """
+    stacked = []  # type: List[str]
+    for layer in layers:
+        for depot in layer:
+            if depot and depot not in stacked:
+                stacked.append(depot)
+    return stacked
+
+
+def publish_file(src: _Pathish, dest: _Pathish) -> bool:
+    """
+    Copy `src` to `dest` atomically unless it is already there.
+
+    The published file is made readable by everyone.  Return `True` if
+    the file is copied.
+    """
+    src = Path(src)
+    dest = Path(dest)
+    st = src.stat()
+    try:
+        dst = dest.stat()
+    except FileNotFoundError:
+        pass
+    else:
+        if (dst.st_size, int(dst.st_mtime)) == (st.st_size, int(st.st_mtime)):
+            return False
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmppath = Path("{}.{}.tmp".format(dest, os.getpid()))
+    try:
+        shutil.copy2(pathstr(src), pathstr(tmppath))
+        os.chmod(pathstr(tmppath), 0o644)
+        tmppath.rename(dest)
+    finally:
+        if tmppath.exists():
+            os.remove(pathstr(tmppath))
+    return True
@@ -0,0 +1,269 @@
+"""
+Diagnosis of common launch-performance problems (``jlm doctor``).
+
+Each check returns a list of `Finding`.  A finding records the
+measured (or estimated) cost in seconds where it makes sense and the
+command that fixes the problem.  `rank` sorts the findings so that the
+most harmful ones come first.
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from shutil import which
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from . import archive
+from .buildinfo import identity_mismatch
+from .caches import compiled_dir
+from .utils import _Pathish, pathstr
+from .watch import input_stamps, is_outdated
+
+SEVERITIES = ("error", "warning", "info")
+
+# File system types for which each access may take a network round trip:
+SLOW_FILESYSTEMS = {
+    "9p",
+    "afs",
+    "ceph",
+    "cifs",
+    "fuse.sshfs",
+    "glusterfs",
+    "gpfs",
+    "lustre",
+    "nfs",
+    "nfs4",
+    "smb3",
+    "smbfs",
+}
+
+# Thresholds for reporting:
+SLOW_READ = 0.005  # seconds to read data.json
+MAX_SLUGS = 8  # cache files per package
+MAX_PATH_ENTRIES = 40
+
+
+class Finding:
+    # check: str
+    # severity: str
+    # message: str
+    # fix: Optional[str]
+    # cost: Optional[float]
+
+    def __init__(
+        self,
+        check: str,
+        severity: str,
+        message: str,
+        fix: Optional[str] = None,
+        cost: Optional[float] = None,
+    ):
+        assert severity in SEVERITIES
+        self.check = check
+        self.severity = severity
+        self.message = message
+        self.fix = fix
+        self.cost = cost
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "check": self.check,
+            "severity": self.severity,
+            "message": self.message,
+            "fix": self.fix,
+            "cost": self.cost,
+        }
+
+    def summary(self) -> str:
+        lines = ["[{}] {}: {}".format(self.severity, self.check, self.message)]
+        if self.cost is not None:
+            lines.append("    cost: {:.1f} ms".format(self.cost * 1000))
+        if self.fix:
+            lines.append("    fix:  {}".format(self.fix))
+        return "\n".join(lines)
+
+
+def rank(findings: List[Finding]) -> List[Finding]:
+    """
+    Sort `findings` by severity and then by cost.
+
+    >>> [f.check for f in rank([
+    ...     Finding("a", "warning", "", cost=0.1),
+    ...     Finding("b", "error", ""),
+    ...     Finding("c", "warning", "", cost=0.3),
+    ... ])]
+    ['b', 'c', 'a']
+    """
+    return sorted(
+        findings, key=lambda f: (SEVERITIES.index(f.severity), -(f.cost or 0.0))
+    )
+
+
+def measure(f: Callable[[], Any], repeat: int = 5) -> float:
+    """ Median of the wall-clock time of `repeat` calls to `f`. """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2]
+
+
+def check_sysimage(sysimage: _Pathish, fix: str) -> List[Finding]:
+    if Path(sysimage).exists():
+        return []
+    if archive.is_archived(sysimage):
+        return [
+            Finding(
+                "archived-sysimage",
+                "info",
+                "System image {} is archived; it is decompressed at the next"
+                " launch.".format(sysimage),
+            )
+        ]
+    return [
+        Finding(
+            "missing-sysimage",
+            "error",
+            "System image {} does not exist.".format(sysimage),
+            fix=fix,
+        )
+    ]
+
+
+def check_executable(
+    julia: str, buildinfo: Optional[Dict[str, Any]], fix: str
+) -> List[Finding]:
+    problem = identity_mismatch(buildinfo, julia)
+    if problem is None:
+        return []
+    return [Finding("julia-changed", "error", problem, fix=fix)]
+
+
+def check_stale(buildinfo: Optional[Dict[str, Any]], fix: str) -> List[Finding]:
+    if not buildinfo or "inputs" not in buildinfo:
+        return []
+    inputs = buildinfo["inputs"]
+    stamps = input_stamps([Path(p) for p in inputs])
+    if not is_outdated(buildinfo, stamps):
+        return []
+    changed = sorted(p for p in inputs if inputs[p] != stamps[p])
+    return [
+        Finding(
+            "stale-sysimage",
+            "warning",
+            "System image is older than {}.".format(", ".join(changed)),
+            fix=fix,
+        )
+    ]
+
+
+def parse_mounts(text: str) -> List[Tuple[str, str]]:
+    """
+    Parse ``/proc/mounts`` into a list of ``(mount_point, fstype)``.
+
+    >>> parse_mounts("server:/home /home nfs4 rw 0 0\\n/dev/sda1 / ext4 rw 0 0\\n")
+    [('/home', 'nfs4'), ('/', 'ext4')]
+    """
+    mounts = []
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 3:
+            mounts.append((parts[1].replace("\\040", " "), parts[2]))
+    return mounts
+
+
+def filesystem_type(path: _Pathish) -> Optional[str]:
+    try:
+        with open("/proc/mounts") as file:
+            mounts = parse_mounts(file.read())
+    except OSError:
+        return None
+    path = os.path.realpath(pathstr(path))
+    best = None  # type: Optional[Tuple[str, str]]
+    for (mount_point, fstype) in mounts:
+        prefix = mount_point.rstrip("/") + "/"
+        if (path + "/").startswith(prefix):
+            if best is None or len(mount_point) >= len(best[0]):
+                best = (mount_point, fstype)
+    return best[1] if best else None
+
+
+def check_datastore(jlm_dir: _Pathish) -> List[Finding]:
+    datapath = Path(jlm_dir) / "data.json"
+
+    def read():
+        os.stat(pathstr(datapath))
+        with open(pathstr(datapath)) as file:
+            json.load(file)
+
+    cost = measure(read)
+    fstype = filesystem_type(datapath)
+    if fstype not in SLOW_FILESYSTEMS and cost < SLOW_READ:
+        return []
+    return [
+        Finding(
+            "slow-datastore",
+            "warning",
+            "{} is on a slow file system ({}); it is read at every launch.".format(
+                datapath, fstype or "unknown"
+            ),
+            fix="jlm serve  # and query it instead of running `jlm` each time",
+            cost=cost,
+        )
+    ]
+
+
+def check_slug_churn(depot: _Pathish, version: str) -> List[Finding]:
+    compiled = compiled_dir(depot, version)
+    try:
+        packages = sorted(p for p in compiled.iterdir() if p.is_dir())
+    except OSError:
+        return []
+    churned = []
+    for directory in packages:
+        count = sum(1 for p in directory.iterdir() if p.suffix == ".ji")
+        if count > MAX_SLUGS:
+            churned.append((directory, count))
+    if not churned:
+        return []
+    cost = measure(lambda: [os.listdir(pathstr(d)) for (d, _) in churned])
+    worst = ", ".join(
+        "{} ({})".format(d.name, n) for (d, n) in sorted(churned, key=lambda x: -x[1])
+    )
+    return [
+        Finding(
+            "slug-churn",
+            "warning",
+            "Packages with many precompilation caches in {}: {}".format(
+                compiled, worst
+            ),
+            fix="jlm set-depots  # isolate caches of this project",
+            cost=cost,
+        )
+    ]
+
+
+def check_path(path_env: str) -> List[Finding]:
+    entries = path_env.split(os.pathsep)
+    kept = []  # type: List[str]
+    for entry in entries:
+        if entry and entry not in kept and os.path.isdir(entry):
+            kept.append(entry)
+    if len(entries) <= MAX_PATH_ENTRIES and len(kept) == len(entries):
+        return []
+    # Cost of a failed command lookup, which scans all entries:
+    cost = measure(lambda: which("jlm-doctor-nonexistent", path=path_env))
+    return [
+        Finding(
+            "huge-path",
+            "warning" if len(entries) > MAX_PATH_ENTRIES else "info",
+            "$PATH has {} entries ({} duplicated or missing).".format(
+                len(entries), len(entries) - len(kept)
+            ),
+            fix="export PATH={}".format(os.pathsep.join(kept)),
+            cost=cost,
+        )
+    ]
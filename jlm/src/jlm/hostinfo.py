@@ -0,0 +1,122 @@
+"""
+Properties of the current host used for choosing system image variants.
+
+A variant is a dictionary stored in ``config.runtime[julia].variants``
+of ``data.json``::
+
+    {
+        "sysimage": "/path/to/sys-skylake.so",
+        "hostname": "gpu-node-*",
+        "cpu": "*Xeon*Gold*",
+        "cpu_flags": ["avx512f", "avx512bw"]
+    }
+
+All keys except `sysimage` are optional.  `hostname` and `cpu` are
+glob patterns matched against the host name and the "model name" in
+``/proc/cpuinfo``, respectively.  `cpu_flags` must all be in "flags"
+of ``/proc/cpuinfo``.
+"""
+
+import socket
+from fnmatch import fnmatchcase
+from typing import Any, Dict, FrozenSet, Iterable, Optional, Tuple
+
+CRITERIA = ("hostname", "cpu", "cpu_flags")
+
+
+class HostInfo:
+    # hostname: str
+    # cpu: str
+    # cpu_flags: FrozenSet[str]
+
+    def __init__(self, hostname: str, cpu: str, cpu_flags: Iterable[str]):
+        self.hostname = hostname
+        self.cpu = cpu
+        self.cpu_flags = frozenset(cpu_flags)  # type: FrozenSet[str]
+
+
+def parse_cpuinfo(lines: Iterable[str]) -> Tuple[str, FrozenSet[str]]:
+    """
+    Parse model name and flags of the first processor in ``/proc/cpuinfo``.
+
+    >>> model, flags = parse_cpuinfo('''
+    ... processor	: 0
+    ... model name	: Intel(R) Xeon(R) Gold 6148 CPU @ 2.40GHz
+    ... flags		: fpu sse2 avx2 avx512f
+    ...
+    ... processor	: 1
+    ... '''.lstrip().splitlines())
+    >>> model
+    'Intel(R) Xeon(R) Gold 6148 CPU @ 2.40GHz'
+    >>> sorted(flags)
+    ['avx2', 'avx512f', 'fpu', 'sse2']
+    """
+    model = ""
+    flags = frozenset()  # type: FrozenSet[str]
+    for line in lines:
+        if not line.strip():
+            break  # only the first processor is needed
+        key, _, value = line.partition(":")
+        key = key.strip()
+        if key == "model name":
+            model = value.strip()
+        elif key in ("flags", "Features"):
+            flags = frozenset(value.split())
+    return model, flags
+
+
+_current = None  # type: Optional[HostInfo]
+
+
+def current_host(cpuinfo: str = "/proc/cpuinfo") -> HostInfo:
+    """
+    Information about the current host.  It is computed only once per
+    process.
+    """
+    global _current
+    if _current is None:
+        try:
+            with open(cpuinfo) as file:
+                model, flags = parse_cpuinfo(file)
+        except OSError:
+            model, flags = "", frozenset()
+        _current = HostInfo(socket.gethostname(), model, flags)
+    return _current
+
+
+def variant_score(
+    variant: Dict[str, Any], host: HostInfo
+) -> Optional[Tuple[int, int]]:
+    """
+    Return how specifically `variant` matches `host`, or `None` if it
+    does not match.
+    """
+    hostname = variant.get("hostname")
+    if hostname is not None and not fnmatchcase(host.hostname, hostname):
+        return None
+    if "cpu" in variant and not fnmatchcase(host.cpu, variant["cpu"]):
+        return None
+    flags = frozenset(variant.get("cpu_flags", ()))
+    if not flags <= host.cpu_flags:
+        return None
+    return (sum(1 for key in CRITERIA if key in variant), len(flags))
+
+
+def select_variant(
+    variants: Iterable[Dict[str, Any]], host: HostInfo
+) -> Optional[Dict[str, Any]]:
+    """
+    Choose the variant most specifically matching `host`.  The first
+    one is used if there are multiple such variants.
+    """
+    best = None
+    best_score = None
+    for variant in variants:
+        score = variant_score(variant, host)
+        if score is not None and (best_score is None or score > best_score):
+            best, best_score = variant, score
+    return best
+
+
+def same_criteria(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    return all(a.get(key) == b.get(key) for key in CRITERIA)
@@ -0,0 +1,98 @@
+"""
+Per-runtime Julia launch options (``jlm set-options``).
+
+They are stored in ``data.json`` as ``runtime[julia]["options"]``;
+e.g., ``{"threads": "auto", "heap_size_hint": "auto", "optimize": "2"}``.
+The value ``auto`` is resolved at each launch: ``threads`` and
+``heap_size_hint`` are computed from the cgroup limits and the CPU
+affinity of the process (see `jlm.cgroups`).  For the other options,
+``auto`` means Julia's default.
+"""
+
+from typing import Callable, Dict, Optional
+
+from .cgroups import Limits
+from .utils import Cmd
+
+# name -> (flag template, minimum Julia version)
+OPTIONS = {
+    "threads": ("--threads={}", (1, 5)),
+    "heap_size_hint": ("--heap-size-hint={}", (1, 9)),
+    "optimize": ("-O{}", None),
+    "compiled_modules": ("--compiled-modules={}", None),
+}
+
+
+def _version_tuple(version: str):
+    return tuple(int(x) for x in version.split("-")[0].split(".")[:2])
+
+
+def supported(name: str, version: Optional[str]) -> bool:
+    """
+    Check if option `name` is supported by Julia `version` (`None` if
+    unknown).
+
+    >>> supported("threads", "1.6.0"), supported("threads", "1.0.5")
+    (True, False)
+    >>> supported("optimize", None), supported("threads", None)
+    (True, False)
+    """
+    minversion = OPTIONS[name][1]
+    return not minversion or bool(version and _version_tuple(version) >= minversion)
+
+
+def needs_version(options: Dict[str, str]) -> bool:
+    """
+    Check if resolving `options` requires the Julia version.
+    """
+    return any(OPTIONS[name][1] for name in options if name in OPTIONS)
+
+
+def auto_value(name: str, limits: Limits) -> Optional[str]:
+    if name == "threads":
+        return str(limits.threads)
+    elif name == "heap_size_hint":
+        return limits.heap_size_hint()
+    return None
+
+
+def resolve_options(
+    options: Dict[str, str],
+    version: Optional[str] = None,
+    detect: Callable[[], Limits] = Limits.detect,
+) -> Cmd:
+    """
+    Julia command line options for `options`.
+
+    Options not supported by Julia `version` are dropped.  If the
+    version is unknown, the options requiring a minimum version are
+    dropped as well since Julia refuses to start with unknown options.
+
+    >>> limits = Limits(cpus=2.0, memory=2 ** 30, affinity=16)
+    >>> resolve_options(
+    ...     {"threads": "auto", "heap_size_hint": "auto", "optimize": "1"},
+    ...     version="1.9.0",
+    ...     detect=lambda: limits,
+    ... )
+    ['--threads=2', '--heap-size-hint=768M', '-O1']
+    >>> resolve_options({"heap_size_hint": "1G"}, version="1.6.7")
+    []
+    >>> resolve_options({"threads": "4", "optimize": "1"}, version="1.0.5")
+    ['-O1']
+    >>> resolve_options({"threads": "4", "optimize": "1"})
+    ['-O1']
+    """
+    cmd = []  # type: Cmd
+    limits = None  # type: Optional[Limits]
+    for (name, (template, _)) in OPTIONS.items():
+        value = options.get(name)
+        if value is None or not supported(name, version):
+            continue
+        if value == "auto":
+            if limits is None:
+                limits = detect()
+            value = auto_value(name, limits)
+            if value is None:
+                continue
+        cmd.append(template.format(value))
+    return cmd
@@ -0,0 +1,172 @@
+"""
+Package closure of a project for lean system images
+(``jlm compile-sysimage --lean``).
+
+A lean system image includes only the packages reachable from the
+dependencies of the project (according to ``Manifest.toml``) and,
+in particular, only the standard libraries in this closure.  The
+standard libraries referred in the precompile statements (see
+`jlm.traces`) but not in the closure are reported since they cannot
+be included without adding them to the project.
+
+As in `jlm.caches`, only the subset of TOML written by Pkg.jl is
+supported.
+"""
+
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Set
+
+from .manifests import manifest_path
+from .utils import ApplicationError, _Pathish, pathstr
+
+Manifest = Dict[str, Dict[str, Any]]
+
+_header = re.compile(r"^\[\[?(.+?)\]\]?\s*$")
+_keyvalue = re.compile(r'^("?)([^"=\s]+)\1\s*=\s*(.+?)\s*$')
+_quoted = re.compile(r'"([^"]*)"')
+
+# Names in precompile statements which are not standard libraries:
+_builtin_modules = {"Base", "Core", "Main"}
+
+
+def _read_tables(path: _Pathish) -> Iterable[List[Any]]:
+    """
+    Yield ``[header, is_array, {key: raw_value}]`` for each table.
+    """
+    table = ["", False, {}]  # type: List[Any]
+    with open(pathstr(path)) as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            m = _header.match(line)
+            if m:
+                yield table
+                table = [m.group(1).replace('"', ""), line.startswith("[["), {}]
+                continue
+            m = _keyvalue.match(line)
+            if m:
+                table[2][m.group(2)] = m.group(3)
+    yield table
+
+
+def read_project_deps(path: _Pathish) -> List[str]:
+    """
+    Names of the dependencies in ``Project.toml``.
+    """
+    for (header, _, values) in _read_tables(path):
+        if header == "deps":
+            return sorted(values)
+    return []
+
+
+def read_manifest(path: _Pathish) -> Manifest:
+    """
+    Read ``Manifest.toml`` into a map from package name to
+    ``{"deps": [...], "stdlib": bool}``.
+
+    Standard libraries are the entries without ``git-tree-sha1`` (and
+    without ``path`` or ``repo-url`` for developed packages).
+    """
+    manifest = {}  # type: Manifest
+    current = None  # type: Any
+    for (header, is_array, values) in _read_tables(path):
+        name = header[len("deps.") :] if header.startswith("deps.") else header
+        if is_array:
+            current = manifest[name] = {
+                "deps": _quoted.findall(values.get("deps", "")),
+                "stdlib": not (
+                    {"git-tree-sha1", "path", "repo-url"} & set(values)
+                ),
+            }
+        elif name.endswith(".deps") and current is not None:
+            # `[deps.NAME.deps]` table form used for ambiguous names:
+            current["deps"] = sorted(values)
+    return manifest
+
+
+def closure(roots: Iterable[str], manifest: Manifest) -> List[str]:
+    """
+    Packages reachable from `roots`.
+
+    >>> manifest = {
+    ...     "A": {"deps": ["B", "Dates"], "stdlib": False},
+    ...     "B": {"deps": [], "stdlib": False},
+    ...     "Dates": {"deps": ["Printf"], "stdlib": True},
+    ...     "Printf": {"deps": [], "stdlib": True},
+    ...     "Unused": {"deps": ["LinearAlgebra"], "stdlib": False},
+    ... }
+    >>> closure(["A"], manifest)
+    ['A', 'B', 'Dates', 'Printf']
+    """
+    seen = set()  # type: Set[str]
+    stack = list(roots)
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        stack.extend(manifest.get(name, {}).get("deps", []))
+    return sorted(seen)
+
+
+def stdlib_dir(julia: _Pathish, version: str) -> Path:
+    """
+    Directory of the standard libraries shipped with `julia`.
+    """
+    major, minor = version.split(".")[:2]
+    prefix = Path(pathstr(julia)).resolve().parent.parent
+    return prefix / "share" / "julia" / "stdlib" / "v{}.{}".format(major, minor)
+
+
+def traced_modules(statements: Iterable[str], candidates: Iterable[str]) -> List[str]:
+    """
+    Modules in `candidates` referred in precompile `statements`.
+
+    >>> traced_modules(
+    ...     ["precompile(Tuple{typeof(Dates.now)})",
+    ...      "precompile(Tuple{typeof(Base.sum), Vector{Int}})"],
+    ...     ["Dates", "REPL", "Base"],
+    ... )
+    ['Dates']
+    """
+    names = set(candidates) - _builtin_modules
+    found = set()  # type: Set[str]
+    for statement in statements:
+        for m in re.finditer(r"\b(\w+)\.", statement):
+            if m.group(1) in names:
+                found.add(m.group(1))
+    return sorted(found)
+
+
+def lean_closure(
+    project: _Pathish, stdlibs: Iterable[str] = (), statements: Iterable[str] = ()
+) -> Dict[str, List[str]]:
+    """
+    Closure of the project at `project` (a path to ``Project.toml``).
+
+    `stdlibs` are the names of all standard libraries, used for
+    detecting the ones referred in precompile `statements`.
+    """
+    project = Path(project)
+    roots = read_project_deps(project)
+    path = manifest_path(project.parent)
+    if path is None:
+        # Without the manifest, the closure would silently shrink to `roots`:
+        raise ApplicationError(
+            "No manifest is found for {}.  Run `Pkg.instantiate()` first.".format(
+                project
+            )
+        )
+    manifest = read_manifest(path)
+    included = closure(roots, manifest)
+    stdlibs = set(stdlibs) | {n for (n, e) in manifest.items() if e["stdlib"]}
+    return {
+        "roots": roots,
+        "packages": [n for n in included if n not in stdlibs],
+        "stdlibs": [n for n in included if n in stdlibs],
+        "missing_stdlibs": [
+            n for n in traced_modules(statements, stdlibs) if n not in included
+        ],
+    }
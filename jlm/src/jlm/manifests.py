@@ -0,0 +1,75 @@
+"""
+Selecting system images by the digest of ``Manifest.toml``.
+
+Each system image built by ``jlm compile-sysimage`` (or ``jlm watch``)
+is recorded in ``data.json`` under the SHA-256 digest of the
+project's manifest at the time of the build::
+
+    "runtime": {
+        "/usr/bin/julia": {
+            "sysimage": "/project/.jlm/sysimages/3/sys.so",
+            "manifests": {"9f86d0...": "/project/.jlm/sysimages/3/sys.so",
+                          "2c26b4...": "/project/.jlm/sysimages/2/sys.so"}
+        }
+    }
+
+so that switching back to a previously built branch picks its image
+again.  The digest is cached in ``.jlm/manifest-digest.json`` keyed
+by the ``stat`` of the manifest so that it is not re-computed at every
+launch.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from .utils import _Pathish, atomicopen, file_digest, pathstr
+
+CACHE_NAME = "manifest-digest.json"
+
+# Julia prefers `JuliaManifest.toml` if it exists:
+MANIFEST_NAMES = ("JuliaManifest.toml", "Manifest.toml")
+
+
+def manifest_path(base: _Pathish) -> Optional[Path]:
+    for name in MANIFEST_NAMES:
+        path = Path(base) / name
+        if path.exists():
+            return path
+    return None
+
+
+def _stamp(path: Path):
+    st = os.stat(pathstr(path))
+    return [st.st_ino, st.st_size, st.st_mtime_ns]
+
+
+def manifest_digest(jlm_dir: _Pathish) -> Optional[str]:
+    """
+    Digest of the manifest of the project of `jlm_dir` or `None` if
+    there is no manifest.
+    """
+    jlm_dir = Path(jlm_dir)
+    path = manifest_path(jlm_dir.parent)
+    if path is None:
+        return None
+    cache = jlm_dir / CACHE_NAME
+    try:
+        stamp = _stamp(path)
+    except FileNotFoundError:
+        return None
+    try:
+        with open(pathstr(cache)) as file:
+            cached = json.load(file)
+        if cached["path"] == pathstr(path) and cached["stat"] == stamp:
+            return cached["digest"]  # type: ignore
+    except (OSError, ValueError, KeyError):
+        pass
+    digest = file_digest(path)
+    try:
+        with atomicopen(cache, "w") as file:
+            json.dump({"path": pathstr(path), "stat": stamp, "digest": digest}, file)
+    except OSError:  # e.g., read-only `.jlm`
+        pass
+    return digest
@@ -0,0 +1,180 @@
+"""
+Cache of information about Julia executables.
+
+Querying Julia executable (e.g., its version) requires launching it
+which takes a second or two.  To avoid this, the information is
+collected once per Julia executable and stored in
+``HomeStore.execpath(julia) / "metadata.json"``.  The cache is
+invalidated when the size or mtime of the executable is changed.
+Since ``Sys.CPU_NAME`` depends on the machine, it is recorded per host
+name.
+"""
+
+import json
+import os
+import socket
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from .buildinfo import executable_identity
+from .utils import ApplicationError, atomicopen, pathstr
+
+if TYPE_CHECKING:
+    from .datastore import BaseStore
+
+METADATA_NAME = "metadata.json"
+
+# Print information one item per line.  `DEPOT_PATH` must be the last
+# since it can have arbitrary number of items.
+script = """
+println(VERSION)
+println(Base.GIT_VERSION_INFO.commit)
+println(Sys.ARCH)
+println(Sys.CPU_NAME)
+println(unsafe_string(Base.JLOptions().image_file))
+foreach(println, DEPOT_PATH)
+"""
+
+
+def parse_output(output: str) -> Dict[str, Any]:
+    """
+    Parse the output of `script`.
+
+    >>> info = parse_output('''
+    ... 1.1.0
+    ... 80516ca202
+    ... x86_64
+    ... skylake
+    ... /opt/julia/lib/julia/sys.so
+    ... /home/user/.julia
+    ... /opt/julia/local/share/julia
+    ... '''.lstrip())
+    >>> info["version"]
+    '1.1.0'
+    >>> info["depot_path"]
+    ['/home/user/.julia', '/opt/julia/local/share/julia']
+    """
+    lines = output.splitlines()
+    if len(lines) < 5:
+        raise ValueError("Unexpected output:\n{}".format(output))
+    version, commit, arch, cpu_name, sysimage = lines[:5]
+    return {
+        "version": version,
+        "commit": commit,
+        "arch": arch,
+        "cpu_name": {socket.gethostname(): cpu_name},
+        "sysimage": sysimage,
+        "depot_path": lines[5:],
+    }
+
+
+def collect_metadata(julia: str) -> Dict[str, Any]:
+    """
+    Launch `julia` and collect information about it.
+    """
+    try:
+        output = subprocess.check_output(
+            [julia, "--startup-file=no", "--history-file=no", "-e", script],
+            universal_newlines=True,
+        )
+    except (OSError, subprocess.CalledProcessError) as err:
+        raise ApplicationError(
+            "Failed to query Julia executable {}:\n{}".format(julia, err)
+        )
+    metadata = parse_output(output)
+    metadata["stat"] = executable_identity(julia)
+    # `DEPOT_PATH` depends on it:
+    metadata["depot_env"] = os.environ.get("JULIA_DEPOT_PATH")
+    return metadata
+
+
+def try_collect_metadata(julia: str) -> Optional[Dict[str, Any]]:
+    try:
+        return collect_metadata(julia)
+    except ApplicationError:
+        return None
+
+
+class MetadataCache:
+    # store: BaseStore
+
+    def __init__(self, store: "BaseStore"):
+        self.store = store
+
+    def path(self, julia: str) -> Path:
+        return self.store.execpath(julia) / METADATA_NAME
+
+    def load(self, julia: str) -> Optional[Dict[str, Any]]:
+        """
+        Load cached metadata of `julia` if it is not stale.
+
+        The metadata may be collected on another host sharing the home
+        store; use `get_many(..., cpu_name=True)` to make sure that the
+        CPU name of the current host is recorded.
+        """
+        try:
+            with open(pathstr(self.path(julia))) as file:
+                metadata = json.load(file)
+            if metadata["stat"] != executable_identity(julia):
+                return None
+            if metadata.get("depot_env") != os.environ.get("JULIA_DEPOT_PATH"):
+                return None
+        except (OSError, ValueError, KeyError):
+            return None
+        return metadata  # type: ignore
+
+    def store_metadata(self, julia: str, metadata: Dict[str, Any]) -> None:
+        path = self.path(julia)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(pathstr(path)) as file:
+                old = json.load(file)
+            if old.get("stat") == metadata["stat"]:
+                # Keep CPU names recorded in the other hosts:
+                cpu_name = dict(old["cpu_name"])
+                cpu_name.update(metadata["cpu_name"])
+                metadata["cpu_name"] = cpu_name
+        except (OSError, ValueError, KeyError):
+            pass
+        with atomicopen(path, "w") as file:
+            json.dump(metadata, file, indent=1, sort_keys=True)
+
+    def get(self, julia: str) -> Dict[str, Any]:
+        metadata = self.load(julia)
+        if metadata is None:
+            metadata = collect_metadata(julia)
+            self.store_metadata(julia, metadata)
+        return metadata
+
+    def get_many(
+        self, julias: Iterable[str], cpu_name: bool = False
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Get metadata for all `julias`.  Missing ones are collected in
+        parallel.  Julia executables that cannot be queried are omitted
+        from the result.  If `cpu_name` is true, metadata without the
+        CPU name of the current host is collected again.
+        """
+        result = {}
+        missing = []  # type: List[str]
+        for julia in julias:
+            metadata = self.load(julia)
+            if metadata is None or (cpu_name and current_cpu_name(metadata) is None):
+                missing.append(julia)
+            else:
+                result[julia] = metadata
+        if missing:
+            workers = min(len(missing), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                collected = list(executor.map(try_collect_metadata, missing))
+            for julia, metadata in zip(missing, collected):
+                if metadata is not None:
+                    self.store_metadata(julia, metadata)
+                    result[julia] = metadata
+        return result
+
+
+def current_cpu_name(metadata: Dict[str, Any]) -> Optional[str]:
+    return metadata.get("cpu_name", {}).get(socket.gethostname())
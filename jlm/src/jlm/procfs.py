@@ -0,0 +1,176 @@
+"""
+Helpers for inspecting running processes via ``/proc`` (Linux only).
+
+Processes of other users are usually not readable; they are silently
+skipped.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .utils import _Pathish, pathstr
+
+PROC = Path("/proc")
+
+# (major, minor, inode) of a file
+FileId = Tuple[int, int, int]
+
+# Memory usage (in bytes) by the fields of `/proc/PID/smaps`
+Usage = Dict[str, int]
+
+_smaps_header = re.compile(r"^[0-9a-f]+-[0-9a-f]+ ")
+_smaps_field = re.compile(r"^(\w+):\s+(\d+) kB$")
+
+
+def pids() -> Iterator[int]:
+    try:
+        names = os.listdir(pathstr(PROC))
+    except OSError:
+        return
+    for name in names:
+        if name.isdigit():
+            yield int(name)
+
+
+def parse_maps_line(line: str) -> Tuple[FileId, str]:
+    """
+    Parse a line of ``/proc/PID/maps``.
+
+    >>> parse_maps_line(
+    ...     "7f0e1c000000-7f0e1c021000 r--p 00000000 fd:01 1835110"
+    ...     "                    /opt/julia/lib/julia/sys.so"
+    ... )
+    ((253, 1, 1835110), '/opt/julia/lib/julia/sys.so')
+    """
+    parts = line.split(None, 5)
+    major, minor = parts[3].split(":")
+    path = parts[5].strip() if len(parts) > 5 else ""
+    return (int(major, 16), int(minor, 16), int(parts[4])), path
+
+
+def mapped_files(pid: int) -> Set[FileId]:
+    result = set()
+    try:
+        with open(pathstr(PROC / str(pid) / "maps")) as file:
+            for line in file:
+                fileid, _ = parse_maps_line(line)
+                if fileid[2] != 0:
+                    result.add(fileid)
+    except (OSError, ValueError, IndexError):
+        pass
+    return result
+
+
+def all_mapped_files() -> Set[FileId]:
+    result = set()  # type: Set[FileId]
+    for pid in pids():
+        result.update(mapped_files(pid))
+    return result
+
+
+def fileid(path: _Pathish) -> FileId:
+    st = os.stat(pathstr(path))
+    return (os.major(st.st_dev), os.minor(st.st_dev), st.st_ino)
+
+
+def mapped_paths(paths: Iterable[_Pathish]) -> List[_Pathish]:
+    """
+    Return the subset of `paths` mapped by any (readable) processes.
+    """
+    paths = list(paths)
+    if not paths:
+        return []
+    mapped = all_mapped_files()
+    result = []
+    for path in paths:
+        try:
+            if fileid(path) in mapped:
+                result.append(path)
+        except OSError:
+            pass
+    return result
+
+
+def _read_nul_separated(path: Path) -> Optional[List[str]]:
+    try:
+        with open(pathstr(path), "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
+    return [x.decode("utf-8", "replace") for x in data.split(b"\0") if x]
+
+
+def read_environ(pid: int) -> Optional[Dict[str, str]]:
+    items = _read_nul_separated(PROC / str(pid) / "environ")
+    if items is None:
+        return None
+    return dict(item.partition("=")[::2] for item in items)
+
+
+def read_cmdline(pid: int) -> Optional[List[str]]:
+    return _read_nul_separated(PROC / str(pid) / "cmdline")
+
+
+def parse_smaps(lines: Iterable[str]) -> Dict[str, Usage]:
+    """
+    Parse ``/proc/PID/smaps`` (or ``smaps_rollup``) into the memory
+    usage summed over the mappings of each path.  Anonymous mappings
+    are summed with the key ``""``.
+
+    >>> usage = parse_smaps([
+    ...     "7f0e1c000000-7f0e1c021000 r--p 00000000 fd:01 1835110    /sys.so",
+    ...     "Rss:                 132 kB",
+    ...     "Shared_Clean:        128 kB",
+    ...     "VmFlags: rd mr mw me",
+    ...     "7f0e1c021000-7f0e1c022000 r-xp 00021000 fd:01 1835110    /sys.so",
+    ...     "Rss:                   4 kB",
+    ... ])
+    >>> usage["/sys.so"]["Rss"], usage["/sys.so"]["Shared_Clean"]
+    (139264, 131072)
+    """
+    usage = {}  # type: Dict[str, Usage]
+    current = None  # type: Optional[Usage]
+    for line in lines:
+        line = line.rstrip("\n")
+        m = _smaps_field.match(line)
+        if m and current is not None:
+            key = m.group(1)
+            current[key] = current.get(key, 0) + int(m.group(2)) * 1024
+        elif _smaps_header.match(line):
+            _, path = parse_maps_line(line)
+            current = usage.setdefault(path, {})
+    return usage
+
+
+def smaps(pid: int) -> Optional[Dict[str, Usage]]:
+    try:
+        with open(pathstr(PROC / str(pid) / "smaps")) as file:
+            return parse_smaps(file)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def smaps_rollup(pid: int) -> Optional[Usage]:
+    """
+    Memory usage of the whole process.  ``smaps`` is summed up if
+    ``smaps_rollup`` (Linux >= 4.14) is not available.
+    """
+    try:
+        with open(pathstr(PROC / str(pid) / "smaps_rollup")) as file:
+            return sum_usage(parse_smaps(file).values())
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, IndexError):
+        return None
+    usage = smaps(pid)
+    return None if usage is None else sum_usage(usage.values())
+
+
+def sum_usage(usages: Iterable[Usage]) -> Usage:
+    total = {}  # type: Usage
+    for usage in usages:
+        for (key, value) in usage.items():
+            total[key] = total.get(key, 0) + value
+    return total
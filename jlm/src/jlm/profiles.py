@@ -0,0 +1,107 @@
+"""
+Named launch profiles.
+
+A project may have several workloads (e.g., a web service and a batch
+job) each of which wants its own system image.  Profiles are stored in
+``data.json`` as::
+
+    "profiles": {
+        "etl": {
+            "julia": "/usr/bin/julia",      # the runtime `sysimage` is for
+            "sysimage": "/path/to/etl.so",
+            "options": ["--threads=4"],     # extra Julia options
+            "env": {"JULIA_NUM_THREADS": "4"},
+            "scripts": ["etl/*.jl"],        # globs relative to the project
+            "project": "etl/Project.toml"   # used by `compile-sysimage`
+        }
+    }
+
+``jlm run --profile NAME`` uses the profile `NAME`.  Otherwise, the
+first profile whose ``scripts`` glob matches the script passed to Julia
+is used.
+"""
+
+import fnmatch
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .utils import _Pathish
+
+Profile = Dict[str, Any]
+
+# Julia options taking a value as a separate argument:
+_options_with_value = {
+    "-C",
+    "-E",
+    "-H",
+    "-J",
+    "-L",
+    "-e",
+    "-p",
+    "-t",
+    "--cpu-target",
+    "--eval",
+    "--home",
+    "--load",
+    "--machine-file",
+    "--print",
+    "--procs",
+    "--sysimage",
+    "--threads",
+}
+# Note: `--project` takes its (optional) value only as `--project=DIR`.
+
+
+def script_argument(arguments: List[str]) -> Optional[str]:
+    """
+    Return the script passed to Julia, if any.
+
+    >>> script_argument(["--threads", "4", "-O3", "run.jl", "arg"])
+    'run.jl'
+    >>> script_argument(["-e", "1 + 1"]) is None
+    True
+    >>> script_argument(["--", "run.jl"])
+    'run.jl'
+    >>> script_argument(["--project", "etl/main.jl"])
+    'etl/main.jl'
+    >>> script_argument(["-H", "/opt/julia/bin", "--machine-file", "hosts", "a.jl"])
+    'a.jl'
+    """
+    i = 0
+    while i < len(arguments):
+        arg = arguments[i]
+        if arg in ("-e", "--eval", "-E", "--print"):
+            return None
+        if arg == "--":
+            return arguments[i + 1] if i + 1 < len(arguments) else None
+        if not arg.startswith("-"):
+            return arg
+        i += 2 if arg in _options_with_value else 1
+    return None
+
+
+def match_profile(
+    profiles: Dict[str, Profile], script: str, base: _Pathish
+) -> Optional[str]:
+    """
+    Return the name of the first profile (in name order) whose
+    ``scripts`` glob matches `script`.  Globs are relative to `base`.
+
+    >>> profiles = {"web": {"scripts": ["web/*.jl"]}, "etl": {"scripts": ["etl/*"]}}
+    >>> match_profile(profiles, "/project/etl/run.jl", "/project")
+    'etl'
+    >>> match_profile(profiles, "/elsewhere/run.jl", "/project") is None
+    True
+    """
+    path = os.path.abspath(script)
+    try:
+        rel = Path(path).relative_to(base).as_posix()
+    except ValueError:
+        rel = None
+    for name in sorted(profiles):
+        for pattern in profiles[name].get("scripts", []):
+            target = path if os.path.isabs(pattern) else rel
+            if target is not None and fnmatch.fnmatch(target, pattern):
+                return name
+    return None
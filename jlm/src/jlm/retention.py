@@ -0,0 +1,230 @@
+"""
+Tracking the use of system images and removing unused ones (``jlm prune``).
+
+Last use of a system image ``PATH`` is recorded by touching the sidecar
+``PATH.lastuse`` right before launching Julia with it.  Unlike the
+access time of the image itself, this does not depend on the mount
+options (``noatime``, ``relatime``) and is not updated by backups or
+digest computations.  The sidecar is touched at most once per
+`RESOLUTION` seconds so that frequent launches cost a single ``stat``.
+
+Since the ``.jlm`` directories are scattered over the file system, the
+ones used on this machine are recorded in the registry
+``stores.json`` in the home store (``jlm locate home-dir``).  Entries
+whose ``data.json`` no longer exists are dropped by ``jlm prune``.
+"""
+
+import fcntl
+import json
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from . import archive
+from .buildinfo import buildinfo_path
+from .utils import _Pathish, atomicopen, dlext, pathstr
+
+LASTUSE_SUFFIX = ".lastuse"
+REGISTRY_NAME = "stores.json"
+RESOLUTION = 60
+
+DAY = 24 * 60 * 60
+UNITS = {"": 1, "K": 2 ** 10, "M": 2 ** 20, "G": 2 ** 30, "T": 2 ** 40}
+
+
+def lastuse_path(sysimage: _Pathish) -> Path:
+    return Path(pathstr(sysimage) + LASTUSE_SUFFIX)
+
+
+def record_use(sysimage: _Pathish, now: Optional[float] = None) -> None:
+    """
+    Record that `sysimage` is used now.  Failures (e.g., read-only
+    system-wide store) are ignored.
+    """
+    path = lastuse_path(sysimage)
+    now = time.time() if now is None else now
+    try:
+        if now - os.stat(pathstr(path)).st_mtime < RESOLUTION:
+            return
+    except OSError:
+        pass
+    try:
+        path.touch()
+        os.utime(pathstr(path), (now, now))
+    except OSError:
+        pass
+
+
+def last_used(sysimage: _Pathish) -> float:
+    """
+    Last use time of `sysimage`; its modification time (i.e., when it
+    is built) if it is never used.
+    """
+    times = []
+    for path in [lastuse_path(sysimage), sysimage]:
+        try:
+            times.append(os.stat(pathstr(path)).st_mtime)
+        except OSError:
+            pass
+    stub = archive.load_stub(sysimage)
+    if stub is not None:
+        times.append(stub["mtime"])
+    return max(times, default=0.0)
+
+
+def disk_usage(sysimage: _Pathish) -> int:
+    """
+    Size of `sysimage` on disk (of the compressed file if archived).
+    """
+    stub = archive.load_stub(sysimage)
+    if stub is not None and not os.path.exists(pathstr(sysimage)):
+        path = archive.archive_path(sysimage, stub["compression"])
+    else:
+        path = Path(sysimage)
+    try:
+        return os.path.getsize(pathstr(path))
+    except OSError:
+        return 0
+
+
+def remove_sysimage(sysimage: _Pathish) -> None:
+    """
+    Remove `sysimage`, its archive and its sidecar files.
+    """
+    archive.remove(sysimage)
+    for path in [buildinfo_path(sysimage), lastuse_path(sysimage)]:
+        if path.exists():
+            os.remove(pathstr(path))
+
+
+def remove_execdir(execdir: _Pathish) -> bool:
+    """
+    Remove `execdir` of the home store if no system image is left in it.
+    """
+    if archive.find_sysimages(execdir, "*." + dlext):
+        return False
+    shutil.rmtree(pathstr(execdir), ignore_errors=True)
+    return True
+
+
+def parse_size(text: str) -> int:
+    """
+    Parse size with an optional binary unit suffix.
+
+    >>> parse_size("512")
+    512
+    >>> parse_size("1.5K")
+    1536
+    >>> parse_size("10G") == 10 * 2 ** 30
+    True
+    >>> parse_size("ten")
+    Traceback (most recent call last):
+      ...
+    ValueError: Invalid size: ten
+    """
+    m = re.match(r"^([0-9]+(?:\.[0-9]*)?)\s*([KMGT]?)i?B?$", text.strip(), re.I)
+    if not m:
+        raise ValueError("Invalid size: {}".format(text))
+    return int(float(m.group(1)) * UNITS[m.group(2).upper()])
+
+
+def select_prunable(
+    images: List[Dict[str, Any]],
+    keep_days: Optional[float],
+    max_size: Optional[int],
+    now: float,
+) -> List[Dict[str, Any]]:
+    """
+    Choose `images` to be removed.
+
+    Each image is a dict with keys ``path``, ``last_used``, ``size`` and
+    ``protected``.  Unprotected images not used within `keep_days` are
+    removed first.  Then, while the total size exceeds `max_size`,
+    the least recently used unprotected images are removed.
+
+    >>> images = [
+    ...     {"path": "a", "last_used": 0, "size": 4, "protected": False},
+    ...     {"path": "b", "last_used": 9 * DAY, "size": 4, "protected": False},
+    ...     {"path": "c", "last_used": 8 * DAY, "size": 4, "protected": False},
+    ...     {"path": "d", "last_used": 1 * DAY, "size": 4, "protected": True},
+    ... ]
+    >>> [i["path"] for i in select_prunable(images, 5, None, 10 * DAY)]
+    ['a']
+    >>> [i["path"] for i in select_prunable(images, 5, 8, 10 * DAY)]
+    ['a', 'c']
+    >>> [i["path"] for i in select_prunable(images, None, 4, 10 * DAY)]
+    ['a', 'c', 'b']
+    """
+    candidates = sorted(
+        (i for i in images if not i["protected"]), key=lambda i: i["last_used"]
+    )
+    removed = []
+    if keep_days is not None:
+        cutoff = now - keep_days * DAY
+        removed = [i for i in candidates if i["last_used"] < cutoff]
+    if max_size is not None:
+        total = sum(i["size"] for i in images) - sum(i["size"] for i in removed)
+        for image in candidates:
+            if total <= max_size:
+                break
+            if image in removed:
+                continue
+            removed.append(image)
+            total -= image["size"]
+    return removed
+
+
+class StoreRegistry:
+    """
+    Registry of the ``.jlm`` directories used on this machine.
+    """
+
+    # path: Path
+
+    def __init__(self, home: _Pathish):
+        self.path = Path(home) / REGISTRY_NAME
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with open(pathstr(self.path) + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def load(self) -> List[str]:
+        try:
+            with open(pathstr(self.path)) as file:
+                return json.load(file)["stores"]  # type: ignore
+        except (FileNotFoundError, ValueError, KeyError):
+            return []
+
+    def store(self, stores: List[str]) -> None:
+        with atomicopen(self.path, "w") as file:
+            json.dump({"stores": sorted(set(stores))}, file, indent=1)
+
+    def register(self, jlm_dir: _Pathish) -> None:
+        jlm_dir = pathstr(jlm_dir)
+        if jlm_dir in self.load():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.locked():
+            stores = self.load()
+            if jlm_dir not in stores:
+                self.store(stores + [jlm_dir])
+
+    def live(self, dry_run: bool = False) -> List[Path]:
+        """
+        Registered stores which still exist.  Others are unregistered
+        unless `dry_run` is true.
+        """
+        if not self.path.exists():
+            return []
+        with self.locked():
+            stores = self.load()
+            alive = [p for p in stores if (Path(p) / "data.json").exists()]
+            if not dry_run and alive != stores:
+                self.store(alive)
+        return [Path(p) for p in alive]
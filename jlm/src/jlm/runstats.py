@@ -0,0 +1,224 @@
+"""
+Supervised ``jlm run`` and statistics of the runs (``jlm stats``).
+
+By default, ``jlm run`` replaces itself with ``julia`` (``exec``).  In
+the supervised mode, it spawns ``julia`` as a child process instead,
+waits for it with ``os.wait4`` and records the resource usage in the
+ring buffer ``.jlm/runstats.json`` (the last `CAPACITY` runs).  The
+child shares the terminal with ``jlm``; keyboard interrupts are
+delivered to it directly by the terminal, other signals are forwarded,
+and the exit status (including death by a signal) is reproduced.
+"""
+
+import fcntl
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .utils import Cmd, _Pathish, atomicopen, pathstr
+
+STATS_NAME = "runstats.json"
+CAPACITY = 1000
+
+Record = Dict[str, Any]
+
+# Signals sent to `jlm` (e.g., by `kill` or a job scheduler) that are
+# forwarded to Julia.  SIGINT and SIGQUIT from the terminal are sent to
+# the whole foreground process group so that they are ignored instead.
+FORWARDED_SIGNALS = ("SIGTERM", "SIGHUP", "SIGUSR1", "SIGUSR2")
+IGNORED_SIGNALS = ("SIGINT", "SIGQUIT")
+
+METRICS = ("wall_time", "cpu_time", "max_rss", "major_faults")
+PERCENTILES = (50, 90, 99)
+
+
+def _signals(names):
+    return [getattr(signal, n) for n in names if hasattr(signal, n)]
+
+
+def supervise(cmd: Cmd, env: Dict[str, str]) -> Tuple[int, Record]:
+    """
+    Run `cmd` and return its wait status and resource usage.
+    """
+    proc = None  # type: Optional[subprocess.Popen]
+    pending = []  # type: List[int]
+
+    def forward(signum, _frame):
+        if proc is None:  # not started yet
+            pending.append(signum)
+            return
+        try:
+            os.kill(proc.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def ignore(_signum, _frame):
+        pass
+
+    # Handlers are installed before starting Julia so that a signal
+    # arriving in between does not kill `jlm` and orphan Julia.  A
+    # handler (unlike `SIG_IGN`) is not inherited by Julia.
+    saved = {}
+    for signum in _signals(FORWARDED_SIGNALS):
+        saved[signum] = signal.signal(signum, forward)
+    for signum in _signals(IGNORED_SIGNALS):
+        saved[signum] = signal.signal(signum, ignore)
+    try:
+        started = time.time()
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env)
+        for signum in pending:
+            forward(signum, None)
+        _, status, rusage = os.wait4(proc.pid, 0)
+    finally:
+        for (signum, handler) in saved.items():
+            signal.signal(signum, handler)
+    usage = {
+        "started": started,
+        "wall_time": time.perf_counter() - start,
+        "user_time": rusage.ru_utime,
+        "system_time": rusage.ru_stime,
+        "cpu_time": rusage.ru_utime + rusage.ru_stime,
+        "max_rss": rusage.ru_maxrss * 1024,  # KiB on Linux
+        "major_faults": rusage.ru_majflt,
+    }
+    if os.WIFSIGNALED(status):
+        usage["signal"] = os.WTERMSIG(status)
+        proc.returncode = -usage["signal"]
+    else:
+        usage["returncode"] = proc.returncode = os.WEXITSTATUS(status)
+    return status, usage
+
+
+def exit_like(status: int) -> None:
+    """
+    Terminate the current process in the same way as the child
+    process with wait status `status`.
+    """
+    # `os._exit` and the signal skip the flush done at normal exit:
+    sys.stdout.flush()
+    sys.stderr.flush()
+    if os.WIFSIGNALED(status):
+        signum = os.WTERMSIG(status)
+        signal.signal(signum, signal.SIG_DFL)
+        os.kill(os.getpid(), signum)
+        # Not reached unless the signal does not terminate a process:
+        os._exit(128 + signum)
+    os._exit(os.WEXITSTATUS(status))
+
+
+class RunStats:
+    # path: Path
+    # capacity: int
+
+    def __init__(self, jlm_dir: _Pathish, capacity: int = CAPACITY):
+        self.path = Path(jlm_dir) / STATS_NAME
+        self.capacity = capacity
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        with open(pathstr(self.path) + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def load(self) -> List[Record]:
+        try:
+            with open(pathstr(self.path)) as file:
+                return json.load(file)  # type: ignore
+        except FileNotFoundError:
+            return []
+
+    def append(self, record: Record) -> None:
+        with self.locked():
+            records = self.load()
+            records.append(record)
+            with atomicopen(self.path, "w") as file:
+                json.dump(records[-self.capacity :], file)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    """
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(len(ordered) * p / 100) - 1)]
+
+
+def group_key(record: Record) -> Tuple[str, str, Optional[float]]:
+    # A rebuilt image at the same path is treated as a different image:
+    return (record["julia"], record["sysimage"], record.get("sysimage_mtime"))
+
+
+def summarize(records: List[Record]) -> List[Dict[str, Any]]:
+    """
+    Percentiles of `METRICS` for each Julia runtime and system image,
+    in the order of their first runs.
+
+    >>> summary = summarize([
+    ...     {"julia": "j", "sysimage": "a", "started": 1, "wall_time": 3.0},
+    ...     {"julia": "j", "sysimage": "a", "started": 2, "wall_time": 1.0},
+    ...     {"julia": "j", "sysimage": "b", "started": 3, "wall_time": 0.5},
+    ... ])
+    >>> [(s["sysimage"], s["runs"], s["wall_time"]["p50"]) for s in summary]
+    [('a', 2, 1.0), ('b', 1, 0.5)]
+    """
+    groups = {}  # type: Dict[Tuple[str, str, Optional[float]], List[Record]]
+    for record in sorted(records, key=lambda r: r["started"]):
+        groups.setdefault(group_key(record), []).append(record)
+    summary = []
+    for ((julia, sysimage, _), runs) in groups.items():
+        entry = {
+            "julia": julia,
+            "sysimage": sysimage,
+            "runs": len(runs),
+            "failed": sum(1 for r in runs if r.get("returncode") != 0),
+            "first": runs[0]["started"],
+            "last": runs[-1]["started"],
+        }  # type: Dict[str, Any]
+        for key in METRICS:
+            values = [r[key] for r in runs if key in r]
+            if values:
+                entry[key] = {
+                    "p{}".format(p): percentile(values, p) for p in PERCENTILES
+                }
+                entry[key]["max"] = max(values)
+        summary.append(entry)
+    return summary
+
+
+def format_summary(entry: Dict[str, Any]) -> str:
+    lines = [
+        "{julia}\n  System image: {sysimage}".format(**entry),
+        "  Runs        : {} ({} failed) from {} to {}".format(
+            entry["runs"],
+            entry["failed"],
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["first"])),
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last"])),
+        ),
+    ]
+    for key in METRICS:
+        if key not in entry:
+            continue
+        stats = entry[key]
+        lines.append(
+            "  {:<12}: {}".format(
+                key,
+                "  ".join(
+                    "{}={:.6g}".format(name, stats[name])
+                    for name in ["p{}".format(p) for p in PERCENTILES] + ["max"]
+                ),
+            )
+        )
+    return "\n".join(lines)
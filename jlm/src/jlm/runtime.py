@@ -1,6 +1,8 @@
 import textwrap
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 
+from .buildinfo import built_cpu_target
+from .metadata import current_cpu_name
 from .utils import Cmd, _Pathish, pathstr
 
 if TYPE_CHECKING:
@@ -10,10 +12,14 @@ if TYPE_CHECKING:
 class JuliaRuntime:
     # executable: str
     # sysimage: Optional[_Pathish]
+    # metadata: Optional[Dict[str, Any]]
+    # buildinfo: Optional[Dict[str, Any]]
 
     def __init__(self, executable: str, sysimage: Optional[_Pathish]):
         self.executable = executable
         self.sysimage = sysimage
+        self.metadata = None  # type: Optional[Dict[str, Any]]
+        self.buildinfo = None  # type: Optional[Dict[str, Any]]
 
     def cmd(self) -> Cmd:
         assert self.sysimage
@@ -26,9 +32,20 @@ class JuliaRuntime:
         Executable  : {self.executable}
         System image: {self.sysimage}
         """
-        return textwrap.dedent(summary.format(self=self)).strip()
+        summary = textwrap.dedent(summary.format(self=self)).strip()
+        if self.metadata:
+            summary += "\nVersion     : {version} ({arch}, commit {commit})".format(
+                **self.metadata
+            )
+            cpu_name = current_cpu_name(self.metadata)
+            if cpu_name:
+                summary += "\nCPU         : {}".format(cpu_name)
+        cpu_target = built_cpu_target(self.buildinfo)
+        if cpu_target:
+            summary += "\nCPU targets : {}".format(cpu_target)
+        return summary
 
     def resolve(self, app: "Application") -> "JuliaRuntime":
-        if not self.sysimage:
-            self.sysimage = app.sysimage_for(self.executable)
+        # Always ask `app` since it may choose a host-specific variant:
+        self.sysimage = app.sysimage_for(self.executable)
         return self
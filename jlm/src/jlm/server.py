@@ -0,0 +1,185 @@
+"""
+Long-lived JSON-RPC server answering `jlm` queries over a Unix socket.
+
+Each line sent to the socket is a JSON-RPC 2.0 request and each
+response is sent back as a line.  Example::
+
+    $ echo '{"jsonrpc": "2.0", "id": 1, "method": "locate_sysimage",
+             "params": {"cwd": "/path/to/project"}}' | nc -U SOCKET
+    {"jsonrpc": "2.0", "id": 1, "result": "/path/to/sys.so"}
+
+Available methods are the ``rpc_*`` methods of `Dispatcher`.  All of
+them accept the keyword arguments `jlm_dir`, `julia` and `cwd` as in
+`jlm.api`.
+
+Resolved applications are kept in memory.  Since `LocalStore` re-reads
+``data.json`` only when its `stat` changes, modifications done by
+other `jlm` processes (e.g., ``jlm set-sysimage``) are reflected
+immediately.
+"""
+
+import inspect
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from . import api
+from .application import Application
+from .utils import ApplicationError, _Pathish, pathstr
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+APPLICATION_ERROR = -32000
+
+
+class Dispatcher:
+    # _apps: Dict[Tuple[str, Optional[str]], Application]
+    # _lock: threading.Lock
+
+    def __init__(self):
+        self._apps = {}  # type: Dict[Tuple[str, Optional[str]], Application]
+        self._lock = threading.Lock()
+
+    def application(
+        self,
+        jlm_dir: Optional[_Pathish] = None,
+        julia: Optional[str] = None,
+        cwd: Optional[_Pathish] = None,
+    ) -> Application:
+        path = pathstr(api.find_jlm_dir(jlm_dir, cwd))
+        key = (path, julia)
+        with self._lock:
+            app = self._apps.get(key)
+        if app is None or not app.localstore.exists():
+            app = api.application(jlm_dir=path, julia=julia)
+            with self._lock:
+                self._apps[key] = app
+        return app
+
+    def rpc_ping(self) -> str:
+        return "pong"
+
+    def rpc_resolve(self, **kwargs) -> Dict[str, str]:
+        return api.Resolution(self.application(**kwargs)).to_dict()
+
+    def rpc_locate_dir(self, **kwargs) -> str:
+        return pathstr(self.application(**kwargs).localstore.path)
+
+    def rpc_locate_base(self, **kwargs) -> str:
+        return pathstr(self.application(**kwargs).localstore.path.parent)
+
+    def rpc_locate_sysimage(self, **kwargs) -> str:
+        return pathstr(self.application(**kwargs).effective_sysimage)
+
+    def rpc_launch_command(
+        self, arguments: Sequence[str] = (), on_mismatch: str = "error", **kwargs
+    ) -> Dict[str, Any]:
+        app = self.application(**kwargs)
+        argv, env = app.launch_command(list(arguments), on_mismatch)
+        return {"argv": argv, "env": env}
+
+    def rpc_info(self, **kwargs) -> Dict[str, Any]:
+        return api.describe(self.application(**kwargs))
+
+    def check_params(self, method: Any, params: Dict[str, Any]) -> None:
+        """
+        Raise `TypeError` if `method` cannot be called with `params`.
+
+        Keyword arguments not consumed by `method` itself are passed to
+        `application`; they are checked against its signature as well.
+        """
+        signature = inspect.signature(method)
+        bound = signature.bind(**params)
+        for name, param in signature.parameters.items():
+            if param.kind == param.VAR_KEYWORD:
+                inspect.signature(self.application).bind(
+                    **bound.arguments.get(name, {})
+                )
+
+    def dispatch(self, request: Any) -> Optional[Dict[str, Any]]:
+        if not isinstance(request, dict) or not isinstance(
+            request.get("method"), str
+        ):
+            return error_response(None, INVALID_REQUEST, "Invalid request")
+        rid = request.get("id")
+        method = getattr(self, "rpc_" + request["method"], None)
+        if method is None:
+            return error_response(
+                rid, METHOD_NOT_FOUND, "Method not found: " + request["method"]
+            )
+        params = request.get("params") or {}
+        if not isinstance(params, dict):
+            return error_response(rid, INVALID_PARAMS, "`params` must be an object")
+        try:
+            self.check_params(method, params)
+        except TypeError as err:
+            return error_response(rid, INVALID_PARAMS, str(err))
+        try:
+            result = method(**params)
+        except (ApplicationError, OSError) as err:
+            return error_response(rid, APPLICATION_ERROR, str(err))
+        except Exception as err:
+            # Respond rather than killing the handler thread silently:
+            return error_response(
+                rid, INTERNAL_ERROR, "{}: {}".format(type(err).__name__, err)
+            )
+        if "id" not in request:
+            return None  # notification
+        return {"jsonrpc": "2.0", "id": rid, "result": result}
+
+    def handle_line(self, line: str) -> Optional[str]:
+        try:
+            request = json.loads(line)
+        except ValueError as err:
+            return json.dumps(error_response(None, PARSE_ERROR, str(err)))
+        response = self.dispatch(request)
+        if response is None:
+            return None
+        return json.dumps(response)
+
+
+def error_response(rid: Any, code: int, message: str) -> Dict[str, Any]:
+    error = {"code": code, "message": message}
+    return {"jsonrpc": "2.0", "id": rid, "error": error}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        dispatcher = self.server.dispatcher  # type: ignore
+        for raw in self.rfile:
+            line = raw.decode("utf-8").strip()
+            if not line:
+                continue
+            response = dispatcher.handle_line(line)
+            if response is not None:
+                self.wfile.write(response.encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: _Pathish, dispatcher: Optional[Dispatcher] = None):
+        self.dispatcher = dispatcher or Dispatcher()
+        super().__init__(pathstr(path), RequestHandler)
+
+
+def remove_stale_socket(path: Path) -> None:
+    if not path.exists():
+        return
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(pathstr(path))
+    except OSError:
+        os.remove(pathstr(path))
+    else:
+        raise ApplicationError("Server is already running at {}".format(path))
+    finally:
+        sock.close()
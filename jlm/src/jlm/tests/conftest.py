@@ -1,7 +1,8 @@
 import pytest  # type: ignore
 
 from .. import cli
-from .testing import changingdir
+from ..datastore import HomeStore
+from .testing import FakeJulia, changingdir
 
 
 @pytest.fixture
@@ -12,6 +13,23 @@ def cleancwd(tmp_path):
 
 
 @pytest.fixture
-def initialized(cleancwd):
+def fake_julia(tmp_path, monkeypatch):
+    """
+    Put a fake ``julia`` first in ``$PATH`` and isolate the stores in
+    `tmp_path` so that tests do not touch the real ones and can run in
+    parallel (e.g., with pytest-xdist).
+    """
+    fake = FakeJulia(tmp_path / "fakejulia")
+    home = tmp_path / "home"
+    monkeypatch.setenv("PATH", str(fake.bindir), prepend=":")
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("JLM_SYSTEM_STORE", str(tmp_path / "system"))
+    monkeypatch.setenv("JLM_SYSTEM_CONFIG", str(tmp_path / "system.json"))
+    monkeypatch.setattr(HomeStore, "defaultpath", home / ".julia" / "jlm")
+    return fake
+
+
+@pytest.fixture
+def initialized(cleancwd, fake_julia):
     cli.run(["--verbose", "init"])
     return cleancwd
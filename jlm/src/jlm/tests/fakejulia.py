@@ -0,0 +1,179 @@
+"""
+A fake ``julia`` executable for hermetic tests.
+
+This file is run as a standalone script (it does not import `jlm`) via
+a shell wrapper created by `jlm.tests.testing.FakeJulia`.  Its state
+directory is given by ``$FAKE_JULIA_DIR`` which contains
+
+* ``config.json``: the behavior (see `DEFAULTS`), and
+* ``invocations.jsonl``: one JSON record per invocation (appended).
+
+Each invocation is classified into a `kind` by the code passed by
+``-e``: ``version``, ``metadata``, ``backend``, ``compile``,
+``verify``, ``kernel`` or ``run``.  ``latency`` (seconds) and ``fail``
+(exit status) can be configured for each kind; ``"*"`` applies to all
+kinds.
+"""
+
+import json
+import os
+import sys
+import time
+
+DEFAULTS = {
+    "version": "1.6.0",
+    "commit": "0123456789",
+    "arch": "x86_64",
+    "cpu_name": "skylake",
+    "sysimage": "/opt/julia/lib/julia/sys.so",
+    "depot_path": [],
+    "latency": {},
+    "fail": {},
+    # Statements written by `--trace-compile=PATH`:
+    "trace": ["precompile(Tuple{typeof(Base.sum), Array{Int64, 1}})"],
+    # (1-origin) line numbers reported as invalid by the verify script:
+    "invalid_statements": [],
+}
+
+# Options taking a value as a separate argument:
+OPTIONS_WITH_VALUE = {
+    "-C",
+    "-J",
+    "-L",
+    "-p",
+    "-t",
+    "--cpu-target",
+    "--load",
+    "--procs",
+    "--project",
+    "--sysimage",
+    "--threads",
+}
+
+
+def parse(argv):
+    """
+    Return ``(options, code, args)`` where `options` maps option
+    names to values (`True` for flags).
+    """
+    options = {}
+    code = None
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg == "--":
+            i += 1
+            break
+        if not arg.startswith("-"):
+            break
+        if arg in ("-e", "--eval", "-E", "--print"):
+            code = argv[i + 1]
+            i += 2
+            break
+        name, eq, value = arg.partition("=")
+        if eq:
+            options[name] = value
+        elif name in OPTIONS_WITH_VALUE and i + 1 < len(argv):
+            options[name] = argv[i + 1]
+            i += 1
+        elif name.startswith("-J") and len(name) > 2:
+            options["-J"] = name[2:]
+        else:
+            options[name] = True
+        i += 1
+    return options, code, argv[i:]
+
+
+def classify(options, code):
+    if "--version" in options or "-v" in options:
+        return "version"
+    if code is None:
+        return "run"
+    if "DEPOT_PATH" in code and "image_file" in code:
+        return "metadata"
+    if "compile_patched_sysimage" in code:
+        return "compile"
+    if "locate_package" in code or "Pkg.add" in code:
+        return "backend"
+    if "IJulia" in code:
+        return "kernel"
+    if "eachline(ARGS[1])" in code:
+        return "verify"
+    return "run"
+
+
+def lookup(table, kind):
+    return table.get(kind, table.get("*"))
+
+
+def main(argv):
+    statedir = os.environ["FAKE_JULIA_DIR"]
+    config = dict(DEFAULTS)
+    try:
+        with open(os.path.join(statedir, "config.json")) as file:
+            config.update(json.load(file))
+    except FileNotFoundError:
+        pass
+
+    options, code, args = parse(argv)
+    kind = classify(options, code)
+    sysimage = options.get("--sysimage", options.get("-J", config["sysimage"]))
+    record = {
+        "kind": kind,
+        "argv": argv,
+        "args": args,
+        "sysimage": sysimage,
+        "cwd": os.getcwd(),
+        "pid": os.getpid(),
+        "time": time.time(),
+        "env": {
+            k: v for (k, v) in os.environ.items() if k.startswith(("JLM_", "JULIA_"))
+        },
+    }
+    line = (json.dumps(record) + "\n").encode("utf-8")
+    fd = os.open(
+        os.path.join(statedir, "invocations.jsonl"),
+        os.O_WRONLY | os.O_APPEND | os.O_CREAT,
+        0o644,
+    )
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
+
+    time.sleep(lookup(config["latency"], kind) or 0)
+    status = lookup(config["fail"], kind)
+    if status:
+        print("fake julia: {} failed".format(kind), file=sys.stderr)
+        return status
+
+    trace = options.get("--trace-compile")
+    if isinstance(trace, str):
+        with open(trace, "w") as file:
+            file.writelines(s + "\n" for s in config["trace"])
+
+    if kind == "version":
+        print("julia version {}".format(config["version"]))
+    elif kind == "metadata":
+        print(config["version"])
+        print(config["commit"])
+        print(config["arch"])
+        print(config["cpu_name"])
+        print(sysimage)
+        depot_path = config["depot_path"]
+        if os.environ.get("JULIA_DEPOT_PATH"):
+            depot_path = os.environ["JULIA_DEPOT_PATH"].split(os.pathsep)
+        for depot in depot_path:
+            print(depot)
+    elif kind == "compile":
+        # ARGS = [sysimage, key1, value1, ...]
+        with open(args[0], "w") as file:
+            json.dump({"fake_sysimage": True, "options": args[1:]}, file)
+    elif kind == "verify":
+        for i in config["invalid_statements"]:
+            print(i)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
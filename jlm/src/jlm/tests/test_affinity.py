@@ -0,0 +1,61 @@
+import json
+import os
+from pathlib import Path
+
+import pytest  # type: ignore
+
+from .. import cli
+from ..affinity import CPUAllocator
+from ..datastore import HomeStore
+from ..utils import ApplicationError
+from ..workers import available_cores
+
+nodes = {0: [0, 1, 2, 3], 1: [4, 5, 6, 7]}
+
+
+def test_spread(tmp_path: Path):
+    allocator = CPUAllocator(tmp_path)
+    assert allocator.allocate(2, os.getpid(), nodes=nodes) == [0, 1]
+    assert allocator.allocate(2, os.getppid(), nodes=nodes) == [4, 5]
+
+    # Re-allocating for the same process releases its previous CPUs:
+    assert allocator.allocate(4, os.getpid(), nodes=nodes) == [0, 1, 2, 3]
+
+    with pytest.raises(ApplicationError):
+        allocator.allocate(4, os.getpid() + 1, nodes=nodes)
+
+
+def test_dead_leases(tmp_path: Path):
+    allocator = CPUAllocator(tmp_path)
+    allocator.allocate(8, os.getpid(), nodes=nodes)
+    data = allocator.load()
+    data["leases"][0]["pid"] = 2 ** 22 + 1  # larger than the maximum PID
+    allocator.path.write_text(json.dumps(data))
+    assert allocator.allocate(8, os.getppid(), nodes=nodes) == list(range(8))
+
+
+def test_run_threads(initialized: Path, fake_julia, capsys):
+    cpu = str(available_cores()[0])
+    capsys.readouterr()
+    cli.run(["--dry-run", "run", "--cpus", cpu])
+    assert "--threads=1" in capsys.readouterr().out
+
+    # `--threads` is not supported by Julia < 1.5:
+    fake_julia.configure(version="1.0.5")
+    for path in HomeStore.defaultpath.glob("exec/*/metadata.json"):
+        path.unlink()
+    cli.run(["--dry-run", "run", "--cpus", cpu])
+    assert "--threads" not in capsys.readouterr().out
+
+
+def test_run_unavailable_cpus(initialized: Path, capsys):
+    cpu = available_cores()[0]
+    unavailable = max(available_cores()) + 1
+    capsys.readouterr()
+    cli.run(["--dry-run", "run", "--cpus", "{},{}".format(cpu, unavailable)])
+    captured = capsys.readouterr()
+    assert "--threads=1" in captured.out
+    assert "not available" in captured.err
+
+    with pytest.raises(ApplicationError):
+        cli.run(["--dry-run", "run", "--cpus", str(unavailable)])
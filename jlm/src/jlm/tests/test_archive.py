@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pytest  # type: ignore
+
+from .. import archive, cli
+from ..utils import dlext
+
+
+@pytest.mark.parametrize("compression", archive.COMPRESSIONS)
+def test_archive_restore(tmp_path: Path, compression: str):
+    sysimage = tmp_path / ("sys." + dlext)
+    data = b"\0" * (3 * archive.CHUNK_SIZE + 1)
+    sysimage.write_bytes(data)
+    os.utime(str(sysimage), (1000, 2000))
+
+    assert archive.archive(sysimage, compression) > 0
+    assert not sysimage.exists()
+    assert archive.is_archived(sysimage)
+    assert archive.archive_path(sysimage, compression).exists()
+
+    assert archive.restore(sysimage)
+    assert sysimage.read_bytes() == data
+    assert os.stat(str(sysimage)).st_mtime == 2000
+    assert not archive.is_archived(sysimage)
+    assert not archive.stub_path(sysimage).exists()
+    assert not archive.archive_path(sysimage, compression).exists()
+    assert not archive.restore(sysimage)
+
+
+def test_concurrent_restore(tmp_path: Path):
+    sysimage = tmp_path / ("sys." + dlext)
+    sysimage.write_bytes(b"sysimage" * 1000)
+    archive.archive(sysimage)
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(archive.restore(sysimage)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False, False, False, True]
+    assert sysimage.read_bytes() == b"sysimage" * 1000
+
+
+def test_archive_and_launch(initialized: Path, capsys):
+    (initialized / "Manifest.toml").write_text("# manifest\n")
+    cli.run(["compile-sysimage"])
+    capsys.readouterr()
+    cli.run(["locate", "sysimage"])
+    sysimage = Path(capsys.readouterr().out)
+    old = time.time() - 60 * 24 * 60 * 60
+    os.utime(str(sysimage), (old, old))
+
+    cli.run(["archive", "--unused-days", "30"])
+    assert archive.is_archived(sysimage)
+    capsys.readouterr()
+
+    # The archived image is still selected for the current manifest:
+    cli.run(["locate", "sysimage"])
+    assert capsys.readouterr().out == str(sysimage)
+
+    app = cli.Application(dry_run=False, verbose=False, julia=None)
+    cmd = app.julia_cmd()
+    app.record_sysimage_use(cmd)
+    assert str(sysimage) in cmd
+    assert sysimage.exists()
+    assert not archive.is_archived(sysimage)
+
+    # Recently used images are not archived:
+    cli.run(["archive", "--unused-days", "30"])
+    assert sysimage.exists()
@@ -0,0 +1,111 @@
+import pytest  # type: ignore
+
+from .. import cli
+from ..artifacts import SYSIMAGE_NAME, ArtifactStore, parse_store_url
+from ..datastore import HomeStore
+from ..metadata import METADATA_NAME
+from ..utils import ApplicationError
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "store")
+
+
+@pytest.fixture
+def sysimage(tmp_path):
+    path = tmp_path / "build" / SYSIMAGE_NAME
+    path.parent.mkdir()
+    path.write_bytes(b"dummy system image")
+    return path
+
+
+def test_push_pull(store, sysimage, tmp_path):
+    store.push(sysimage, {"jlm_version": "0"}, "digest", "0")
+    dest = tmp_path / "dest" / SYSIMAGE_NAME
+    dest.parent.mkdir()
+    info = store.pull("digest", "0", dest)
+    assert info is not None
+    assert info["jlm_version"] == "0"
+    assert dest.read_bytes() == sysimage.read_bytes()
+    assert store.pull("another-digest", "0", dest) is None
+
+
+def test_push_existing(store, sysimage):
+    store.push(sysimage, {}, "digest", "0")
+    with pytest.raises(ApplicationError):
+        store.push(sysimage, {}, "digest", "0")
+
+    sysimage.write_bytes(b"updated")
+    store.push(sysimage, {}, "digest", "0", force=True)
+    published = store.entrypath("digest", "0") / SYSIMAGE_NAME
+    assert published.read_bytes() == b"updated"
+    assert sorted(p.name for p in published.parent.parent.iterdir()) == ["0"]
+
+
+def test_pull_corrupted(store, sysimage, tmp_path):
+    store.push(sysimage, {}, "digest", "0")
+    (store.entrypath("digest", "0") / SYSIMAGE_NAME).write_bytes(b"corrupted")
+    dest = tmp_path / SYSIMAGE_NAME
+    with pytest.raises(ApplicationError) as exc_info:
+        store.pull("digest", "0", dest)
+    assert "Checksum mismatch" in str(exc_info.value)
+    assert not dest.exists()
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_parse_store_url_invalid():
+    with pytest.raises(ApplicationError):
+        parse_store_url("https://example.com/store")
+    with pytest.raises(ApplicationError):
+        parse_store_url("relative/path")
+
+
+def test_cpu_target(initialized, fake_julia, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("JLM_ARTIFACT_STORE", str(tmp_path / "store"))
+    cli.run(["push"])
+    assert len(fake_julia.invocations("compile")) == 1
+
+    # The published image is not built for the requested CPU target:
+    cli.run(["create-default-sysimage", "--cpu-target", "generic"])
+    assert len(fake_julia.invocations("compile")) == 2
+    cli.run(["create-default-sysimage", "--cpu-target", "generic"])
+    assert len(fake_julia.invocations("compile")) == 2
+    capsys.readouterr()
+    cli.run(["info"])
+    assert "CPU targets : generic" in capsys.readouterr().out
+
+
+def test_keyed_by_julia_version(initialized, fake_julia, tmp_path, monkeypatch):
+    monkeypatch.setenv("JLM_ARTIFACT_STORE", str(tmp_path / "store"))
+    cli.run(["push"])
+    assert [p.name for p in (tmp_path / "store").iterdir()] == [
+        "1.6.0-x86_64-0123456789"
+    ]
+
+    # Another patch release with a byte-identical launcher:
+    fake_julia.configure(version="1.6.1", commit="abcdef0123")
+    for path in HomeStore.defaultpath.glob("exec/*/" + METADATA_NAME):
+        path.unlink()
+    with pytest.raises(ApplicationError) as exc_info:
+        cli.run(["pull", "--force"])
+    assert "No system image" in str(exc_info.value)
+
+
+def test_checksum_mismatch_fallback(
+    initialized, fake_julia, tmp_path, monkeypatch, capsys
+):
+    store = tmp_path / "store"
+    monkeypatch.setenv("JLM_ARTIFACT_STORE", str(store))
+    cli.run(["push"])
+    for path in store.glob("*/*/" + SYSIMAGE_NAME):
+        path.write_bytes(b"corrupted")
+    for path in HomeStore.defaultpath.glob("exec/*/" + SYSIMAGE_NAME):
+        path.unlink()
+    capsys.readouterr()
+
+    cli.run(["create-default-sysimage"])
+    assert len(fake_julia.invocations("compile")) == 2
+    err = capsys.readouterr().err
+    assert "Checksum mismatch" in err
+    assert "Building the system image locally." in err
@@ -0,0 +1,32 @@
+import os
+
+from ..buildinfo import (
+    executable_identity,
+    identity_mismatch,
+    load_buildinfo,
+    store_buildinfo,
+)
+
+
+def test_identity_mismatch(tmp_path):
+    julia = tmp_path / "julia"
+    julia.write_text("#!/bin/sh\n")
+    sysimage = tmp_path / "sys.so"
+
+    assert load_buildinfo(sysimage) is None
+    assert identity_mismatch(None, julia) is None
+    assert identity_mismatch({"julia": {"commit": "abc"}}, julia) is None
+
+    store_buildinfo(sysimage, {"julia": executable_identity(julia)})
+    info = load_buildinfo(sysimage)
+    assert identity_mismatch(info, julia) is None
+
+    st = os.stat(str(julia))
+    os.utime(str(julia), (st.st_atime, st.st_mtime + 10))
+    assert "mtime differs" in identity_mismatch(info, julia)
+
+    julia.write_text("#!/bin/sh\nexit 0\n")
+    assert "size differs" in identity_mismatch(info, julia)
+
+    julia.unlink()
+    assert "Cannot stat" in identity_mismatch(info, julia)
@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+import pytest  # type: ignore
+
+from ..builds import BuildHistory, measured_call
+
+
+def test_measured_call():
+    usage = measured_call([sys.executable, "-c", "x = bytearray(50 * 2 ** 20)"])
+    assert usage["returncode"] == 0
+    assert usage["wall_time"] > 0
+    assert usage["max_rss"] > 50 * 2 ** 20
+
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        measured_call([sys.executable, "-c", "raise SystemExit(3)"])
+    assert excinfo.value.returncode == 3
+    assert excinfo.value.usage["returncode"] == 3
+
+
+def test_build_history(tmp_path):
+    history = BuildHistory(tmp_path / "builds.jsonl")
+    assert history.load() == []
+    history.append({"wall_time": 1.0})
+    with open(str(history.path), "a") as file:
+        file.write('{"truncated": ')
+    history.append({"wall_time": 2.0})
+    assert history.load() == [{"wall_time": 1.0, "id": 1}, {"wall_time": 2.0, "id": 3}]
@@ -0,0 +1,74 @@
+import io
+
+from .. import archive
+from ..application import Application
+from ..bundle import BundleReader
+from ..caches import package_slug
+from ..datastore import HomeStore
+from ..metadata import MetadataCache
+from ..utils import pathstr
+from .testing import changingdir
+
+UUID = "2a5e3cbc-6ac1-4d3d-a5b6-6a22c44a8a06"
+
+
+def make_app(julia, jlm_dir, home, verbose=False):
+    app = Application(dry_run=False, verbose=verbose, julia=julia)
+    app.localstore.path = jlm_dir
+    app.homestore = HomeStore(home)
+    app.metadata = MetadataCache(app.homestore)
+    return app
+
+
+def test_bundle_roundtrip(fake_julia, tmp_path):
+    src_depot = tmp_path / "src-depot"
+    fake_julia.configure(depot_path=[str(src_depot)])
+    julia = fake_julia.executable
+    src = tmp_path / "src"
+    (src / ".jlm" / "sysimages").mkdir(parents=True)
+    (src / "Project.toml").write_text('name = "MyProject"\nuuid = "{}"\n'.format(UUID))
+    sysimage = src / ".jlm" / "sysimages" / "sys-1.so"
+    sysimage.write_bytes(b"sysimage")
+
+    app = make_app(julia, src / ".jlm", tmp_path / "home")
+    app.localstore.set({"default": julia})
+    app.localstore.set_sysimage(julia, sysimage)
+    slug = package_slug(UUID, str(sysimage), app.precompile_key)
+    compiled = src_depot / "compiled" / "v1.6" / "MyProject"
+    compiled.mkdir(parents=True)
+    (compiled / (slug + ".ji")).write_bytes(b"cache")
+
+    bundle = tmp_path / "bundle.tar.gz"
+    app.cli_bundle_export(str(bundle), "gz")
+
+    dst = tmp_path / "dst"
+    dst_depot = tmp_path / "dst-depot"
+    with changingdir(dst):
+        app = make_app(julia, dst / ".jlm", tmp_path / "home")
+        app.cli_bundle_import(str(bundle), str(dst_depot), [], force=False)
+
+    new_sysimage = dst / ".jlm" / "sysimages" / "sys-1.so"
+    assert new_sysimage.read_bytes() == b"sysimage"
+    assert app.localstore.sysimage(julia) == pathstr(new_sysimage)
+    slug = package_slug(UUID, str(new_sysimage), pathstr(dst / ".jlm"))
+    cache = dst_depot / "compiled" / "v1.6" / "MyProject" / (slug + ".ji")
+    assert cache.read_bytes() == b"cache"
+
+
+def test_bundle_export_to_stdout(fake_julia, tmp_path, capsysbinary):
+    fake_julia.configure(depot_path=[str(tmp_path / "depot")])
+    julia = fake_julia.executable
+    src = tmp_path / "src"
+    (src / ".jlm" / "sysimages").mkdir(parents=True)
+    sysimage = src / ".jlm" / "sysimages" / "sys-1.so"
+    sysimage.write_bytes(b"sysimage")
+
+    app = make_app(julia, src / ".jlm", tmp_path / "home", verbose=True)
+    app.localstore.set({"default": julia})
+    app.localstore.set_sysimage(julia, sysimage)
+    archive.archive(sysimage)
+
+    app.cli_bundle_export(None, "none")
+    with BundleReader(io.BytesIO(capsysbinary.readouterr().out)) as reader:
+        files = dict((str(name), file.read()) for (name, file) in reader.files())
+    assert files["sysimages/0/sys-1.so"] == b"sysimage"
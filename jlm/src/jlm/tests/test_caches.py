@@ -0,0 +1,73 @@
+import os
+
+from ..caches import package_slug, project_cache_files, read_packages
+from ..depots import publish_file
+
+MANIFEST = """\
+# This file is machine-generated - editing it directly is not advised
+
+julia_version = "1.6.0"
+manifest_format = "2.0"
+
+[[deps.Example]]
+git-tree-sha1 = "46e44e869b4d90b96bd8ed1fdcf32244fddfb6cc"
+uuid = "7876af07-990d-54b4-ab0e-23690620f79a"
+version = "0.5.3"
+
+[[deps."Random"]]
+uuid = "9a3f8284-a2c9-5f02-9a11-845980a1fd5c"
+"""
+
+PROJECT = """\
+name = "MyProject"
+uuid = "2a5e3cbc-6ac1-4d3d-a5b6-6a22c44a8a06"
+
+[deps]
+Example = "7876af07-990d-54b4-ab0e-23690620f79a"
+"""
+
+
+def test_read_packages(tmp_path):
+    (tmp_path / "Manifest.toml").write_text(MANIFEST)
+    (tmp_path / "Project.toml").write_text(PROJECT)
+    assert read_packages(tmp_path / "Manifest.toml") == {
+        "Example": "7876af07-990d-54b4-ab0e-23690620f79a",
+        "Random": "9a3f8284-a2c9-5f02-9a11-845980a1fd5c",
+    }
+    assert read_packages(tmp_path / "Project.toml") == {
+        "MyProject": "2a5e3cbc-6ac1-4d3d-a5b6-6a22c44a8a06"
+    }
+    assert read_packages(tmp_path / "missing.toml") == {}
+
+
+def test_package_slug():
+    uuid = "7876af07-990d-54b4-ab0e-23690620f79a"
+    slug = package_slug(uuid, "/sys.so", "/project/.jlm")
+    assert len(slug) == 5
+    assert slug == package_slug(uuid, "/sys.so", "/project/.jlm")
+    assert slug != package_slug(uuid, "/sys.so", "/other/.jlm")
+    assert slug != package_slug(uuid, "/other.so", "/project/.jlm")
+
+
+def test_publish_caches(tmp_path):
+    uuid = "7876af07-990d-54b4-ab0e-23690620f79a"
+    slug = package_slug(uuid, "/sys.so", "/project/.jlm")
+    writable = tmp_path / "writable"
+    compiled = writable / "compiled" / "v1.6" / "Example"
+    compiled.mkdir(parents=True)
+    (compiled / (slug + ".ji")).write_bytes(b"cache")
+    (compiled / "xxxxx.ji").write_bytes(b"other")
+
+    found = list(
+        project_cache_files(
+            writable, "1.6.0", {"Example": uuid}, "/sys.so", "/project/.jlm"
+        )
+    )
+    assert found == [("Example", compiled / (slug + ".ji"))]
+
+    (_, src), = found
+    dest = tmp_path / "shared" / src.relative_to(writable)
+    assert publish_file(src, dest)
+    assert dest.read_bytes() == b"cache"
+    assert oct(os.stat(str(dest)).st_mode & 0o777) == oct(0o644)
+    assert not publish_file(src, dest)
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+from .. import cli
+from ..application import Application
+from ..cgroups import Limits
+from ..datastore import LocalStore
+from ..launchopts import resolve_options
+
+
+def write(path: Path, text: str):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+
+def test_detect_v2(tmp_path: Path):
+    write(tmp_path / "proc/self/cgroup", "0::/job/step\n")
+    cgroup = tmp_path / "sys/fs/cgroup"
+    write(cgroup / "cgroup.controllers", "cpu memory\n")
+    write(cgroup / "job/cpu.max", "200000 100000\n")
+    write(cgroup / "job/memory.max", "{}\n".format(4 * 2 ** 30))
+    write(cgroup / "job/step/cpu.max", "max 100000\n")
+    write(cgroup / "job/step/memory.max", "{}\n".format(2 * 2 ** 30))
+
+    limits = Limits.detect(tmp_path)
+    assert limits.cpus == 2.0
+    assert limits.memory == 2 * 2 ** 30
+    assert limits.heap_size_hint() == "1536M"
+
+
+def test_detect_v1(tmp_path: Path):
+    write(tmp_path / "proc/self/cgroup", "4:memory:/job\n3:cpu,cpuacct:/job\n")
+    cgroup = tmp_path / "sys/fs/cgroup"
+    write(cgroup / "cpu,cpuacct/job/cpu.cfs_quota_us", "150000\n")
+    write(cgroup / "cpu,cpuacct/job/cpu.cfs_period_us", "100000\n")
+    write(cgroup / "memory/memory.limit_in_bytes", "9223372036854771712\n")
+
+    limits = Limits.detect(tmp_path)
+    assert limits.cpus == 1.5
+    assert limits.memory is None
+
+
+def test_launch_options(cleancwd: Path):
+    (cleancwd / ".jlm").mkdir()
+    store = LocalStore()
+    julia = "/usr/bin/julia"
+    store.set_sysimage(julia, "/sys.so")
+    store.set_launch_options(julia, {"threads": "auto", "optimize": "3"})
+    store.unset_sysimage(julia)
+    assert store.launch_options(julia) == {"threads": "auto", "optimize": "3"}
+
+    limits = Limits(cpus=2.5, memory=None, affinity=8)
+    cmd = resolve_options(
+        store.launch_options(julia), version="1.6.0", detect=lambda: limits
+    )
+    assert cmd == ["--threads=3", "-O3"]
+
+    store.set_launch_options(julia, {"threads": None, "optimize": None})
+    assert julia not in store.loaddata()["config"]["runtime"]
+
+
+def test_launch_options_cold_cache(initialized: Path, fake_julia):
+    cli.run(["set-options", "--threads", "4", "--optimize", "1"])
+    app = Application(dry_run=False, verbose=False, julia=None)
+    julia = app.effective_julia
+    app.metadata.path(julia).unlink()
+    assert app.launch_options(julia) == ["--threads=4", "-O1"]
+
+    fake_julia.configure(version="1.0.5")
+    app.metadata.path(julia).unlink()
+    assert app.launch_options(julia) == ["-O1"]
@@ -42,7 +42,7 @@ def test_smoke(initialized, args):
         ["locate", "home-dir"],
     ],
 )
-def test_smome_non_initialized(args):
+def test_smome_non_initialized(fake_julia, args):
     cli.run(args)
 
 
@@ -0,0 +1,55 @@
+import subprocess
+from pathlib import Path
+from shutil import which
+
+import pytest  # type: ignore
+
+from ..cli import make_parser
+from ..completion import (
+    CANDIDATES_NAME,
+    JULIA,
+    PROFILE,
+    command_specs,
+    completion_script,
+)
+from ..datastore import LocalStore
+
+
+def test_command_specs():
+    specs = {spec["path"]: spec for spec in command_specs(make_parser())}
+    assert "run" in specs[""]["commands"]
+    assert specs["run"]["positional"] == [JULIA]
+    assert specs["run"]["valued"]["--profile"] == [PROFILE]
+    assert specs["run"]["valued"]["--on-mismatch"] == ["error", "fallback"]
+    assert "--record-precompile" not in specs["run"]["valued"]
+    assert set(specs["locate"]["commands"]) >= {"sysimage", "dir"}
+
+
+@pytest.mark.skipif(not which("bash"), reason="bash is not available")
+def test_bash_completion(tmp_path: Path):
+    script = tmp_path / "jlm.bash"
+    script.write_text(completion_script(make_parser(), "bash"))
+    (tmp_path / ".jlm").mkdir()
+    (tmp_path / ".jlm" / CANDIDATES_NAME).write_text(
+        "julia\t/usr/bin/julia\nprofile\tetl\n"
+    )
+    code = """
+    source {}
+    COMP_WORDS=(jlm run --profile "")
+    COMP_CWORD=3
+    _jlm
+    echo "${{COMPREPLY[*]}}"
+    """.format(
+        script
+    )
+    output = subprocess.check_output(["bash", "-c", code], cwd=str(tmp_path))
+    assert output.decode().split() == ["etl"]
+
+
+def test_candidates_file(cleancwd: Path):
+    (cleancwd / ".jlm").mkdir()
+    store = LocalStore()
+    store.set({"default": "/usr/bin/julia"})
+    store.update_profile("etl", {})
+    text = (cleancwd / ".jlm" / CANDIDATES_NAME).read_text()
+    assert text == "julia\t/usr/bin/julia\nprofile\tetl\n"
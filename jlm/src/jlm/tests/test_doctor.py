@@ -0,0 +1,86 @@
+import json
+import os
+
+from .. import cli
+from ..buildinfo import executable_identity
+from ..datastore import HomeStore
+from ..archive import archive
+from ..doctor import (
+    check_executable,
+    check_path,
+    check_slug_churn,
+    check_stale,
+    check_sysimage,
+)
+from ..metadata import METADATA_NAME
+from ..watch import input_stamps
+
+
+def test_check_executable(tmp_path):
+    julia = tmp_path / "julia"
+    julia.write_text("")
+    info = {"julia": executable_identity(julia)}
+    assert check_executable(str(julia), info, fix="fix") == []
+    assert check_executable(str(julia), None, fix="fix") == []
+
+    julia.write_text("changed")
+    (finding,) = check_executable(str(julia), info, fix="fix")
+    assert finding.check == "julia-changed"
+    assert finding.fix == "fix"
+
+
+def test_check_sysimage(tmp_path):
+    sysimage = tmp_path / "sys.so"
+    (finding,) = check_sysimage(sysimage, fix="fix")
+    assert finding.check == "missing-sysimage"
+
+    sysimage.write_bytes(b"sysimage")
+    assert check_sysimage(sysimage, fix="fix") == []
+
+    archive(sysimage)
+    (finding,) = check_sysimage(sysimage, fix="fix")
+    assert finding.check == "archived-sysimage"
+    assert finding.severity == "info"
+    assert "archived" in finding.message
+
+
+def test_check_stale(tmp_path):
+    project = tmp_path / "Project.toml"
+    info = {"inputs": input_stamps([project])}
+    assert check_stale(info, fix="fix") == []
+
+    project.write_text("[deps]\n")
+    (finding,) = check_stale(info, fix="fix")
+    assert finding.check == "stale-sysimage"
+    assert str(project) in finding.message
+
+
+def test_check_slug_churn(tmp_path):
+    compiled = tmp_path / "compiled" / "v1.6"
+    (compiled / "Few").mkdir(parents=True)
+    (compiled / "Few" / "aaaaa.ji").write_bytes(b"")
+    (compiled / "Many").mkdir()
+    for i in range(20):
+        (compiled / "Many" / "s{:04d}.ji".format(i)).write_bytes(b"")
+    (finding,) = check_slug_churn(tmp_path, "1.6.0")
+    assert "Many (20)" in finding.message
+    assert "Few" not in finding.message
+    assert check_slug_churn(tmp_path, "1.7.0") == []
+
+
+def test_check_path(tmp_path):
+    assert check_path(str(tmp_path)) == []
+    path = os.pathsep.join([str(tmp_path)] * 50 + [str(tmp_path / "missing")])
+    (finding,) = check_path(path)
+    assert finding.severity == "warning"
+    assert finding.fix == "export PATH={}".format(tmp_path)
+
+
+def test_doctor_unusable_julia(initialized, fake_julia, capsys):
+    fake_julia.configure(fail={"metadata": 1})
+    for path in HomeStore.defaultpath.glob("exec/*/" + METADATA_NAME):
+        path.unlink()
+    capsys.readouterr()
+    cli.run(["doctor", "--perf", "--json"])
+    findings = json.loads(capsys.readouterr().out)
+    assert "julia-unusable" in [f["check"] for f in findings]
@@ -0,0 +1,35 @@
+import subprocess
+import time
+
+import pytest  # type: ignore
+
+from .. import cli
+from ..utils import ApplicationError
+
+
+def test_init_invocations(initialized, fake_julia):
+    kinds = [r["kind"] for r in fake_julia.invocations()]
+    assert kinds[0] == "backend"
+    assert "metadata" in kinds
+    (compile,) = fake_julia.invocations("compile")
+    assert compile["args"][0].startswith(str(initialized.parent / "home"))
+
+
+def test_version(fake_julia):
+    fake_julia.configure(version="1.9.2")
+    output = subprocess.check_output([fake_julia.executable, "--version"])
+    assert output == b"julia version 1.9.2\n"
+
+
+def test_latency(fake_julia):
+    fake_julia.configure(latency={"version": 0.2})
+    start = time.monotonic()
+    subprocess.check_call([fake_julia.executable, "--version"])
+    assert time.monotonic() - start >= 0.2
+
+
+def test_failure(cleancwd, fake_julia):
+    fake_julia.configure(fail={"backend": 1})
+    with pytest.raises(ApplicationError):
+        cli.run(["init"])
+    assert not fake_julia.invocations("compile")
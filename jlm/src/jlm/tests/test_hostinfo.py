@@ -0,0 +1,38 @@
+from ..datastore import LocalStore
+from ..hostinfo import HostInfo, select_variant
+
+host = HostInfo("node-01", "AMD EPYC 7742 64-Core Processor", ["avx2", "sse4_2"])
+
+
+def test_select_variant():
+    generic = {"sysimage": "generic.so", "cpu_flags": ["sse4_2"]}
+    avx2 = {"sysimage": "avx2.so", "cpu_flags": ["avx2", "sse4_2"]}
+    avx512 = {"sysimage": "avx512.so", "cpu_flags": ["avx512f"]}
+    epyc = {"sysimage": "epyc.so", "cpu": "*EPYC*", "hostname": "node-*"}
+    other = {"sysimage": "other.so", "hostname": "login-*"}
+
+    assert select_variant([], host) is None
+    assert select_variant([avx512, other], host) is None
+    assert select_variant([generic, avx2, avx512], host) is avx2
+    assert select_variant([avx2, epyc], host) is epyc
+
+
+def test_localstore_variants(tmp_path):
+    store = LocalStore()
+    store.path = tmp_path / ".jlm"
+    store.path.mkdir()
+    store.set_sysimage("julia", "generic.so")
+    store.set_sysimage_variant("julia", {"sysimage": "a.so", "hostname": "n*"})
+    store.set_sysimage_variant("julia", {"sysimage": "b.so", "hostname": "n*"})
+    store.set_sysimage_variant("julia", {"sysimage": "c.so", "cpu": "*EPYC*"})
+    assert [v["sysimage"] for v in store.sysimage_variants("julia")] == [
+        "b.so",
+        "c.so",
+    ]
+
+    store.set_sysimage("julia", "generic2.so")
+    assert store.sysimage("julia") == "generic2.so"
+    assert len(store.sysimage_variants("julia")) == 2
+
+    store.unset_sysimage_variant("julia", {"hostname": "n*"})
+    assert [v["sysimage"] for v in store.sysimage_variants("julia")] == ["c.so"]
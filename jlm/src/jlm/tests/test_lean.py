@@ -0,0 +1,86 @@
+from pathlib import Path
+
+import pytest  # type: ignore
+
+from ..lean import lean_closure, read_manifest
+from ..utils import ApplicationError
+
+PROJECT = """\
+name = "App"
+uuid = "00000000-0000-0000-0000-000000000001"
+
+[deps]
+JSON = "682c06a0-de6a-54ab-a142-c8b1cf79cde6"
+"""
+
+MANIFEST = """\
+# This file is machine-generated - editing it directly is not advised
+
+julia_version = "1.9.0"
+manifest_format = "2.0"
+
+[[deps.Dates]]
+deps = ["Printf"]
+uuid = "ade2ca70-3891-5945-98fb-dc099432e06a"
+
+[[deps.JSON]]
+deps = ["Dates", "Mmap", "Parsers", "Unicode"]
+git-tree-sha1 = "31e996f0a15c7b280ba9f76636b3ff9e2ae58c9a"
+uuid = "682c06a0-de6a-54ab-a142-c8b1cf79cde6"
+version = "0.21.4"
+
+[[deps.LinearAlgebra]]
+deps = ["Libdl"]
+uuid = "37e2e46d-f89d-539d-b4ee-838fcccc9c8e"
+
+[[deps.Mmap]]
+uuid = "a63ad114-7e13-5084-954f-fe012c677804"
+
+[[deps.Parsers]]
+deps = ["Dates"]
+git-tree-sha1 = "a5aef8d4a6e8d81f171b2bd4be5265b01384c74c"
+uuid = "69de0a69-1ddd-5017-9359-2bf0b02dc9f0"
+version = "2.5.10"
+
+[[deps.Printf]]
+deps = ["Unicode"]
+uuid = "de0858da-6303-5e67-8744-51eddeeeb8d7"
+
+[[deps.Unicode]]
+uuid = "4ec0a83e-493e-50e2-b9ac-8f72acf5a8f5"
+"""
+
+
+def test_lean_closure(tmp_path: Path):
+    (tmp_path / "Project.toml").write_text(PROJECT)
+    (tmp_path / "Manifest.toml").write_text(MANIFEST)
+
+    manifest = read_manifest(tmp_path / "Manifest.toml")
+    assert manifest["JSON"]["deps"] == ["Dates", "Mmap", "Parsers", "Unicode"]
+    assert not manifest["JSON"]["stdlib"]
+    assert manifest["Mmap"]["stdlib"]
+
+    closure = lean_closure(
+        tmp_path / "Project.toml",
+        stdlibs=["Dates", "LinearAlgebra", "Mmap", "Printf", "REPL", "Unicode"],
+        statements=[
+            "precompile(Tuple{typeof(JSON.parse), String})",
+            "precompile(Tuple{typeof(REPL.run_repl), Any})",
+        ],
+    )
+    assert closure == {
+        "roots": ["JSON"],
+        "packages": ["JSON", "Parsers"],
+        "stdlibs": ["Dates", "Mmap", "Printf", "Unicode"],
+        "missing_stdlibs": ["REPL"],
+    }
+
+
+def test_lean_closure_manifest_name(tmp_path: Path):
+    (tmp_path / "Project.toml").write_text(PROJECT)
+    with pytest.raises(ApplicationError):
+        lean_closure(tmp_path / "Project.toml")
+
+    (tmp_path / "JuliaManifest.toml").write_text(MANIFEST)
+    closure = lean_closure(tmp_path / "Project.toml", stdlibs=["Dates"])
+    assert closure["packages"] == ["JSON", "Parsers"]
@@ -1,9 +1,10 @@
+import threading
 from pathlib import Path
 
 import pytest  # type: ignore
 
-from ..datastore import LocalStore
-from ..utils import ApplicationError
+from ..datastore import HomeStore, LocalStore
+from ..utils import ApplicationError, atomicopen
 
 
 def test_non_abspath(cleancwd: Path):
@@ -25,3 +26,41 @@ def test_non_abspath(cleancwd: Path):
     if isinstance(str, Path):
         # may not be true in older Python/pytest
         assert store.path == path
+
+
+def test_layered_homestore(tmp_path: Path):
+    system = HomeStore(tmp_path / "system")
+    user = HomeStore(tmp_path / "user", [system.path])
+    julia = "/usr/bin/julia"
+
+    assert user.find(julia, "sys.so") == user.execpath(julia) / "sys.so"
+
+    provisioned = system.execpath(julia) / "sys.so"
+    provisioned.parent.mkdir(parents=True)
+    provisioned.write_bytes(b"")
+    assert user.find(julia, "sys.so") == provisioned
+    assert system.find(julia, "sys.so") == provisioned
+
+
+def test_atomicopen_threads(tmp_path: Path):
+    path = tmp_path / "data.json"
+    contents = [str(i) * 2 ** 20 for i in range(8)]
+    barrier = threading.Barrier(len(contents))
+    errors = []
+
+    def write(content):
+        barrier.wait()
+        try:
+            with atomicopen(path, "w") as file:
+                file.write(content)
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=write, args=(c,)) for c in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert path.read_text() in contents
+    assert list(tmp_path.glob("*.tmp")) == []
@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from .. import cli
+from ..manifests import CACHE_NAME, manifest_digest
+
+
+def current_sysimage(capsys) -> str:
+    capsys.readouterr()
+    cli.run(["locate", "sysimage"])
+    return capsys.readouterr().out
+
+
+def test_manifest_digest_cache(cleancwd: Path):
+    jlm_dir = cleancwd / ".jlm"
+    jlm_dir.mkdir()
+    assert manifest_digest(jlm_dir) is None
+    (cleancwd / "Manifest.toml").write_text("# a\n")
+    digest = manifest_digest(jlm_dir)
+    assert (jlm_dir / CACHE_NAME).exists()
+    assert manifest_digest(jlm_dir) == digest
+    (cleancwd / "Manifest.toml").write_text("# b\n")
+    assert manifest_digest(jlm_dir) != digest
+
+
+def test_switch_manifest(initialized: Path, capsys):
+    default = current_sysimage(capsys)
+    manifest = initialized / "Manifest.toml"
+
+    manifest.write_text("# branch a\n")
+    cli.run(["compile-sysimage"])
+    image_a = current_sysimage(capsys)
+
+    manifest.write_text("# branch b\n")
+    assert current_sysimage(capsys) == default
+    cli.run(["compile-sysimage"])
+    image_b = current_sysimage(capsys)
+    assert image_b not in (default, image_a)
+
+    manifest.write_text("# branch a\n")
+    assert current_sysimage(capsys) == image_a
+    assert Path(image_a).exists()  # not removed as unused
@@ -0,0 +1,68 @@
+import json
+import os
+
+from ..datastore import HomeStore
+from ..metadata import MetadataCache, current_cpu_name
+from .testing import FakeJulia
+
+
+def test_metadata_cache(fake_julia, tmp_path):
+    fake_julia.configure(version="1.1.0", depot_path=["/home/user/.julia"])
+    julia = fake_julia.executable
+    other = FakeJulia(tmp_path / "other")
+    cache = MetadataCache(HomeStore(tmp_path / "home"))
+
+    assert cache.load(julia) is None
+    metadata = cache.get(julia)
+    assert metadata["version"] == "1.1.0"
+    assert metadata["depot_path"] == ["/home/user/.julia"]
+    assert current_cpu_name(metadata) == "skylake"
+    assert cache.get(julia) == metadata
+    assert len(fake_julia.invocations("metadata")) == 1
+
+    result = cache.get_many([julia, other.executable, str(tmp_path / "missing")])
+    assert sorted(result) == sorted([julia, other.executable])
+    assert len(fake_julia.invocations("metadata")) == 1
+    assert len(other.invocations("metadata")) == 1
+
+    st = os.stat(julia)
+    os.utime(julia, (st.st_atime, st.st_mtime + 10))
+    assert cache.load(julia) is None
+
+
+def test_metadata_other_host(fake_julia, tmp_path):
+    fake_julia.configure(version="1.1.0")
+    julia = fake_julia.executable
+    cache = MetadataCache(HomeStore(tmp_path / "home"))
+    metadata = cache.get(julia)
+
+    # Metadata collected on another host sharing the home store:
+    metadata["cpu_name"] = {"another-host": "zen2"}
+    cache.path(julia).write_text(json.dumps(metadata))
+    loaded = cache.load(julia)
+    assert loaded is not None
+    assert loaded["version"] == "1.1.0"
+    assert current_cpu_name(loaded) is None
+    assert cache.get(julia) == loaded
+    assert sorted(cache.get_many([julia])) == [julia]
+    assert len(fake_julia.invocations("metadata")) == 1
+
+    # CPU name is collected only when requested:
+    metadata = cache.get_many([julia], cpu_name=True)[julia]
+    assert current_cpu_name(metadata) == "skylake"
+    assert metadata["cpu_name"]["another-host"] == "zen2"
+    assert len(fake_julia.invocations("metadata")) == 2
+
+
+def test_metadata_depot_env(fake_julia, monkeypatch):
+    fake_julia.configure(depot_path=["/default/depot"])
+    cache = MetadataCache(HomeStore(fake_julia.root / "home"))
+    julia = fake_julia.executable
+
+    monkeypatch.setenv("JULIA_DEPOT_PATH", "/custom/depot")
+    assert cache.get(julia)["depot_path"] == ["/custom/depot"]
+    monkeypatch.delenv("JULIA_DEPOT_PATH")
+    assert cache.load(julia) is None
+    assert cache.get(julia)["depot_path"] == ["/default/depot"]
+    assert cache.get(julia)["depot_path"] == ["/default/depot"]
+    assert len(fake_julia.invocations("metadata")) == 2
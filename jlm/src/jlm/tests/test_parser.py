@@ -23,6 +23,38 @@ def run_args(**kwargs):
             ["run", "bin/julia", "-i", "--"],
             run_args(julia="bin/julia", arguments=["-i", "--"]),
         ),
+        (
+            ["run", "--on-mismatch", "fallback", "-i"],
+            run_args(on_mismatch="fallback", arguments=["-i"]),
+        ),
+        (
+            ["run", "--on-mismatch=fallback", "bin/julia", "-i"],
+            run_args(on_mismatch="fallback", julia="bin/julia", arguments=["-i"]),
+        ),
+        (
+            ["run", "--record-precompile", "bin/julia", "-i"],
+            run_args(record_precompile=True, julia="bin/julia", arguments=["-i"]),
+        ),
+        (
+            ["run", "--supervise", "--record-precompile", "-i"],
+            run_args(supervise=True, record_precompile=True, arguments=["-i"]),
+        ),
+        (
+            ["run", "--profile", "etl", "--", "etl/main.jl"],
+            run_args(profile="etl", arguments=["etl/main.jl"]),
+        ),
+        (
+            ["run", "--spread", "4", "--", "job.jl"],
+            run_args(spread=4, arguments=["job.jl"]),
+        ),
+        (
+            ["run", "--cpus=0-15", "bin/julia", "job.jl"],
+            run_args(cpus="0-15", julia="bin/julia", arguments=["job.jl"]),
+        ),
+        (
+            ["run", "-i", "--on-mismatch=fallback"],
+            run_args(arguments=["-i", "--on-mismatch=fallback"]),
+        ),
     ],
 )
 def test_parse_args(args, included):
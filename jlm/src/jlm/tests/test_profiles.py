@@ -0,0 +1,39 @@
+import stat
+
+from ..application import Application
+
+
+def test_profiles(tmp_path):
+    julia = tmp_path / "julia"
+    julia.write_text("#!/bin/sh\n")
+    julia.chmod(julia.stat().st_mode | stat.S_IEXEC)
+    (tmp_path / ".jlm").mkdir()
+    app = Application(dry_run=False, verbose=False, julia=str(julia))
+    app.localstore.path = tmp_path / ".jlm"
+    app.localstore.set_sysimage(str(julia), "/default.so")
+    app.cli_profile_set(
+        "etl",
+        options=["--threads=4"],
+        env=["ETL=1"],
+        scripts=["etl/*.jl"],
+        project=None,
+    )
+    app.cli_set_sysimage("/etl.so", profile="etl")
+
+    cmd, env = app.launch_command([str(tmp_path / "web.jl")])
+    assert cmd == [str(julia), "--sysimage", "/default.so", str(tmp_path / "web.jl")]
+    assert "ETL" not in env
+
+    cmd, env = app.launch_command([str(tmp_path / "etl" / "main.jl")])
+    assert cmd[1:4] == ["--sysimage", "/etl.so", "--threads=4"]
+    assert env["ETL"] == "1"
+
+    cmd, _ = app.launch_command(["-e", "1"], profile="etl")
+    assert cmd[1:3] == ["--sysimage", "/etl.so"]
+    # The selected profile does not leak into later calls (e.g., of
+    # other requests to `jlm serve` sharing this `Application`):
+    assert app.julia_cmd() == [str(julia), "--sysimage", "/default.so"]
+    assert "ETL" not in app.launch_env()
+
+    app.cli_unset_sysimage(profile="etl")
+    assert "sysimage" not in app.localstore.profile("etl")
@@ -0,0 +1,84 @@
+import os
+import time
+from pathlib import Path
+
+from .. import cli
+from ..datastore import HomeStore
+from ..retention import StoreRegistry, last_used, lastuse_path, record_use
+from ..utils import dlext
+from ..watch import sysimages_dir
+
+
+def test_record_use(tmp_path: Path):
+    sysimage = tmp_path / ("sys." + dlext)
+    sysimage.write_text("")
+    os.utime(str(sysimage), (0, 1000))
+    assert last_used(sysimage) == 1000
+
+    record_use(sysimage, now=5000)
+    assert last_used(sysimage) == 5000
+    # Not updated within the resolution:
+    record_use(sysimage, now=5010)
+    assert last_used(sysimage) == 5000
+    # Independent of the access time of the image:
+    os.utime(str(sysimage), (9000, 1000))
+    assert last_used(sysimage) == 5000
+
+
+def test_registry(tmp_path: Path):
+    registry = StoreRegistry(tmp_path / "home")
+    alive = tmp_path / "a" / ".jlm"
+    alive.mkdir(parents=True)
+    (alive / "data.json").write_text("{}")
+    registry.register(alive)
+    registry.register(tmp_path / "b" / ".jlm")
+    registry.register(alive)
+    assert len(registry.load()) == 2
+    assert registry.live() == [alive]
+    assert registry.load() == [str(alive)]
+
+
+def make_old(path: Path, days: float = 100):
+    old = time.time() - days * 24 * 60 * 60
+    os.utime(str(path), (old, old))
+
+
+def test_prune(initialized: Path, capsys):
+    jlm_dir = initialized / ".jlm"
+    assert StoreRegistry(HomeStore.defaultpath).load() == [str(jlm_dir)]
+
+    (initialized / "Manifest.toml").write_text("# a\n")
+    cli.run(["compile-sysimage"])
+    capsys.readouterr()
+    cli.run(["locate", "sysimage"])
+    registered = Path(capsys.readouterr().out)
+    make_old(registered)
+
+    stale = sysimages_dir(jlm_dir) / ("sys-stale." + dlext)
+    stale.write_text("stale")
+    make_old(stale)
+    recent = sysimages_dir(jlm_dir) / ("sys-recent." + dlext)
+    recent.write_text("recent")
+    make_old(recent)
+    record_use(recent)
+
+    orphan = HomeStore.defaultpath / "exec" / ("0" * 40) / ("sys." + dlext)
+    orphan.parent.mkdir(parents=True)
+    orphan.write_text("orphan")
+    make_old(orphan)
+
+    cli.run(["--dry-run", "prune", "--keep-days", "30"])
+    assert stale.exists()
+
+    cli.run(["prune", "--keep-days", "30"])
+    assert not stale.exists()
+    assert not orphan.parent.exists()
+    assert recent.exists()
+    assert registered.exists()
+
+    cli.run(["prune", "--max-size", "0"])
+    assert not recent.exists()
+    assert not lastuse_path(recent).exists()
+    assert registered.exists()
+    # The default system image of the Julia in use is kept:
+    assert list(HomeStore.defaultpath.glob("exec/*/sys." + dlext))
@@ -0,0 +1,91 @@
+import os
+import subprocess
+import sys
+
+from ..runstats import RunStats, summarize, supervise
+
+
+def test_supervise():
+    status, usage = supervise(
+        [sys.executable, "-c", "raise SystemExit(3)"], dict(os.environ)
+    )
+    assert os.WEXITSTATUS(status) == 3
+    assert usage["returncode"] == 3
+    assert usage["wall_time"] > 0
+
+    status, usage = supervise(
+        [sys.executable, "-c", "import os; os.kill(os.getpid(), 15)"],
+        dict(os.environ),
+    )
+    assert os.WIFSIGNALED(status)
+    assert usage["signal"] == 15
+
+
+def test_exit_like_flushes():
+    code = (
+        "import sys; from jlm.runstats import exit_like;"
+        " print('out', end=''); print('err', end='', file=sys.stderr);"
+        " exit_like({})"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    env.pop("PYTHONUNBUFFERED", None)
+    for status in [3 << 8, 15]:
+        proc = subprocess.run(
+            [sys.executable, "-c", code.format(status)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        assert proc.returncode == (3 if status == 3 << 8 else -15)
+        assert proc.stdout == b"out"
+        assert proc.stderr == b"err"
+
+
+SIGNAL_WINDOW = """
+import os, signal, subprocess, sys
+from jlm import runstats
+
+popen = subprocess.Popen
+
+
+def racy_popen(*args, **kwargs):
+    if sys.argv[1] == "before":
+        os.kill(os.getpid(), signal.SIGTERM)
+    proc = popen(*args, **kwargs)
+    if sys.argv[1] == "after":
+        os.kill(os.getpid(), signal.SIGTERM)
+    return proc
+
+
+runstats.subprocess.Popen = racy_popen
+cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+status, usage = runstats.supervise(cmd, dict(os.environ))
+print(usage.get("signal"))
+"""
+
+
+def test_supervise_signal_at_launch():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    for when in ["before", "after"]:
+        proc = subprocess.run(
+            [sys.executable, "-c", SIGNAL_WINDOW, when],
+            stdout=subprocess.PIPE,
+            env=env,
+            timeout=20,
+        )
+        # SIGTERM is forwarded to Julia and the supervisor survives:
+        assert proc.returncode == 0
+        assert proc.stdout == b"15\n"
+
+
+def test_ring_buffer(tmp_path):
+    stats = RunStats(tmp_path, capacity=3)
+    for i in range(5):
+        stats.append(
+            {"julia": "j", "sysimage": "s", "started": i, "wall_time": float(i)}
+        )
+    records = stats.load()
+    assert [r["started"] for r in records] == [2, 3, 4]
+    (summary,) = summarize(records)
+    assert summary["runs"] == 3
+    assert summary["wall_time"]["max"] == 4.0
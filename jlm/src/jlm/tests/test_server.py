@@ -0,0 +1,123 @@
+import json
+import socket
+import threading
+
+import pytest  # type: ignore
+
+from .. import api
+from ..datastore import LocalStore
+from ..server import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    Dispatcher,
+    Server,
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    jlm_dir = tmp_path / "project" / ".jlm"
+    jlm_dir.mkdir(parents=True)
+    store = LocalStore()
+    store.path = jlm_dir
+    store.set({"default": "/opt/julia/bin/julia", "runtime": {}})
+    return store
+
+
+def call(dispatcher, method, **params):
+    request = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params}
+    return json.loads(dispatcher.handle_line(json.dumps(request)))
+
+
+def test_api(project):
+    cwd = project.path.parent / "sub" / "dir"
+    cwd.mkdir(parents=True)
+    resolution = api.resolve(cwd=cwd)
+    assert resolution.julia == "/opt/julia/bin/julia"
+    assert resolution.precompile_key == str(project.path)
+    assert api.locate_dir(cwd=cwd) == str(project.path)
+
+    argv, env = api.launch_command(["-e", "1"], jlm_dir=project.path)
+    assert argv == [
+        "/opt/julia/bin/julia",
+        "--sysimage",
+        resolution.sysimage,
+        "-e",
+        "1",
+    ]
+    assert env == {"JLM_PRECOMPILE_KEY": str(project.path)}
+
+
+def test_dispatcher(project):
+    dispatcher = Dispatcher()
+    jlm_dir = str(project.path)
+
+    response = call(dispatcher, "locate_sysimage", jlm_dir=jlm_dir)
+    assert response["result"].endswith("sys.so")
+
+    project.set_sysimage("/opt/julia/bin/julia", "/some/sys.so")
+    response = call(dispatcher, "locate_sysimage", jlm_dir=jlm_dir)
+    assert response["result"] == "/some/sys.so"
+
+    response = call(dispatcher, "launch_command", jlm_dir=jlm_dir, arguments=["-i"])
+    assert response["result"]["argv"][-1] == "-i"
+
+    response = call(dispatcher, "no_such_method")
+    assert response["error"]["code"] == METHOD_NOT_FOUND
+
+    response = json.loads(dispatcher.handle_line("{"))
+    assert response["error"]["code"] == PARSE_ERROR
+
+    response = call(dispatcher, "ping", jlm_dir=jlm_dir)
+    assert response["error"]["code"] == INVALID_PARAMS
+    response = call(dispatcher, "locate_dir", jlm_dir=jlm_dir, no_such_param=1)
+    assert response["error"]["code"] == INVALID_PARAMS
+
+
+def test_dispatcher_errors(project, monkeypatch):
+    dispatcher = Dispatcher()
+    jlm_dir = str(project.path)
+
+    def broken(*_):
+        raise TypeError("bug")
+
+    monkeypatch.setattr(api, "describe", broken)
+    response = call(dispatcher, "info", jlm_dir=jlm_dir)
+    assert response["error"]["code"] == INTERNAL_ERROR
+
+    monkeypatch.setattr(api, "describe", lambda _: 1 // 0)
+    response = call(dispatcher, "info", jlm_dir=jlm_dir)
+    assert response["error"]["code"] == INTERNAL_ERROR
+    assert "ZeroDivisionError" in response["error"]["message"]
+
+
+def test_server(project, tmp_path):
+    path = tmp_path / "server.sock"
+    server = Server(path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(str(path))
+            file = sock.makefile("rw")
+            for i in range(3):
+                request = {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "locate_dir",
+                    "params": {"jlm_dir": str(project.path)},
+                }
+                file.write(json.dumps(request) + "\n")
+                file.flush()
+                response = json.loads(file.readline())
+                assert response == {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "result": str(project.path),
+                }
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
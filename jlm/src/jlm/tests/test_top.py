@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest  # type: ignore
+
+from ..top import group, scan
+
+# Map `sys.so` (given as `--sysimage`), touch all its pages and wait:
+code = """
+import mmap, sys
+with open(sys.argv[2], "rb") as file:
+    m = mmap.mmap(file.fileno(), 0, prot=mmap.PROT_READ)
+    sum(m[i] for i in range(0, len(m), 4096))
+    print("ready", flush=True)
+    sys.stdin.read()
+"""
+
+
+@pytest.mark.skipif(not Path("/proc/self/smaps").exists(), reason="needs procfs")
+def test_scan(tmp_path: Path):
+    sysimage = tmp_path / "sys.so"
+    sysimage.write_bytes(os.urandom(64 * 4096))
+    env = dict(os.environ, JLM_PRECOMPILE_KEY=str(tmp_path / ".jlm"))
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", code, "--sysimage", str(sysimage)],
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=str(tmp_path),
+        )
+        for _ in range(2)
+    ]
+    try:
+        for proc in procs:
+            assert proc.stdout.readline() == b"ready\n"  # type: ignore
+        records = [r for r in scan() if r["project"] == str(tmp_path / ".jlm")]
+    finally:
+        for proc in procs:
+            proc.communicate(b"")
+    assert sorted(r["pid"] for r in records) == sorted(p.pid for p in procs)
+    assert all(r["sysimage"] == os.path.realpath(str(sysimage)) for r in records)
+    assert all(r["sysimage_rss"] == 64 * 4096 for r in records)
+
+    (entry,) = group(records)
+    assert entry["sysimage_shared"] == 2 * 64 * 4096
+    assert entry["saved"] == 64 * 4096
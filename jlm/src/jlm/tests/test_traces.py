@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+
+from .. import cli
+from ..traces import (
+    Corpus,
+    lock_trace,
+    new_trace_path,
+    pending_traces,
+    read_statements,
+    trace_in_use,
+)
+
+
+def test_corpus(tmp_path):
+    jlm_dir = tmp_path / ".jlm"
+    for statements in [["a", "b"], ["a", "c", "c"], ["a", "b"]]:
+        path = new_trace_path(jlm_dir).with_name("{}.jl".format(len(statements)))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("# comment\n" + "\n".join(statements) + "\n")
+        corpus = Corpus.load(jlm_dir)
+        corpus.add_run(read_statements(path))
+        corpus.store()
+        path.unlink()
+
+    assert pending_traces(jlm_dir) == []
+    corpus = Corpus.load(jlm_dir)
+    assert corpus.runs == 3
+    assert corpus.counts == {"a": 3, "b": 2, "c": 1}
+    assert corpus.statements() == ["a", "b", "c"]
+    assert corpus.statements(min_count=2) == ["a", "b"]
+
+    assert corpus.prune(2) == ["c"]
+    corpus.remove(["b"])
+    assert corpus.statements() == ["a"]
+
+
+def test_verify_is_not_traced(initialized, fake_julia):
+    jlm_dir = initialized / ".jlm"
+    cli.run(["traces", "enable"])
+    path = new_trace_path(jlm_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("a\nb\n")
+    os.utime(str(path), (0, 0))
+
+    cli.run(["traces", "compact"])
+    (verify,) = fake_julia.invocations("verify")
+    assert not any(a.startswith("--trace-compile") for a in verify["argv"])
+    assert pending_traces(jlm_dir) == []
+    assert Corpus.load(jlm_dir).counts == {"a": 1, "b": 1}
+
+
+def test_compact_skips_live_traces(initialized):
+    jlm_dir = initialized / ".jlm"
+    path = new_trace_path(jlm_dir)
+    path.parent.mkdir(parents=True)
+    fd = lock_trace(path)
+    # A long-running Julia inheriting the lock:
+    proc = subprocess.Popen(
+        [sys.executable, "-c", "import sys; sys.stdin.read()"],
+        stdin=subprocess.PIPE,
+        pass_fds=[fd],
+    )
+    os.close(fd)
+    try:
+        path.write_text("a\n")
+        os.utime(str(path), (0, 0))
+        assert trace_in_use(path)
+        cli.run(["traces", "compact", "--no-verify"])
+        assert path.exists()
+        assert Corpus.load(jlm_dir).runs == 0
+    finally:
+        proc.communicate(b"")
+
+    assert not trace_in_use(path)
+    cli.run(["traces", "compact", "--no-verify"])
+    assert not path.exists()
+    assert Corpus.load(jlm_dir).counts == {"a": 1}
@@ -0,0 +1,56 @@
+import mmap
+import os
+
+from .. import cli
+from ..procfs import mapped_paths
+from ..watch import input_paths, input_stamps, is_outdated, versioned_sysimage_path
+
+
+def test_versioned_sysimage_path(tmp_path):
+    first = versioned_sysimage_path(tmp_path)
+    first.parent.mkdir()
+    first.write_bytes(b"")
+    second = versioned_sysimage_path(tmp_path)
+    assert first != second
+    assert first.parent == second.parent
+
+
+def test_input_stamps(tmp_path):
+    jlm_dir = tmp_path / ".jlm"
+    paths = input_paths(jlm_dir, precompile_traces=False)
+    stamps = input_stamps(paths)
+    assert set(stamps.values()) == {None}
+    assert not is_outdated({"inputs": stamps}, input_stamps(paths))
+
+    (tmp_path / "Project.toml").write_text("[deps]\n")
+    assert is_outdated({"inputs": stamps}, input_stamps(paths))
+    assert is_outdated(None, stamps)
+
+    (tmp_path / "JuliaManifest.toml").write_text("# a\n")
+    paths = input_paths(jlm_dir, precompile_traces=False)
+    assert tmp_path / "JuliaManifest.toml" in paths
+    assert tmp_path / "Manifest.toml" not in paths
+
+
+def test_mapped_paths(tmp_path):
+    mapped = tmp_path / "mapped"
+    unmapped = tmp_path / "unmapped"
+    for path in [mapped, unmapped]:
+        path.write_bytes(b"x" * 4096)
+    with open(str(mapped), "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ):
+            if not os.path.exists("/proc/self/maps"):
+                return
+            assert mapped_paths([mapped, unmapped]) == [mapped]
+    assert mapped_paths([mapped, unmapped]) == []
+
+
+def test_watch_installs_backend(initialized, fake_julia):
+    (initialized / "Manifest.toml").write_text("# a\n")
+    installed = len(fake_julia.invocations("backend"))
+    compiled = len(fake_julia.invocations("compile"))
+    cli.run(["watch", "--once", "--settle", "0"])
+    cli.run(["watch", "--once", "--settle", "0"])
+    # Once per `jlm watch` (not per build):
+    assert len(fake_julia.invocations("backend")) == installed + 2
+    assert len(fake_julia.invocations("compile")) == compiled + 1
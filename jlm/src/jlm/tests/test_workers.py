@@ -0,0 +1,43 @@
+import json
+from shutil import which
+
+import pytest  # type: ignore
+
+from .. import cli
+from ..traces import tracedir
+from ..workers import available_cores, numa_nodes, pinning_prefixes
+
+
+@pytest.mark.skipif(not which("taskset"), reason="taskset is not available")
+def test_pin_cores():
+    cores = available_cores()
+    prefixes = pinning_prefixes(len(cores) + 1, "cores")
+    assert prefixes[0] == ["taskset", "-c", str(cores[0])]
+    assert prefixes[-1] == prefixes[0]
+
+
+@pytest.mark.skipif(not which("numactl"), reason="numactl is not available")
+def test_pin_numa():
+    node = numa_nodes()[0]
+    assert pinning_prefixes(1, "numa") == [
+        ["numactl", "--cpunodebind={}".format(node), "--membind={}".format(node)]
+    ]
+
+
+def test_unknown_pinning():
+    with pytest.raises(ValueError):
+        pinning_prefixes(1, "sockets")
+
+
+def test_workers_cmd_is_not_traced(initialized, capsys):
+    cli.run(["traces", "enable"])
+    capsys.readouterr()
+    cli.run(["workers-cmd", "--count", "2", "--json"])
+    spec = json.loads(capsys.readouterr().out)
+    for command in spec["commands"] + [spec["exeflags"]]:
+        assert not any(a.startswith("--trace-compile") for a in command)
+    assert not tracedir(initialized / ".jlm").exists()
+
+    # ...but `jlm run` is:
+    cli.run(["--dry-run", "--verbose", "run", "-e", "1"])
+    assert "--trace-compile=" in capsys.readouterr().out
@@ -1,8 +1,13 @@
+import json
 import os
+import shlex
+import stat
+import sys
 from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
-from ..utils import pathstr
+from ..utils import _Pathish, pathstr
 
 
 @contextmanager
@@ -15,3 +20,58 @@ def changingdir(newcwd):
         yield newcwd
     finally:
         os.chdir(pathstr(oldcwd))
+
+
+class FakeJulia:
+    """
+    A fake ``julia`` executable (see `jlm.tests.fakejulia`) in
+    ``ROOT/bin``.  Its configuration and the records of invocations
+    are stored in `root`.
+    """
+
+    # root: Path
+
+    def __init__(self, root: _Pathish):
+        self.root = Path(root)
+        self.bindir.mkdir(parents=True, exist_ok=True)
+        script = Path(__file__).with_name("fakejulia.py")
+        executable = self.bindir / "julia"
+        executable.write_text(
+            "#!/bin/sh\nFAKE_JULIA_DIR={} exec {} {} \"$@\"\n".format(
+                shlex.quote(pathstr(self.root)),
+                shlex.quote(sys.executable),
+                shlex.quote(pathstr(script)),
+            )
+        )
+        executable.chmod(executable.stat().st_mode | stat.S_IEXEC)
+        self.configure(depot_path=[pathstr(self.root / "depot")])
+
+    @property
+    def bindir(self) -> Path:
+        return self.root / "bin"
+
+    @property
+    def executable(self) -> str:
+        return pathstr(self.bindir / "julia")
+
+    @property
+    def config_path(self) -> Path:
+        return self.root / "config.json"
+
+    def configure(self, **config: Any) -> None:
+        """
+        Update the behavior; see `jlm.tests.fakejulia.DEFAULTS`.
+        """
+        current = {}  # type: Dict[str, Any]
+        if self.config_path.exists():
+            current = json.loads(self.config_path.read_text())
+        current.update(config)
+        self.config_path.write_text(json.dumps(current))
+
+    def invocations(self, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        try:
+            text = (self.root / "invocations.jsonl").read_text()
+        except FileNotFoundError:
+            return []
+        records = [json.loads(line) for line in text.splitlines()]
+        return [r for r in records if kind is None or r["kind"] == kind]
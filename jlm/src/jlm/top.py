@@ -0,0 +1,188 @@
+"""
+Memory usage and system image page sharing of running Julia processes
+(``jlm top``).
+
+Processes launched by ``jlm`` are found by ``$JLM_PRECOMPILE_KEY`` in
+``/proc/PID/environ``; its value is the ``.jlm`` directory of the
+project.  For each process, the whole-process RSS/PSS are read from
+``/proc/PID/smaps_rollup`` and the usage of the system image mapping
+from ``/proc/PID/smaps``.  Pages of a system image shared by ``N``
+processes count ``1/N`` towards the PSS of each process; the memory
+saved by sharing is the sum of the RSS minus the sum of the PSS of the
+system image mappings.
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .builds import format_size
+from .procfs import PROC, pids, read_cmdline, read_environ, smaps, smaps_rollup
+from .utils import dlext
+
+Record = Dict[str, Any]
+
+KEY_VARIABLE = "JLM_PRECOMPILE_KEY"
+
+
+def sysimage_argument(cmdline: List[str]) -> Optional[str]:
+    """
+    Return the system image passed to Julia, if any.
+
+    >>> sysimage_argument(["julia", "--sysimage", "a.so", "run.jl"])
+    'a.so'
+    >>> sysimage_argument(["julia", "-Jb.so"])
+    'b.so'
+    >>> sysimage_argument(["julia", "--sysimage=c.so", "--", "-J", "x"])
+    'c.so'
+    """
+    for (i, arg) in enumerate(cmdline):
+        if arg == "--":
+            break
+        if arg in ("--sysimage", "-J") and i + 1 < len(cmdline):
+            return cmdline[i + 1]
+        if arg.startswith("--sysimage="):
+            return arg[len("--sysimage=") :]
+        if arg.startswith("-J") and len(arg) > 2:
+            return arg[2:]
+    return None
+
+
+def find_sysimage(pid: int, cmdline: List[str], paths: List[str]) -> Optional[str]:
+    """
+    Path (as in ``smaps``) of the system image mapped by process `pid`.
+    """
+    sysimage = sysimage_argument(cmdline)
+    if sysimage is not None:
+        try:
+            cwd = os.readlink(str(PROC / str(pid) / "cwd"))
+        except OSError:
+            cwd = "/"
+        sysimage = os.path.realpath(os.path.join(cwd, sysimage))
+        if sysimage in paths:
+            return sysimage
+    # The default system image of Julia:
+    for path in paths:
+        if os.path.basename(path) == "sys." + dlext:
+            return path
+    return None
+
+
+def scan() -> List[Record]:
+    """
+    Memory usage of the (readable) processes launched by ``jlm``.
+    """
+    records = []
+    for pid in pids():
+        if pid == os.getpid():
+            continue
+        environ = read_environ(pid)
+        if not environ or KEY_VARIABLE not in environ:
+            continue
+        cmdline = read_cmdline(pid) or []
+        total = smaps_rollup(pid)
+        mappings = smaps(pid)
+        if total is None or mappings is None:
+            continue
+        sysimage = find_sysimage(pid, cmdline, list(mappings))
+        usage = mappings.get(sysimage, {}) if sysimage else {}
+        records.append(
+            {
+                "pid": pid,
+                "project": environ[KEY_VARIABLE],
+                "sysimage": sysimage,
+                "command": cmdline,
+                "rss": total.get("Rss", 0),
+                "pss": total.get("Pss", 0),
+                "sysimage_rss": usage.get("Rss", 0),
+                "sysimage_pss": usage.get("Pss", 0),
+                "sysimage_shared": usage.get("Shared_Clean", 0)
+                + usage.get("Shared_Dirty", 0),
+                "sysimage_private": usage.get("Private_Clean", 0)
+                + usage.get("Private_Dirty", 0),
+            }
+        )
+    return records
+
+
+SUMMED = (
+    "rss",
+    "pss",
+    "sysimage_rss",
+    "sysimage_pss",
+    "sysimage_shared",
+    "sysimage_private",
+)
+
+
+def group(records: List[Record]) -> List[Record]:
+    """
+    Summarize `records` by project and system image.
+
+    >>> groups = group([
+    ...     {"pid": 1, "project": "/p/.jlm", "sysimage": "/s.so", "rss": 10,
+    ...      "pss": 6, "sysimage_rss": 8, "sysimage_pss": 4,
+    ...      "sysimage_shared": 8, "sysimage_private": 0},
+    ...     {"pid": 2, "project": "/p/.jlm", "sysimage": "/s.so", "rss": 10,
+    ...      "pss": 6, "sysimage_rss": 8, "sysimage_pss": 4,
+    ...      "sysimage_shared": 8, "sysimage_private": 0},
+    ... ])
+    >>> [(g["pids"], g["pss"], g["saved"]) for g in groups]
+    [([1, 2], 12, 8)]
+    """
+    groups = {}  # type: Dict[Tuple[str, Optional[str]], Record]
+    for record in sorted(records, key=lambda r: r["pid"]):
+        key = (record["project"], record["sysimage"])
+        if key not in groups:
+            groups[key] = {"project": key[0], "sysimage": key[1], "pids": []}
+            groups[key].update((k, 0) for k in SUMMED)
+        entry = groups[key]
+        entry["pids"].append(record["pid"])
+        for k in SUMMED:
+            entry[k] += record[k]
+    for entry in groups.values():
+        entry["saved"] = entry["sysimage_rss"] - entry["sysimage_pss"]
+    return sorted(groups.values(), key=lambda g: -g["pss"])
+
+
+HEADER = "{:>8} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+    "PID", "RSS", "PSS", "IMG RSS", "IMG PSS", "SHARED", "PRIVATE"
+)
+
+
+def format_record(record: Record, label: Optional[str] = None) -> str:
+    return "{:>8} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9}".format(
+        record["pid"] if label is None else label,
+        *(format_size(record[k]) for k in SUMMED)
+    )
+
+
+def format_report(records: List[Record]) -> str:
+    if not records:
+        return "No Julia process launched by jlm is found."
+    lines = []
+    byproject = {}  # type: Dict[Tuple[str, Optional[str]], List[Record]]
+    for record in records:
+        byproject.setdefault((record["project"], record["sysimage"]), []).append(
+            record
+        )
+    groups = group(records)
+    for entry in groups:
+        lines.append("Project     : {}".format(os.path.dirname(entry["project"])))
+        lines.append("System image: {}".format(entry["sysimage"] or "(unknown)"))
+        lines.append(HEADER)
+        members = byproject[(entry["project"], entry["sysimage"])]
+        for record in sorted(members, key=lambda r: -r["pss"]):
+            lines.append(format_record(record))
+        lines.append(format_record(entry, "total"))
+        lines.append(
+            "Saved by sharing the system image: {}".format(format_size(entry["saved"]))
+        )
+        lines.append("")
+    lines.append(
+        "{} processes, PSS {}, saved by sharing system images: {}".format(
+            len(records),
+            format_size(sum(g["pss"] for g in groups)),
+            format_size(sum(g["saved"] for g in groups)),
+        )
+    )
+    return "\n".join(lines)
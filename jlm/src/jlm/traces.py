@@ -0,0 +1,177 @@
+"""
+Precompile statements recorded by ``jlm run --record-precompile``.
+
+Each run writes the output of ``julia --trace-compile`` to
+``.jlm/traces/runs/*.jl``.  ``jlm traces compact`` merges them into
+the corpus ``.jlm/traces/corpus.json`` which records, for each
+statement, the number of runs in which it was compiled.  The
+statements are then written to ``.jlm/traces/precompile.jl`` (most
+frequent first) which can be used as the precompile input of system
+image builds.
+
+A trace file is created with a shared `flock` held by the launcher
+which is inherited by Julia (``exec``) or outlives it (``--supervise``).
+Julia may stop appending to the file long before it exits, so
+``jlm traces compact`` merges only the files no longer locked.
+"""
+
+import fcntl
+import json
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+
+from .utils import _Pathish, atomicopen, pathstr
+
+CORPUS_NAME = "corpus.json"
+PRECOMPILE_NAME = "precompile.jl"
+
+# Julia script to be run with the path to a file with one statement
+# per line.  It prints the (1-origin) line numbers of the statements
+# that cannot be evaluated.
+verify_script = """
+function tryeval(ex)
+    for _ in 1:3
+        try
+            return Core.eval(Main, ex) !== false
+        catch err
+            # Try loading a package referred in the statement:
+            err isa UndefVarError || return false
+            try
+                Core.eval(Main, Expr(:import, Expr(:., err.var)))
+            catch
+                return false
+            end
+        end
+    end
+    return false
+end
+
+for (i, line) in enumerate(eachline(ARGS[1]))
+    ex = try
+        Meta.parse(line)
+    catch
+        nothing
+    end
+    if ex === nothing || !tryeval(ex)
+        println(i)
+    end
+end
+"""
+
+
+def tracedir(jlm_dir: _Pathish) -> Path:
+    return Path(jlm_dir) / "traces"
+
+
+def new_trace_path(jlm_dir: _Pathish) -> Path:
+    name = "{}-{}-{}.jl".format(
+        time.strftime("%Y%m%dT%H%M%S"), socket.gethostname(), os.getpid()
+    )
+    return tracedir(jlm_dir) / "runs" / name
+
+
+def lock_trace(path: _Pathish) -> int:
+    """
+    Create trace file `path` and return a file descriptor holding the
+    lock on it.  The descriptor is inheritable so that the lock is kept
+    until Julia exits.  The file appears atomically with the lock held.
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(pathstr(tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    fcntl.flock(fd, fcntl.LOCK_SH)
+    os.set_inheritable(fd, True)
+    os.replace(pathstr(tmp), pathstr(path))
+    return fd
+
+
+def trace_in_use(path: _Pathish) -> bool:
+    """
+    Check if the trace file `path` may still be written by Julia.
+    """
+    try:
+        fd = os.open(pathstr(path), os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+    return False
+
+
+def read_statements(path: _Pathish) -> Iterator[str]:
+    with open(pathstr(path)) as file:
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+class Corpus:
+    # path: Path
+    # counts: Dict[str, int]
+    # runs: int
+
+    def __init__(self, path: _Pathish):
+        self.path = Path(path)
+        self.counts = {}  # type: Dict[str, int]
+        self.runs = 0
+        try:
+            with open(pathstr(self.path)) as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        self.counts = data["counts"]
+        self.runs = data["runs"]
+
+    @classmethod
+    def load(cls, jlm_dir: _Pathish) -> "Corpus":
+        return cls(tracedir(jlm_dir) / CORPUS_NAME)
+
+    def store(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with atomicopen(self.path, "w") as file:
+            json.dump({"runs": self.runs, "counts": self.counts}, file, indent=0)
+
+    def add_run(self, statements: Iterable[str]) -> None:
+        for stmt in set(statements):
+            self.counts[stmt] = self.counts.get(stmt, 0) + 1
+        self.runs += 1
+
+    def remove(self, statements: Iterable[str]) -> None:
+        for stmt in statements:
+            self.counts.pop(stmt, None)
+
+    def prune(self, min_count: int) -> List[str]:
+        pruned = [s for (s, c) in self.counts.items() if c < min_count]
+        self.remove(pruned)
+        return pruned
+
+    def statements(self, min_count: int = 1) -> List[str]:
+        """
+        Statements compiled in at least `min_count` runs; most frequent first.
+        """
+        selected = [s for (s, c) in self.counts.items() if c >= min_count]
+        selected.sort(key=lambda s: (-self.counts[s], s))
+        return selected
+
+
+def pending_traces(jlm_dir: _Pathish) -> List[Path]:
+    """
+    Trace files not merged into the corpus yet.
+    """
+    return sorted((tracedir(jlm_dir) / "runs").glob("*.jl"))
+
+
+def write_statements(path: _Pathish, statements: Iterable[str]) -> None:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with atomicopen(path, "w") as file:
+        for stmt in statements:
+            file.write(stmt)
+            file.write("\n")
@@ -1,8 +1,11 @@
+import hashlib
 import os
 import pathlib
 import sys
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Tuple, Union
+from typing import IO, Iterator, List, Tuple, Union
 
 Cmd = List[str]
 
@@ -45,5 +48,26 @@ def absolutepath(path: _Pathish) -> Path:
     return p.absolute()
 
 
+@contextmanager
+def atomicopen(path: _Pathish, *args) -> Iterator[IO]:
+    # Unique per thread since `jlm serve` writes from multiple threads:
+    tmppath = Path("{}.{}-{}.tmp".format(path, os.getpid(), threading.get_ident()))
+    try:
+        with open(pathstr(tmppath), *args) as file:
+            yield file
+        tmppath.rename(path)
+    finally:
+        if tmppath.exists():
+            os.remove(tmppath)
+
+
 class ApplicationError(RuntimeError):
     pass
+
+
+def file_digest(path: _Pathish, algorithm: str = "sha256") -> str:
+    m = hashlib.new(algorithm)
+    with open(pathstr(path), "rb") as file:
+        for chunk in iter(lambda: file.read(2 ** 20), b""):
+            m.update(chunk)
+    return m.hexdigest()
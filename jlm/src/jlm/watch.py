@@ -0,0 +1,83 @@
+"""
+Support for ``jlm watch``; rebuilding project system image in background.
+
+Each build is written to a new file ``.jlm/sysimages/sys-TIMESTAMP.so``
+and then registered in ``data.json`` (which is replaced atomically).
+Running processes keep using the file they have mapped and the new
+launches pick up the new image.  Old images are removed once they are
+neither registered nor mapped by any process.
+"""
+
+import os
+import time
+from pathlib import Path
+from shutil import which
+from typing import Any, Dict, List, Optional
+
+from .archive import find_sysimages
+from .manifests import manifest_path
+from .traces import PRECOMPILE_NAME, tracedir
+from .utils import Cmd, _Pathish, dlext, pathstr
+
+SYSIMAGES_DIR = "sysimages"
+
+# Inputs are recorded as {path: [mtime_ns, size]} (or `None` if the
+# file does not exist) in the build information.
+Stamps = Dict[str, Optional[List[int]]]
+
+
+def sysimages_dir(jlm_dir: _Pathish) -> Path:
+    return Path(jlm_dir) / SYSIMAGES_DIR
+
+
+def versioned_sysimage_path(jlm_dir: _Pathish) -> Path:
+    directory = sysimages_dir(jlm_dir)
+    stem = "sys-" + time.strftime("%Y%m%dT%H%M%S")
+    path = directory / "{}.{}".format(stem, dlext)
+    i = 1
+    while path.exists():
+        i += 1
+        path = directory / "{}-{}.{}".format(stem, i, dlext)
+    return path
+
+
+def versioned_sysimages(jlm_dir: _Pathish) -> List[Path]:
+    return find_sysimages(sysimages_dir(jlm_dir), "sys-*." + dlext)
+
+
+def input_paths(jlm_dir: _Pathish, precompile_traces: bool) -> List[Path]:
+    base = Path(jlm_dir).parent
+    # The manifest may not exist yet:
+    manifest = manifest_path(base) or base / "Manifest.toml"
+    paths = [base / "Project.toml", manifest]
+    if precompile_traces:
+        paths.append(tracedir(jlm_dir) / PRECOMPILE_NAME)
+    return paths
+
+
+def input_stamps(paths: List[Path]) -> Stamps:
+    stamps = {}  # type: Stamps
+    for path in paths:
+        try:
+            st = os.stat(pathstr(path))
+        except FileNotFoundError:
+            stamps[pathstr(path)] = None
+        else:
+            stamps[pathstr(path)] = [st.st_mtime_ns, st.st_size]
+    return stamps
+
+
+def is_outdated(buildinfo: Optional[Dict[str, Any]], stamps: Stamps) -> bool:
+    return buildinfo is None or buildinfo.get("inputs") != stamps
+
+
+def low_priority_prefix() -> Cmd:
+    """
+    Command prefix to run a process with the lowest CPU and I/O priority.
+    """
+    prefix = []  # type: Cmd
+    if which("nice"):
+        prefix.extend(["nice", "-n", "19"])
+    if which("ionice"):
+        prefix.extend(["ionice", "-c", "3"])
+    return prefix
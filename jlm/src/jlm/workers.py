@@ -0,0 +1,66 @@
+"""
+Command lines for Distributed.jl workers (``jlm workers-cmd``).
+
+Workers are started with the same system image and environment
+(``$JLM_PRECOMPILE_KEY`` etc.) as ``jlm run`` so that they can reuse
+the precompilation caches of the master process.  Optionally, each
+worker is pinned to a CPU core (via ``taskset``) or a NUMA node (via
+``numactl``).  ``JuliaManager.addprocs`` does the same from inside
+Julia.
+"""
+
+import os
+import re
+from pathlib import Path
+from shutil import which
+from typing import List
+
+from .utils import ApplicationError, Cmd
+
+PIN_CHOICES = ("cores", "numa")
+
+NODE_DIR = Path("/sys/devices/system/node")
+
+
+def available_cores() -> List[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not Linux
+        return list(range(os.cpu_count() or 1))
+
+
+def numa_nodes() -> List[int]:
+    try:
+        names = os.listdir(str(NODE_DIR))
+    except OSError:
+        return [0]
+    nodes = []
+    for name in names:
+        m = re.match(r"^node(\d+)$", name)
+        if m:
+            nodes.append(int(m.group(1)))
+    return sorted(nodes) or [0]
+
+
+def pinning_prefixes(count: int, pin: str) -> List[Cmd]:
+    """
+    Command prefixes pinning `count` workers in a round-robin fashion.
+    """
+    if pin == "cores":
+        if not which("taskset"):
+            raise ApplicationError("`taskset` is required for --pin=cores")
+        cores = available_cores()
+        return [["taskset", "-c", str(cores[i % len(cores)])] for i in range(count)]
+    elif pin == "numa":
+        if not which("numactl"):
+            raise ApplicationError("`numactl` is required for --pin=numa")
+        nodes = numa_nodes()
+        return [
+            [
+                "numactl",
+                "--cpunodebind={}".format(nodes[i % len(nodes)]),
+                "--membind={}".format(nodes[i % len(nodes)]),
+            ]
+            for i in range(count)
+        ]
+    raise ValueError("Unknown pinning: {}".format(pin))
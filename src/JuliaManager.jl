@@ -6,6 +6,8 @@ const version = v"0.2.0-DEV"
 include("SysImageHack/SysImageHack.jl")
 using .SysImageHack: compile_patched_sysimage
 
+include("workers.jl")
+
 bundled_jlm() = joinpath(dirname(@__DIR__), "jlm", "jlm")
 
 """
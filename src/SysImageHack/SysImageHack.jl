@@ -1,16 +1,69 @@
 module SysImageHack
 
-using PackageCompiler: compile_incremental
+import PackageCompiler
 
 assetpath(name) = joinpath(@__DIR__, "scripts", name)
 
-function compile_patched_sysimage(sysimage; kwargs...)
-    tmp_syso, _curr_syso = compile_incremental(
-        assetpath("Project.toml"),
-        assetpath("patch.jl");
-        kwargs...)
-    cp(tmp_syso, sysimage, force=true)
+"""
+    compile_patched_sysimage(sysimage; project, cpu_target, precompile_file,
+                             lean, packages, kwargs...)
+
+Compile a system image with the patch in `scripts/patch.jl` and store
+it at `sysimage`.  Packages in `project` (a path to `Project.toml`)
+are included in the system image.  Other keyword arguments (e.g.,
+`cpu_target = "generic;skylake-avx512,clone_all;znver2"` and
+`precompile_file`) are passed to `PackageCompiler.compile_incremental`.
+
+With `lean = "yes"`, the system image is built from scratch by
+`PackageCompiler.create_sysimage` with `filter_stdlibs = true` so that
+it contains only `packages` (comma-separated names) and the standard
+libraries they depend on.
+"""
+function compile_patched_sysimage(sysimage;
+                                  project = assetpath("Project.toml"),
+                                  lean = "no",
+                                  packages = "",
+                                  kwargs...)
+    if lean == "yes"
+        tmp_syso = compile_lean_sysimage(project, packages; kwargs...)
+    else
+        tmp_syso, _curr_syso = PackageCompiler.compile_incremental(
+            project,
+            assetpath("patch.jl");
+            kwargs...)
+    end
+    # Do not overwrite `sysimage` in place since it may be mapped by
+    # running processes.  Renaming replaces the directory entry while
+    # keeping the old file alive until it is unmapped.
+    tmp = "$sysimage.$(getpid()).tmp"
+    cp(tmp_syso, tmp, force=true)
+    Base.Filesystem.rename(tmp, sysimage)
     return
 end
 
+function compile_lean_sysimage(project, packages;
+                               precompile_file = nothing,
+                               kwargs...)
+    if !isdefined(PackageCompiler, :create_sysimage)
+        error("Lean system image requires `PackageCompiler.create_sysimage`.")
+    end
+    create_sysimage = PackageCompiler.create_sysimage
+    # `hasmethod` with keyword names requires Julia >= 1.2, which is
+    # guaranteed by PackageCompiler versions with `create_sysimage`:
+    if !hasmethod(create_sysimage, Tuple{Vector{Symbol}}, (:script,))
+        error("Lean system image requires PackageCompiler with `script` option.")
+    end
+    tmp_syso = tempname() * "." * Base.Libc.Libdl.dlext
+    create_sysimage(
+        Symbol.(split(packages, ",", keepempty = false));
+        sysimage_path = tmp_syso,
+        project = dirname(project),
+        precompile_statements_file = something(precompile_file, String[]),
+        script = assetpath("patch.jl"),
+        incremental = false,
+        filter_stdlibs = true,
+        kwargs...)
+    return tmp_syso
+end
+
 end  # module
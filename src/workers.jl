@@ -0,0 +1,103 @@
+# Distributed is loaded only when workers are started so that it is not
+# loaded whenever JuliaManager is:
+const DISTRIBUTED =
+    Base.PkgId(Base.UUID("8ba89e20-285c-5b6f-9357-94700520ee1b"), "Distributed")
+
+"""
+    JuliaManager.worker_options() :: NamedTuple
+
+Keyword arguments for `Distributed.addprocs` to start workers with the
+same system image and precompilation key as the current process (e.g.,
+the one launched by `jlm run`) so that workers can reuse its
+precompilation caches.  It is equivalent to `jlm workers-cmd --json`.
+"""
+function worker_options()
+    exename = joinpath(Sys.BINDIR, Base.julia_exename())
+    image_file = unsafe_string(Base.JLOptions().image_file)
+    exeflags = `--sysimage=$image_file`
+    env = [k => ENV[k] for k in ("JLM_PRECOMPILE_KEY", "JULIA_DEPOT_PATH")
+           if haskey(ENV, k)]
+    return (exename = exename, exeflags = exeflags, env = env)
+end
+
+"""
+    parse_cpulist("0-3,8,10-11") :: Vector{Int}
+
+Parse a CPU list as in `/proc/self/status` and `cpuset.cpus`.
+"""
+function parse_cpulist(spec::AbstractString)
+    cpus = Int[]
+    for part in split(strip(spec), ",")
+        a, b = occursin("-", part) ? split(part, "-") : (part, part)
+        append!(cpus, parse(Int, a):parse(Int, b))
+    end
+    return sort!(unique!(cpus))
+end
+
+"""
+    available_cores() :: Vector{Int}
+
+CPUs this process can run on; i.e., the affinity mask which is also
+restricted by the cpuset of the cgroup (e.g., of a batch job).  Same as
+`available_cores` of `jlm`.
+"""
+function available_cores()
+    if Sys.islinux()
+        for line in eachline("/proc/self/status")
+            m = match(r"^Cpus_allowed_list:\s*(.*)$", line)
+            m === nothing || return parse_cpulist(m[1])
+        end
+    end
+    return collect(0:Sys.CPU_THREADS - 1)
+end
+
+function numa_nodes()
+    nodedir = "/sys/devices/system/node"
+    isdir(nodedir) || return [0]
+    nodes = [parse(Int, m[1]) for m in
+             (match(r"^node(\d+)$", name) for name in readdir(nodedir))
+             if m !== nothing]
+    return isempty(nodes) ? [0] : sort!(nodes)
+end
+
+function pinning_prefixes(np::Integer, pin::Symbol)
+    if pin === :cores
+        Sys.which("taskset") === nothing &&
+            error("`taskset` is required for `pin = :cores`")
+        cores = available_cores()
+        return [`taskset -c $(cores[mod1(i, length(cores))])` for i in 1:np]
+    elseif pin === :numa
+        Sys.which("numactl") === nothing &&
+            error("`numactl` is required for `pin = :numa`")
+        nodes = numa_nodes()
+        return map(1:np) do i
+            n = nodes[mod1(i, length(nodes))]
+            `numactl --cpunodebind=$n --membind=$n`
+        end
+    end
+    throw(ArgumentError("`pin` must be `:cores`, `:numa` or `nothing`; got: $pin"))
+end
+
+"""
+    JuliaManager.addprocs(np; pin = nothing, kwargs...) :: Vector{Int}
+
+Like `Distributed.addprocs(np; kwargs...)` but start workers with
+[`JuliaManager.worker_options`](@ref).  If `pin` is `:cores` or
+`:numa`, each worker is pinned to a CPU core (using `taskset`) or a
+NUMA node (using `numactl`) in a round-robin fashion.
+"""
+function addprocs(np::Integer; pin::Union{Nothing,Symbol} = nothing, kwargs...)
+    options = worker_options()
+    # Distributed may be loaded after this method is compiled (world age):
+    Distributed = Base.require(DISTRIBUTED)
+    pin === nothing &&
+        return Base.invokelatest(Distributed.addprocs, np; options..., kwargs...)
+    pids = Int[]
+    for prefix in pinning_prefixes(np, pin)
+        exename = `$prefix $(options.exename)`
+        append!(pids,
+                Base.invokelatest(Distributed.addprocs, 1;
+                                  options..., exename = exename, kwargs...))
+    end
+    return pids
+end
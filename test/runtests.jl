@@ -2,6 +2,8 @@ module TestJuliaManager
 
 using Test
 
+@testset "workers" begin include("test_workers.jl") end
+
 if lowercase(get(ENV, "CI", "false")) == "true"
     @testset begin include("destructive_tests.jl") end
 end
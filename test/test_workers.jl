@@ -0,0 +1,36 @@
+module TestWorkers
+
+using JuliaManager
+using JuliaManager: available_cores, parse_cpulist, pinning_prefixes
+using Test
+
+@testset "parse_cpulist" begin
+    @test parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    @test parse_cpulist("5") == [5]
+end
+
+@testset "available_cores" begin
+    cores = available_cores()
+    @test !isempty(cores)
+    @test issorted(cores)
+    @test length(cores) <= Sys.CPU_THREADS
+end
+
+if Sys.which("taskset") !== nothing
+    @testset "pin = :cores" begin
+        cores = available_cores()
+        prefixes = pinning_prefixes(length(cores) + 1, :cores)
+        @test prefixes[1] == `taskset -c $(cores[1])`
+        @test prefixes[end] == prefixes[1]
+    end
+end
+
+@testset "unknown pinning" begin
+    @test_throws ArgumentError pinning_prefixes(1, :sockets)
+end
+
+@testset "Distributed is loaded lazily" begin
+    @test !isdefined(JuliaManager, :Distributed)
+end
+
+end  # module